@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark the cold start of generated models in each output mode.
+
+Generates a scaled-up copy of a SAML sample once per output mode, then
+starts a fresh interpreter in the output directory the way experiment.py
+does: import model, build SystemModel and run the first event of the
+imminent submodel (its outputFnc and intTransition). The time from
+launching the interpreter to the end of that first event is reported for
+the first run, when no bytecode is cached yet, and as the best of the
+following runs. PythonPDEVS must be importable.
+
+Usage:
+    python benchmarks/bench_cold_start.py [--copies N] [--repeat R] [--saml FILE]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from generator import debug_utils
+from generator.file_generators import generate_pydevs_from_saml
+from synthetic import scale_saml
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'SAML-SAMPLE', 'model', 'FirstProgram.capssaml')
+
+# Output modes as generate_pydevs_from_saml options
+MODES = {
+    'module per component': {'shared_classes': False},
+    'shared classes': {},
+    'bundle': {'bundle': True},
+    'bundle + precompile': {'bundle': True, 'precompile': True},
+}
+
+# Run in the output directory by every measured interpreter
+DRIVER = """
+import io, sys, time, contextlib
+start = float(sys.argv[1])
+with contextlib.redirect_stdout(io.StringIO()):
+    import model
+    system = model.SystemModel()
+    imminent = min(system.component_set, key=lambda submodel: submodel.timeAdvance())
+    imminent.outputFnc()
+    imminent.intTransition()
+print(time.time() - start)
+"""
+
+def cold_start(output_dir):
+    """Return the seconds from launching an interpreter to the end of the first event."""
+    # Let the first run cache bytecode for the warm runs, as it would outside the benchmark
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    
+    start = time.time()
+    result = subprocess.run([sys.executable, '-c', DRIVER, repr(start)], cwd=output_dir,
+                            env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise SystemExit(f"Model in {output_dir} failed to start:\n{result.stderr}")
+    return float(result.stdout.split()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the cold start of generated models in each output mode')
+    parser.add_argument('--saml', default=SAMPLE, help='SAML sample to scale up')
+    parser.add_argument('--copies', type=int, default=500, help='Copies of the sample in the synthetic model')
+    parser.add_argument('--repeat', type=int, default=5, help='Warm runs per mode (the best is kept)')
+    args = parser.parse_args()
+    
+    debug_utils.DEBUG = False
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        saml_file = os.path.join(tmp_dir, 'synthetic.capssaml')
+        elements = scale_saml(args.saml, saml_file, args.copies)
+        print(f"{os.path.basename(args.saml)} x{args.copies}: {elements} elements")
+        print(f"{'mode':24} {'files':>6} {'first run':>11} {'warm best':>11}")
+        
+        for mode, options in MODES.items():
+            output_dir = os.path.join(tmp_dir, mode.replace(' ', '_').replace('+', 'and'))
+            files = generate_pydevs_from_saml(saml_file, output_dir=output_dir, use_cache=False, **options)
+            first = cold_start(output_dir)
+            warm = min(cold_start(output_dir) for _ in range(args.repeat))
+            print(f"{mode:24} {len(files):>6} {first * 1000:9.1f}ms {warm * 1000:9.1f}ms")
+    
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark simulation throughput of flat and hierarchical coupled models.
+
+Generates a scaled-up copy of a SAML sample as one flat coupled model and
+as nested clusters for each clustering strategy, then simulates each model
+in a fresh interpreter with the classic DEVS simulator of PythonPDEVS up to
+the same termination time. Only the simulate() call is timed; building the
+model is reported separately. PythonPDEVS must be importable.
+
+Usage:
+    python benchmarks/bench_hierarchy.py [--copies N] [--until T] [--cluster-size S] [--repeat R] [--saml FILE]
+"""
+import os
+import sys
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from generator import debug_utils
+from generator.clustering import STRATEGIES, DEFAULT_CLUSTER_SIZE
+from generator.file_generators import generate_pydevs_from_saml
+from synthetic import scale_saml
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'SAML-SAMPLE', 'model', 'FirstProgram.capssaml')
+
+# Run in the output directory by every measured interpreter
+DRIVER = """
+import io, sys, time, contextlib
+with contextlib.redirect_stdout(io.StringIO()):
+    start = time.perf_counter()
+    import model
+    from pypdevs.simulator import Simulator
+    simulator = Simulator(model.SystemModel())
+    simulator.setClassicDEVS()
+    simulator.setTerminationTime(float(sys.argv[1]))
+    built = time.perf_counter()
+    simulator.simulate()
+    done = time.perf_counter()
+print(built - start, done - built)
+"""
+
+def simulate(output_dir, until):
+    """Return (seconds to build the model, seconds to simulate it until the termination time)."""
+    result = subprocess.run([sys.executable, '-c', DRIVER, repr(until)], cwd=output_dir,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise SystemExit(f"Model in {output_dir} failed to simulate:\n{result.stderr}")
+    build, run = result.stdout.split()[-2:]
+    return float(build), float(run)
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the simulation throughput of flat and hierarchical coupled models')
+    parser.add_argument('--saml', default=SAMPLE, help='SAML sample to scale up')
+    parser.add_argument('--copies', type=int, default=200, help='Copies of the sample in the synthetic model')
+    parser.add_argument('--until', type=float, default=1000.0, help='Simulated time of every run')
+    parser.add_argument('--cluster-size', dest='cluster_size', type=int, default=DEFAULT_CLUSTER_SIZE,
+                        help='Largest number of components in a cluster')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per model (the best is kept)')
+    args = parser.parse_args()
+    
+    debug_utils.DEBUG = False
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        saml_file = os.path.join(tmp_dir, 'synthetic.capssaml')
+        elements = scale_saml(args.saml, saml_file, args.copies)
+        print(f"{os.path.basename(args.saml)} x{args.copies}: {elements} elements, simulated until {args.until}")
+        print(f"{'model':12} {'build':>10} {'simulate':>10} {'sim time/s':>12}")
+        
+        flat_time = None
+        for strategy in (None,) + STRATEGIES:
+            output_dir = os.path.join(tmp_dir, strategy or 'flat')
+            generate_pydevs_from_saml(saml_file, output_dir=output_dir, use_cache=False, bundle=True,
+                                      cluster_strategy=strategy, cluster_size=args.cluster_size)
+            runs = [simulate(output_dir, args.until) for _ in range(args.repeat)]
+            build = min(run[0] for run in runs)
+            run = min(run[1] for run in runs)
+            flat_time = flat_time or run
+            print(f"{strategy or 'flat':12} {build * 1000:8.1f}ms {run * 1000:8.1f}ms {args.until / run:12.1f}"
+                  f"  ({flat_time / run:.2f}x flat)")
+    
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
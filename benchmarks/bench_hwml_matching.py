@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark HWML-to-SAML component matching.
+
+Compares the indexed matcher used by merge_hwml_nodes against the original
+nested substring loop on synthetic component and node names.
+
+Usage:
+    python benchmarks/bench_hwml_matching.py [--components N] [--nodes M]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from generator.component_extraction import ComponentNameIndex
+
+KINDS = ['Temperature Sensor', 'Humidity Sensor', 'Window Actuator', 'Fan Actuator', 'Controller', 'Gateway Interface']
+
+def make_names(count, rng):
+    """Return count distinct names such as 'Temperature Sensor 17'."""
+    return [f"{rng.choice(KINDS)} {i}" for i in range(count)]
+
+def linear_match(components, node_name):
+    """The original O(N) scan: first component whose name contains or is contained in the node name."""
+    node_name_clean = node_name.replace(' ', '')
+    for comp in components:
+        comp_name = comp['name'].replace(' ', '')
+        if node_name_clean in comp_name or comp_name in node_name_clean:
+            return comp
+    return None
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark HWML node to component name matching')
+    parser.add_argument('--components', type=int, default=10000, help='Number of SAML components')
+    parser.add_argument('--nodes', type=int, default=10000, help='Number of HWML nodes')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed for the synthetic names')
+    parser.add_argument('--skip-linear', action='store_true', help='Only time the indexed matcher')
+    args = parser.parse_args()
+    
+    rng = random.Random(args.seed)
+    components = [{'name': name} for name in make_names(args.components, rng)]
+    # Half of the nodes name an existing component, the rest are new hardware
+    nodes = [comp['name'] for comp in rng.sample(components, min(args.nodes // 2, len(components)))]
+    nodes += [f"Node {i}" for i in range(args.nodes - len(nodes))]
+    rng.shuffle(nodes)
+    
+    print(f"{len(components)} components x {len(nodes)} nodes")
+    
+    start = time.perf_counter()
+    index = ComponentNameIndex(components)
+    build_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    indexed = [index.match(name) for name in nodes]
+    match_time = time.perf_counter() - start
+    ambiguous = sum(1 for _, matches in indexed if len(matches) > 1)
+    print(f"indexed: build {build_time:.3f}s, match {match_time:.3f}s "
+          f"({len(nodes) / max(match_time, 1e-9):,.0f} nodes/s), {ambiguous} ambiguous")
+    
+    if args.skip_linear:
+        return 0
+    
+    start = time.perf_counter()
+    linear = [linear_match(components, name) for name in nodes]
+    linear_time = time.perf_counter() - start
+    print(f"linear:  match {linear_time:.3f}s ({len(nodes) / max(linear_time, 1e-9):,.0f} nodes/s)")
+    print(f"speedup: {linear_time / max(build_time + match_time, 1e-9):.1f}x")
+    
+    # Both must agree whenever the match is unambiguous
+    mismatches = sum(1 for (best, matches), old in zip(indexed, linear)
+                     if len(matches) <= 1 and best is not old)
+    print(f"disagreements on unambiguous nodes: {mismatches}")
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
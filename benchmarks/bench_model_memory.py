@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark the memory of generated models with and without --compact.
+
+Generates a scaled-up copy of a SAML sample once as plain models and once
+as compact models (slotted state classes, sensors sending SensorReading
+tuples instead of oneM2M dicts), then builds SystemModel in a fresh
+interpreter and runs one event of every submodel that has one scheduled.
+The memory allocated by building the model and the peak while running the
+events are measured with tracemalloc and reported per component. PythonPDEVS must be importable.
+
+Usage:
+    python benchmarks/bench_model_memory.py [--copies N] [--saml FILE]
+"""
+import os
+import sys
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from generator import debug_utils
+from generator.file_generators import generate_pydevs_from_saml
+from synthetic import scale_saml
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'SAML-SAMPLE', 'model', 'FirstProgram.capssaml')
+
+# Run in the output directory by every measured interpreter
+DRIVER = """
+import io, contextlib, tracemalloc
+with contextlib.redirect_stdout(io.StringIO()):
+    import model
+    tracemalloc.start()
+    system = model.SystemModel()
+    built = tracemalloc.get_traced_memory()[0]
+    outputs = []
+    for submodel in system.component_set:
+        if submodel.timeAdvance() == float('inf'):
+            continue
+        outputs.append(submodel.outputFnc())
+        submodel.intTransition()
+    peak = tracemalloc.get_traced_memory()[1]
+print(len(system.component_set), built, peak)
+"""
+
+def model_memory(output_dir):
+    """Return (submodels, bytes allocated building the model, peak bytes after one event of each scheduled submodel)."""
+    result = subprocess.run([sys.executable, '-c', DRIVER], cwd=output_dir,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise SystemExit(f"Model in {output_dir} failed to run:\n{result.stderr}")
+    submodels, built, peak = result.stdout.split()[-3:]
+    return int(submodels), int(built), int(peak)
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the memory of plain and compact generated models')
+    parser.add_argument('--saml', default=SAMPLE, help='SAML sample to scale up')
+    parser.add_argument('--copies', type=int, default=500, help='Copies of the sample in the synthetic model')
+    args = parser.parse_args()
+    
+    debug_utils.DEBUG = False
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        saml_file = os.path.join(tmp_dir, 'synthetic.capssaml')
+        elements = scale_saml(args.saml, saml_file, args.copies)
+        print(f"{os.path.basename(args.saml)} x{args.copies}: {elements} elements")
+        print(f"{'mode':10} {'submodels':>10} {'built':>12} {'peak':>12}")
+        
+        for mode, compact in (('plain', False), ('compact', True)):
+            output_dir = os.path.join(tmp_dir, mode)
+            generate_pydevs_from_saml(saml_file, output_dir=output_dir, use_cache=False, compact=compact)
+            submodels, built, peak = model_memory(output_dir)
+            print(f"{mode:10} {submodels:>10} {built / submodels:8.0f} B/c {peak / submodels:8.0f} B/c")
+    
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
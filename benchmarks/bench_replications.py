@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Benchmark how the wall time of a batch of replications scales with workers.
+
+Generates a scaled-up copy of a SAML sample, then runs the same seeded
+replications with 1, 2, 4, ... worker processes up to the CPU count and
+reports the wall time and the speedup over one worker. PythonPDEVS must be
+importable.
+
+Usage:
+    python benchmarks/bench_replications.py [--copies N] [--replications R] [--until T] [--saml FILE]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from generator import debug_utils
+from generator.file_generators import generate_pydevs_from_saml
+from generator.replication import run_replications
+from synthetic import scale_saml
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'SAML-SAMPLE', 'model', 'FirstProgram.capssaml')
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure how replications scale with worker processes')
+    parser.add_argument('--saml', default=SAMPLE, help='SAML sample to scale up')
+    parser.add_argument('--copies', type=int, default=20, help='Copies of the sample in the synthetic model')
+    parser.add_argument('--replications', type=int, default=16, help='Replications per run')
+    parser.add_argument('--until', type=float, default=3600.0, help='Simulated time of every replication')
+    args = parser.parse_args()
+    
+    debug_utils.DEBUG = False
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        saml_file = os.path.join(tmp_dir, 'synthetic.capssaml')
+        elements = scale_saml(args.saml, saml_file, args.copies)
+        output_dir = os.path.join(tmp_dir, 'model')
+        generate_pydevs_from_saml(saml_file, output_dir=output_dir, use_cache=False, bundle=True)
+        print(f"{os.path.basename(args.saml)} x{args.copies}: {elements} elements, "
+              f"{args.replications} replications until {args.until}")
+        print(f"{'jobs':>4} {'wall time':>10} {'speedup':>8}")
+        
+        jobs = 1
+        single = None
+        while True:
+            start = time.perf_counter()
+            run_replications(output_dir, args.replications, until=args.until, jobs=jobs)
+            wall_time = time.perf_counter() - start
+            single = single or wall_time
+            print(f"{jobs:>4} {wall_time:9.3f}s {single / wall_time:7.2f}x")
+            if jobs >= (os.cpu_count() or 1):
+                break
+            jobs = min(jobs * 2, os.cpu_count() or 1)
+    
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark how many sensor events per second generated sensors handle.
+
+Generates a model of only periodic sensors, all reporting to the sink,
+then drives it in a fresh interpreter: every event runs the imminent
+sensor's outputFnc, passes the message to the sink's extTransition and
+runs the sensor's intTransition and timeAdvance, which is the work a
+classic DEVS simulator asks of the model for each event. Scheduling is
+left out so the numbers only reflect the generated code. PythonPDEVS must
+be importable.
+
+Usage:
+    python benchmarks/bench_sensor_events.py [--sensors N] [--events E] [--repeat R]
+"""
+import os
+import sys
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from generator import debug_utils
+from generator.file_generators import generate_model_file, generate_random_stream_file, generate_sensor_file, generate_sink_file
+
+# Run in the output directory by every measured interpreter
+DRIVER = """
+import io, sys, time, heapq, contextlib
+events = int(sys.argv[1])
+with contextlib.redirect_stdout(io.StringIO()):
+    import model
+    system = model.SystemModel()
+    sink = system.sink
+    sensors = [submodel for submodel in system.component_set if submodel is not sink]
+    queue = [(sensor.timeAdvance(), index) for index, sensor in enumerate(sensors)]
+    heapq.heapify(queue)
+    start = time.perf_counter()
+    for _ in range(events):
+        now, index = queue[0]
+        sensor = sensors[index]
+        for message in sensor.outputFnc().values():
+            sink.extTransition({sink.inport: message})
+        sensor.intTransition()
+        heapq.heapreplace(queue, (now + sensor.timeAdvance(), index))
+    elapsed = time.perf_counter() - start
+print(elapsed)
+"""
+
+def sensor_model(count, output_dir):
+    """Generate a model of count sensors whose outputs all go to the sink."""
+    components = []
+    for index in range(count):
+        components.append({
+            'name': f"Temperature Sensor {index}",
+            'type': 'sensor',
+            'in_ports': [],
+            'out_ports': [0],
+            'data_interval': 1.0 + index % 7
+        })
+        generate_sensor_file(components[-1], output_dir)
+    generate_random_stream_file(output_dir)
+    generate_sink_file(output_dir)
+    generate_model_file(components, [], output_dir)
+
+def events_per_second(output_dir, events):
+    """Return the events per second of the model in output_dir."""
+    result = subprocess.run([sys.executable, '-c', DRIVER, str(events)], cwd=output_dir,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise SystemExit(f"Model in {output_dir} failed to run:\n{result.stderr}")
+    return events / float(result.stdout.split()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the events per second of a sensor-only model')
+    parser.add_argument('--sensors', type=int, default=100, help='Sensors in the model')
+    parser.add_argument('--events', type=int, default=200000, help='Events per run')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs (the best is kept)')
+    args = parser.parse_args()
+    
+    debug_utils.DEBUG = False
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sensor_model(args.sensors, tmp_dir)
+        best = max(events_per_second(tmp_dir, args.events) for _ in range(args.repeat))
+        print(f"{args.sensors} sensors, {args.events} events: {best:,.0f} events/s")
+    
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark the lxml and ElementTree XML backends.
+
+Reads every bundled sample, and copies of them scaled up to larger
+models, with each available backend in both tree and streaming mode. Only
+reading the document is timed, since that is all a backend changes: the
+components are extracted by the same Python code whichever parser built
+the elements. Each backend must still extract the same model from every
+file.
+
+Usage:
+    python benchmarks/bench_xml_backends.py [--copies N ...] [--repeat R]
+"""
+import os
+import sys
+import glob
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from generator import debug_utils, xml_backend
+from generator.saml_parser import parse_saml_file, parse_hwml_file
+from synthetic import scale_saml
+
+SAMPLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'SAML-SAMPLE', 'model')
+
+def best_time(func, repeat):
+    """Return the fastest of `repeat` runs of func, in seconds."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def stream(path):
+    """Read a file with iterparse, clearing every element once it is complete."""
+    for _, element in xml_backend.iterparse(path):
+        element.clear()
+
+def bench_file(path, repeat):
+    """Time reading one file with every backend and mode; return {(backend, mode): seconds}."""
+    timings = {}
+    results = {}
+    for backend in xml_backend.available_backends():
+        xml_backend.set_backend(backend)
+        timings[(backend, 'tree')] = best_time(lambda: xml_backend.parse(path), repeat)
+        timings[(backend, 'stream')] = best_time(lambda: stream(path), repeat)
+        
+        # Both backends must read the same model
+        if path.endswith('.capshwml'):
+            models = {'tree': parse_hwml_file(path)}
+        else:
+            models = {'tree': parse_saml_file(path), 'stream': parse_saml_file(path, streaming=True)}
+        for mode, model in models.items():
+            key = repr(model)
+            if results.setdefault(mode, key) != key:
+                raise SystemExit(f"{backend} backend disagrees on {path} ({mode})")
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the lxml and ElementTree backends')
+    parser.add_argument('--copies', type=int, nargs='*', default=[100, 1000],
+                        help='Scale factors for the synthetic copies of each SAML sample')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement (the best is kept)')
+    args = parser.parse_args()
+    
+    debug_utils.DEBUG = False
+    backends = xml_backend.available_backends()
+    columns = [(backend, mode) for backend in backends for mode in ('tree', 'stream')]
+    print(f"{'file':40} {'elements':>9} " + ' '.join(f"{backend + '/' + mode:>13}" for backend, mode in columns))
+    
+    samples = sorted(glob.glob(os.path.join(SAMPLE_DIR, '*.capssaml')) + glob.glob(os.path.join(SAMPLE_DIR, '*.capshwml')))
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        files = [(os.path.basename(path), path, '') for path in samples]
+        for copies in args.copies:
+            for path in samples:
+                if not path.endswith('.capssaml'):
+                    continue
+                name = f"{os.path.splitext(os.path.basename(path))[0]} x{copies}"
+                scaled = os.path.join(tmp_dir, name.replace(' ', '_') + '.capssaml')
+                files.append((name, scaled, scale_saml(path, scaled, copies)))
+        
+        for name, path, elements in files:
+            timings = bench_file(path, args.repeat)
+            cells = [f"{timings[column] * 1000:11.2f}ms" for column in columns]
+            print(f"{name:40} {elements:>9} " + ' '.join(cells))
+    
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
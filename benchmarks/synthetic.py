@@ -0,0 +1,38 @@
+"""
+Helpers for building large synthetic models out of the bundled samples.
+"""
+import re
+
+ELEMENT_REF = re.compile(r'//@SAElements\.(\d+)')
+COMPONENT_NAME = re.compile(r'(<SAElements xsi:type="components:Component" name=")([^"]*)(")')
+
+def scale_saml(src_path, dest_path, copies):
+    """
+    Write a SAML file holding `copies` copies of the model in src_path.
+    
+    Every copy keeps the structure of the original. Reference paths are
+    shifted so they point into their own copy, and component names get a
+    copy suffix so they stay unique.
+    
+    Returns:
+        int: the number of SAElements in the written file
+    """
+    with open(src_path, encoding='utf-8') as f:
+        text = f.read()
+    
+    body_start = text.index('<SAElements')
+    body_end = text.rindex('</')
+    header, body, footer = text[:body_start], text[body_start:body_end], text[body_end:]
+    count = len(re.findall(r'<SAElements\b', body))
+    
+    with open(dest_path, 'w', encoding='utf-8') as f:
+        f.write(header)
+        for copy in range(copies):
+            offset = copy * count
+            shifted = ELEMENT_REF.sub(lambda m: f"//@SAElements.{int(m.group(1)) + offset}", body)
+            if copy:
+                shifted = COMPONENT_NAME.sub(lambda m: f"{m.group(1)}{m.group(2)}_{copy}{m.group(3)}", shifted)
+            f.write(shifted)
+        f.write(footer)
+    
+    return copies * count
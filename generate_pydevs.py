@@ -1,15 +1,121 @@
 #!/usr/bin/env python3
 import os
 import sys
+import glob
+import time
 import argparse
-from generator.file_generators import generate_pydevs_from_saml
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from generator.clustering import STRATEGIES, DEFAULT_CLUSTER_SIZE
+from generator.file_generators import SENSOR_BANK_MODES, generate_pydevs_from_saml
+from generator.output_writer import writer
+
+def find_models(batch):
+    """Return the SAML files named by a directory or a glob pattern."""
+    if os.path.isdir(batch):
+        return sorted(glob.glob(os.path.join(batch, '*.capssaml')))
+    return sorted(glob.glob(batch, recursive=True))
+
+def matching_hwml(saml_file):
+    """Return the .capshwml file next to a SAML file with the same name, if any."""
+    hwml_file = os.path.splitext(saml_file)[0] + '.capshwml'
+    return hwml_file if os.path.exists(hwml_file) else None
+
+def generate_one(saml_file, hwml_file, output_dir, use_cache, incremental, shared_classes=True, bundle=False, precompile=False,
+                 cluster_strategy=None, cluster_size=DEFAULT_CLUSTER_SIZE, sensor_banks=None, compact=False):
+    """
+    Generate the PyDEVS files for one model (run in a worker process).
+    
+    Returns:
+        tuple: (saml_file, output_dir, generated files or None, error message or None, seconds,
+            number of files written)
+    """
+    start = time.perf_counter()
+    counts = writer.counts()
+    try:
+        generated_files = generate_pydevs_from_saml(saml_file, hwml_file, output_dir,
+                                                    use_cache=use_cache, incremental=incremental,
+                                                    shared_classes=shared_classes, bundle=bundle,
+                                                    precompile=precompile, cluster_strategy=cluster_strategy,
+                                                    cluster_size=cluster_size, sensor_banks=sensor_banks,
+                                                    compact=compact)
+        written = writer.counts()[0] - counts[0]
+        return saml_file, output_dir, generated_files, None, time.perf_counter() - start, written
+    except Exception as e:
+        return saml_file, output_dir, None, str(e), time.perf_counter() - start, 0
+
+def run_batch(args):
+    """Generate every model matched by --batch, each into its own output directory."""
+    saml_files = find_models(args.batch)
+    if not saml_files:
+        print(f"Error: No SAML files found for: {args.batch}")
+        return 1
+    
+    base_dir = args.output_dir or os.path.join(
+        args.batch if os.path.isdir(args.batch) else os.path.dirname(saml_files[0]), "generated_pydevs")
+    jobs = max(1, args.jobs or os.cpu_count() or 1)
+    
+    tasks = []
+    for saml_file in saml_files:
+        hwml_file = args.hwml_file or matching_hwml(saml_file)
+        name = os.path.splitext(os.path.basename(saml_file))[0]
+        tasks.append((saml_file, hwml_file, os.path.join(base_dir, name), not args.no_cache, not args.full,
+                      args.shared_classes, args.bundle, args.precompile, args.clusters, args.cluster_size,
+                      args.sensor_banks, args.compact))
+    
+    print(f"Generating PyDEVS files for {len(tasks)} models with {jobs} job(s)")
+    start = time.perf_counter()
+    if jobs == 1:
+        results = [generate_one(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(generate_one, *task) for task in tasks]
+            results = [future.result() for future in as_completed(futures)]
+    wall_time = time.perf_counter() - start
+    
+    results.sort(key=lambda result: result[0])
+    failures = [result for result in results if result[3] is not None]
+    
+    print("\nPer-model results:")
+    for saml_file, output_dir, generated_files, error, seconds, written in results:
+        if error is None:
+            print(f"  OK    {seconds:7.3f}s  {saml_file} -> {output_dir} ({len(generated_files)} files, {written} written)")
+        else:
+            print(f"  FAIL  {seconds:7.3f}s  {saml_file}: {error}")
+    
+    print(f"\n{len(results) - len(failures)} succeeded, {len(failures)} failed "
+          f"in {wall_time:.3f}s wall time ({sum(result[4] for result in results):.3f}s total model time)")
+    return 1 if failures else 0
 
 def main():
     parser = argparse.ArgumentParser(description='Generate PyDEVS files from SAML models')
-    parser.add_argument('saml_file', help='Path to the SAML (.capssaml) file')
+    parser.add_argument('saml_file', nargs='?', help='Path to the SAML (.capssaml) file')
     parser.add_argument('--hwml', dest='hwml_file', help='Optional path to HWML file for hardware details')
     parser.add_argument('--output-dir', dest='output_dir', help='Directory where PyDEVS files will be generated')
     parser.add_argument('--verbose', action='store_true', help='Enable verbose output')
+    parser.add_argument('--no-cache', dest='no_cache', action='store_true', help='Always re-parse the input files instead of using the parsed model cache')
+    parser.add_argument('--full', action='store_true', help='Rewrite every output file, even those whose inputs did not change')
+    parser.add_argument('--class-per-component', dest='shared_classes', action='store_false',
+                        help='Generate a module for every component instead of one class per distinct component shape')
+    parser.add_argument('--bundle', action='store_true',
+                        help='Write all component classes, the sink and the coupled model into a single model.py')
+    parser.add_argument('--precompile', action='store_true', help='Also compile the bundled model.py to bytecode (with --bundle)')
+    parser.add_argument('--clusters', choices=STRATEGIES,
+                        help='Nest the components in coupled models grouped by connected component, '
+                             'by a partition of the connection graph or by HWML network (default: one flat coupled model)')
+    parser.add_argument('--cluster-size', dest='cluster_size', type=int, default=DEFAULT_CLUSTER_SIZE,
+                        help=f'Largest number of components in a cluster (default: {DEFAULT_CLUSTER_SIZE})')
+    parser.add_argument('--sensor-banks', dest='sensor_banks', choices=SENSOR_BANK_MODES,
+                        help='Simulate each group of identical sensors with one array-backed SensorBank (needs NumPy), '
+                             'sending one batched message per step or one message per sensor')
+    parser.add_argument('--compact', action='store_true',
+                        help='Generate state classes with __slots__ and send compact sensor readings between models, '
+                             'building oneM2M messages only at the interfaces and the sink')
+    parser.add_argument('--batch', help='Generate every model in a directory or matching a glob pattern; '
+                                        'each model is written to its own subdirectory of the output directory')
+    parser.add_argument('--jobs', type=int, default=None, help='Number of worker processes for --batch, or of threads writing the files '
+                                                                        'of a single model (default: CPU count)')
+    parser.add_argument('--xml-backend', dest='xml_backend', choices=['auto', 'lxml', 'etree'],
+                        help='XML parser to use (default: lxml when installed, else ElementTree)')
     
     args = parser.parse_args()
     
@@ -17,6 +123,23 @@ def main():
     if args.verbose:
         os.environ['DEBUG'] = '1'
     
+    # Select the XML backend here and in any worker processes
+    if args.xml_backend:
+        os.environ['CAPS_XML_BACKEND'] = args.xml_backend
+    
+    if args.precompile and not args.bundle:
+        parser.error("--precompile requires --bundle")
+    if args.sensor_banks and not args.shared_classes:
+        parser.error("--sensor-banks cannot be combined with --class-per-component")
+    
+    if args.batch:
+        if args.saml_file:
+            parser.error("a SAML file cannot be combined with --batch")
+        return run_batch(args)
+    
+    if not args.saml_file:
+        parser.error("a SAML file or --batch is required")
+    
     # Validate input file
     if not os.path.exists(args.saml_file):
         print(f"Error: SAML file not found: {args.saml_file}")
@@ -32,13 +155,26 @@ def main():
     
     try:
         print(f"Generating PyDEVS files from SAML: {args.saml_file}")
+        counts = writer.counts()
         generated_files = generate_pydevs_from_saml(
             args.saml_file,
             args.hwml_file,
-            args.output_dir
+            args.output_dir,
+            use_cache=not args.no_cache,
+            incremental=not args.full,
+            jobs=max(1, args.jobs or os.cpu_count() or 1),
+            shared_classes=args.shared_classes,
+            bundle=args.bundle,
+            precompile=args.precompile,
+            cluster_strategy=args.clusters,
+            cluster_size=args.cluster_size,
+            sensor_banks=args.sensor_banks,
+            compact=args.compact
         )
         
-        print(f"Successfully generated {len(generated_files)} files:")
+        written = writer.counts()[0] - counts[0]
+        print(f"Successfully generated {len(generated_files)} files "
+              f"({written} written, {len(generated_files) - written} unchanged):")
         for filename in generated_files:
             print(f"  - {filename}")
         
@@ -8,11 +8,14 @@ from .file_generators import (
     generate_sink_file,
     generate_model_file,
     generate_experiment_file,
+    generate_recorder_file,
+    generate_random_stream_file,
+    generate_columnar_file,
     generate_readme_file,
     generate_pydevs_from_saml
 )
 
-from .saml_parser import parse_saml_file
+from .saml_parser import parse_saml_file, parse_saml_file_streaming, ReferenceIndex
 
 __all__ = [
     'generate_sensor_file',
@@ -22,7 +25,12 @@ __all__ = [
     'generate_sink_file',
     'generate_model_file',
     'generate_experiment_file',
+    'generate_recorder_file',
+    'generate_random_stream_file',
+    'generate_columnar_file',
     'generate_readme_file',
     'generate_pydevs_from_saml',
-    'parse_saml_file'
+    'parse_saml_file',
+    'parse_saml_file_streaming',
+    'ReferenceIndex'
 ]
@@ -0,0 +1,274 @@
+import re
+from array import array
+from .debug_utils import debug_print
+
+# Behavioural elements that only describe control flow between states
+LINK_TYPE = 'Link'
+
+# Guard condition tokens: numbers, quoted strings, operators and identifiers
+GUARD_TOKEN = re.compile(r"""\s*(?:
+    (?P<number>\d+(?:\.\d+)?)
+  | (?P<string>"[^"]*"|'[^']*')
+  | (?P<op>&&|\|\||==|!=|<=|>=|<|>|!|\(|\)|=)
+  | (?P<name>[A-Za-z_][A-Za-z0-9_.]*)
+)""", re.VERBOSE)
+
+ASSIGNMENT = re.compile(r'^\s*([A-Za-z_][A-Za-z0-9_.]*)\s*=(?!=)\s*(.+?)\s*$')
+
+COMPARISONS = ('==', '!=', '<', '<=', '>', '>=')
+
+class GuardSyntaxError(ValueError):
+    """Raised when a Link condition cannot be parsed."""
+
+def tokenize_guard(text):
+    """Split a guard condition into (kind, value) tokens."""
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = GUARD_TOKEN.match(text, pos)
+        if not match or match.end() == pos:
+            raise GuardSyntaxError(f"Unexpected character at {pos} in guard: {text}")
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+        pos = match.end()
+    return tokens
+
+class GuardParser:
+    """
+    Recursive descent parser for Link conditions.
+    
+    Produces nested tuples: ('const', value), ('var', name), ('not', expr),
+    ('and', lhs, rhs), ('or', lhs, rhs) and ('cmp', op, lhs, rhs).
+    """
+    
+    def __init__(self, text):
+        self.tokens = tokenize_guard(text)
+        self.pos = 0
+        self.text = text
+    
+    def parse(self):
+        expr = self.parse_or()
+        if self.pos != len(self.tokens):
+            raise GuardSyntaxError(f"Unexpected {self.tokens[self.pos][1]!r} in guard: {self.text}")
+        return expr
+    
+    def peek(self):
+        return self.tokens[self.pos][1] if self.pos < len(self.tokens) else None
+    
+    def take(self):
+        token = self.tokens[self.pos]
+        self.pos += 1
+        return token
+    
+    def parse_or(self):
+        expr = self.parse_and()
+        while self.peek() == '||':
+            self.take()
+            expr = ('or', expr, self.parse_and())
+        return expr
+    
+    def parse_and(self):
+        expr = self.parse_not()
+        while self.peek() == '&&':
+            self.take()
+            expr = ('and', expr, self.parse_not())
+        return expr
+    
+    def parse_not(self):
+        if self.peek() == '!':
+            self.take()
+            return ('not', self.parse_not())
+        return self.parse_comparison()
+    
+    def parse_comparison(self):
+        expr = self.parse_atom()
+        if self.peek() in COMPARISONS:
+            op = self.take()[1]
+            expr = ('cmp', op, expr, self.parse_atom())
+        return expr
+    
+    def parse_atom(self):
+        if self.pos >= len(self.tokens):
+            raise GuardSyntaxError(f"Unexpected end of guard: {self.text}")
+        kind, value = self.take()
+        if value == '(':
+            expr = self.parse_or()
+            if self.peek() != ')':
+                raise GuardSyntaxError(f"Missing ')' in guard: {self.text}")
+            self.take()
+            return expr
+        if kind == 'number':
+            return ('const', float(value) if '.' in value else int(value))
+        if kind == 'string':
+            return ('const', value[1:-1])
+        if kind == 'name':
+            if value in ('true', 'false'):
+                return ('const', value == 'true')
+            return ('var', value)
+        raise GuardSyntaxError(f"Unexpected {value!r} in guard: {self.text}")
+
+def split_guard(text):
+    """Split a condition on commas that are not inside quotes."""
+    parts, current, quote = [], [], None
+    for char in text:
+        if quote:
+            quote = None if char == quote else quote
+        elif char in '"\'':
+            quote = char
+        elif char == ',':
+            parts.append(''.join(current))
+            current = []
+            continue
+        current.append(char)
+    parts.append(''.join(current))
+    return [part.strip() for part in parts if part.strip()]
+
+def parse_guard(text):
+    """
+    Parse a Link condition such as 'false, msg="Room Full"'.
+    
+    Comma-separated parts of the form name=value are assignments applied
+    when the link is taken; the remaining parts are conditions that must all
+    hold.
+    
+    Returns:
+        dict: text, condition (expression tuple, or None when the link is
+            unconditional) and assignments (list of (name, expression))
+    """
+    condition = None
+    assignments = []
+    for part in split_guard(text or ''):
+        assignment = ASSIGNMENT.match(part)
+        if assignment:
+            assignments.append((assignment.group(1), GuardParser(assignment.group(2)).parse()))
+            continue
+        expr = GuardParser(part).parse()
+        condition = expr if condition is None else ('and', condition, expr)
+    return {'text': text, 'condition': condition, 'assignments': assignments}
+
+def compile_behaviour(component, references=None):
+    """
+    Compile a component's modes into a state-transition table.
+    
+    Every entry, exit and non-Link behavioural element becomes a state with
+    an integer id, numbered mode by mode in document order. Links become
+    transitions, and exits with a targetMode become transitions to the
+    entry they point at. Transitions are stored in compressed sparse row
+    form: the transitions leaving state s are targets[offsets[s]:offsets[s + 1]],
+    with guards[t] the index of the parsed guard of transition t in
+    guard_table, or -1 for an unconditional transition.
+    
+    Args:
+        component: parsed component dict (see saml_parser.parse_component)
+        references: ReferenceIndex used to resolve message ports (optional)
+    
+    Returns:
+        dict: the compiled table (names, kinds, state_kind, state_mode,
+            state_ports, mode_entry, initial, offsets, targets, guards and
+            guard_table)
+    """
+    names, state_kind, state_mode, paths = [], array('i'), array('i'), {}
+    kinds, kind_ids = [], {}
+    state_ports = {}
+    mode_entry = array('i')
+    edges = []  # (source path, target path, condition text)
+    
+    def add_state(path, kind, name, mode_idx):
+        if kind not in kind_ids:
+            kind_ids[kind] = len(kinds)
+            kinds.append(kind)
+        paths[path] = len(names)
+        names.append(name)
+        state_kind.append(kind_ids[kind])
+        state_mode.append(mode_idx)
+        return paths[path]
+    
+    for mode_idx, mode in enumerate(component.get('modes', [])):
+        mode_name = mode.get('name', '')
+        first_state = len(names)
+        for entry_idx, entry in enumerate(mode.get('entries', [])):
+            add_state(entry['path'], 'Entry', f"{mode_name}/entry{entry_idx}", mode_idx)
+        
+        for behaviour in mode.get('behaviors', []):
+            attributes = behaviour.get('attributes', {})
+            if behaviour['type'] == LINK_TYPE:
+                edges.append((attributes.get('source'), attributes.get('target'), attributes.get('condition')))
+                continue
+            
+            state = add_state(behaviour['path'], behaviour['type'], behaviour['name'] or behaviour['type'], mode_idx)
+            port_refs = attributes.get('toMessagePorts') or attributes.get('fromMessagePorts')
+            if port_refs and references is not None:
+                ports = tuple(port['port_idx'] for port in references.resolve_all(port_refs) if 'port_idx' in port)
+                if ports:
+                    state_ports[state] = ports
+        
+        for exit_idx, exit_point in enumerate(mode.get('exits', [])):
+            add_state(exit_point['path'], 'Exit', f"{mode_name}/exit{exit_idx}", mode_idx)
+            target_mode = exit_point.get('attributes', {}).get('targetMode')
+            if target_mode:
+                edges.append((exit_point['path'], target_mode, None))
+        
+        mode_entry.append(first_state if len(names) > first_state else -1)
+    
+    # Group transitions by source state
+    outgoing = [[] for _ in names]
+    guard_table, guard_ids = [], {}
+    for source, target, condition in edges:
+        if source not in paths or target not in paths:
+            debug_print(f"Skipping link with unknown endpoints in {component['name']}: {source} -> {target}")
+            continue
+        
+        guard_id = -1
+        if condition:
+            if condition not in guard_ids:
+                try:
+                    guard = parse_guard(condition)
+                except GuardSyntaxError as e:
+                    debug_print(f"Could not parse guard in {component['name']}: {str(e)}")
+                    guard = {'text': condition, 'condition': ('unparsed', condition), 'assignments': []}
+                guard_ids[condition] = len(guard_table)
+                guard_table.append(guard)
+            guard_id = guard_ids[condition]
+        outgoing[paths[source]].append((paths[target], guard_id))
+    
+    offsets, targets, guards = array('i', [0]), array('i'), array('i')
+    for transitions in outgoing:
+        for target, guard_id in transitions:
+            targets.append(target)
+            guards.append(guard_id)
+        offsets.append(len(targets))
+    
+    return {
+        'names': names,
+        'kinds': kinds,
+        'state_kind': state_kind,
+        'state_mode': state_mode,
+        'state_ports': state_ports,
+        'mode_entry': mode_entry,
+        'initial': mode_entry[0] if mode_entry else -1,
+        'offsets': offsets,
+        'targets': targets,
+        'guards': guards,
+        'guard_table': guard_table
+    }
+
+def behaviour_signature(graph):
+    """
+    Return a hashable summary of a compiled behaviour that ignores state names.
+    
+    Two components with the same signature have the same kinds of states
+    wired by the same transitions and guards, so they can share generated code.
+    """
+    if not graph:
+        return ()
+    return (
+        tuple(graph['kinds']),
+        tuple(graph['state_kind']),
+        tuple(graph['state_mode']),
+        tuple(sorted(graph['state_ports'].items())),
+        tuple(graph['offsets']),
+        tuple(graph['targets']),
+        tuple(graph['guards']),
+        tuple(guard['text'] for guard in graph['guard_table'])
+    )
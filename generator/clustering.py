@@ -0,0 +1,110 @@
+from collections import deque
+from .debug_utils import debug_print
+
+# Largest cluster the strategies build unless told otherwise
+DEFAULT_CLUSTER_SIZE = 64
+
+STRATEGIES = ('connected', 'partition', 'network')
+
+def adjacency(nodes, edges):
+    """Return the undirected neighbours of every node, ignoring edges to unknown nodes."""
+    neighbours = {node: [] for node in nodes}
+    for source, target in edges:
+        if source in neighbours and target in neighbours and source != target:
+            neighbours[source].append(target)
+            neighbours[target].append(source)
+    return neighbours
+
+def connected_groups(nodes, neighbours):
+    """Split nodes into connected components, each in the order of nodes."""
+    group_of = {}
+    groups = []
+    for node in nodes:
+        if node in group_of:
+            continue
+        group_of[node] = len(groups)
+        members = [node]
+        queue = deque([node])
+        while queue:
+            for neighbour in neighbours[queue.popleft()]:
+                if neighbour not in group_of:
+                    group_of[neighbour] = len(groups)
+                    members.append(neighbour)
+                    queue.append(neighbour)
+        groups.append(members)
+    
+    # Keep every group in the order its nodes were given in
+    position = {node: i for i, node in enumerate(nodes)}
+    return [sorted(group, key=position.get) for group in groups]
+
+def partition_groups(nodes, neighbours, max_size):
+    """
+    Grow clusters of at most max_size nodes by breadth-first search.
+    
+    Each cluster starts at the first node not yet assigned and takes in its
+    unassigned neighbours, then theirs, until it is full, so nodes that
+    exchange messages tend to end up in the same cluster.
+    """
+    allowed = set(nodes)
+    assigned = set()
+    groups = []
+    for node in nodes:
+        if node in assigned:
+            continue
+        assigned.add(node)
+        members = [node]
+        queue = deque([node])
+        while queue and len(members) < max_size:
+            for neighbour in neighbours[queue.popleft()]:
+                if neighbour in allowed and neighbour not in assigned:
+                    assigned.add(neighbour)
+                    members.append(neighbour)
+                    queue.append(neighbour)
+                    if len(members) >= max_size:
+                        break
+        groups.append(members)
+    return groups
+
+def cluster_nodes(nodes, edges, strategy='connected', max_size=DEFAULT_CLUSTER_SIZE, key=None):
+    """
+    Group nodes into clusters for a hierarchical coupled model.
+    
+    Args:
+        nodes: node names, in the order clusters should follow
+        edges: (source, target) pairs of node names
+        strategy: 'connected' (connected components of the graph),
+            'partition' (breadth-first partition) or 'network' (nodes with
+            the same key, e.g. HWML protocol)
+        max_size: largest cluster; bigger groups are split by breadth-first
+            partition (None for no limit)
+        key: function returning the network of a node, for 'network'
+    
+    Returns:
+        list: clusters as lists of node names; every node is in exactly one
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown clustering strategy: {strategy}")
+    
+    nodes = list(nodes)
+    neighbours = adjacency(nodes, edges)
+    limit = max_size or len(nodes) or 1
+    
+    if strategy == 'connected':
+        groups = connected_groups(nodes, neighbours)
+    elif strategy == 'partition':
+        groups = [nodes]
+    else:
+        by_key = {}
+        for node in nodes:
+            by_key.setdefault(key(node) if key else None, []).append(node)
+        groups = list(by_key.values())
+    
+    clusters = []
+    for group in groups:
+        if len(group) > limit or strategy == 'partition':
+            clusters.extend(partition_groups(group, neighbours, limit))
+        else:
+            clusters.append(group)
+    
+    debug_print(f"Grouped {len(nodes)} components into {len(clusters)} clusters ({strategy})")
+    return clusters
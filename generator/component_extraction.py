@@ -1,183 +1,196 @@
-import os
-import xml.etree.ElementTree as ET
-import traceback
-from .debug_utils import debug_print, log_exception
+from .debug_utils import debug_print
+
+# Component names that clash with generated or PyDEVS identifiers
+RESERVED_NAMES = ["Server", "Model", "Simulator"]
 
 def extract_components(saml_file_path=None, hwml_file_path=None):
-    """Extract component information from both SAML and HWML files."""
-    debug_print(f"Starting component extraction - SAML: {saml_file_path}, HWML: {hwml_file_path}")
-    namespaces = {
-        'xsi': 'http://www.w3.org/2001/XMLSchema-instance',
-        'components': 'components',
-        'filesystem': 'filesystem'
-    }
-    
-    components = []
-    # Process SAML file if provided
-    if saml_file_path and os.path.exists(saml_file_path):
-        try:
-            debug_print(f"Parsing SAML file: {saml_file_path}")
-            tree = ET.parse(saml_file_path)
-            root = tree.getroot()
+    """
+    Extract component information from both SAML and HWML files.
+    
+    Components come from the shared parsed model (see model_ir.build_model):
+    SAML components are typed from their behaviour and sensors without a
+    StartTimer get the default data_interval of 5.0 seconds.
+    """
+    from .model_ir import build_model
+    
+    return build_model(saml_file_path, hwml_file_path).components
+
+def component_type_from_name(name):
+    """Guess the component type of an HWML node from its name."""
+    return 'sensor' if 'Sensor' in name else \
+           'actuator' if 'Actuator' in name else \
+           'interface' if 'Interface' in name else \
+           'controller'
+
+def normalize_name(name):
+    """Return the name used for HWML/SAML matching (spaces removed)."""
+    return (name or '').replace(' ', '')
+
+class ComponentNameIndex:
+    """
+    Index of component names for matching HWML nodes to components.
+    
+    A node matches a component when either normalized name contains the
+    other. Components whose name is contained in the node name are found by
+    looking up every substring of the node name in a dictionary of names;
+    components whose name contains the node name are found by intersecting
+    trigram posting lists and checking the few remaining candidates. The
+    work per node depends on the length of its name, not on the number of
+    components.
+    
+    When several components match, the best one is picked deterministically:
+    an exact match first, then the closest name length, then the earliest
+    component.
+    """
+    
+    GRAM = 3
+    
+    def __init__(self, components=None):
+        self.components = []
+        self.names = []
+        self.by_name = {}   # normalized name -> [component index]
+        self.lengths = set()  # lengths of the indexed names
+        self.grams = {}     # trigram -> set of component indices
+        for comp in components or []:
+            self.add(comp)
+    
+    def add(self, component):
+        """Add a component to the index."""
+        idx = len(self.components)
+        name = normalize_name(component['name'])
+        self.components.append(component)
+        self.names.append(name)
+        self.by_name.setdefault(name, []).append(idx)
+        self.lengths.add(len(name))
+        for i in range(len(name) - self.GRAM + 1):
+            self.grams.setdefault(name[i:i + self.GRAM], set()).add(idx)
+    
+    def candidates(self, node_name):
+        """Return the indices of every component matching node_name."""
+        name = normalize_name(node_name)
+        matches = set()
+        
+        # Component names contained in the node name
+        length = len(name)
+        for size in self.lengths:
+            for start in range(length - size + 1):
+                matches.update(self.by_name.get(name[start:start + size], ()))
+        
+        # Component names containing the node name
+        if length < self.GRAM:
+            # Too short for the trigram index; rare enough to scan
+            matches.update(idx for idx, comp_name in enumerate(self.names) if name in comp_name)
+        else:
+            postings = []
+            for i in range(length - self.GRAM + 1):
+                posting = self.grams.get(name[i:i + self.GRAM])
+                if not posting:
+                    postings = []
+                    break
+                postings.append(posting)
+            if postings:
+                postings.sort(key=len)
+                found = set(postings[0])
+                for posting in postings[1:]:
+                    found &= posting
+                    if not found:
+                        break
+                matches.update(idx for idx in found if name in self.names[idx])
+        
+        return sorted(matches)
+    
+    def match(self, node_name):
+        """
+        Find the component matching node_name.
+        
+        Returns:
+            tuple: (component or None, list of all matching components)
+        """
+        matches = self.candidates(node_name)
+        if not matches:
+            return None, []
+        
+        name = normalize_name(node_name)
+        best = min(matches, key=lambda idx: (self.names[idx] != name, abs(len(self.names[idx]) - len(name)), idx))
+        return self.components[best], [self.components[idx] for idx in matches]
+
+def merge_hwml_nodes(components, nodes):
+    """
+    Attach HWML hardware details to matching SAML components.
+    
+    Nodes without a matching component are appended as new components.
+    Nodes matching more than one component are reported as ambiguous.
+    
+    Args:
+        components: list of component dicts, updated in place
+        nodes: list of HWML node dicts
+    
+    Returns:
+        list: the updated components
+    """
+    index = ComponentNameIndex(components)
+    ambiguous = []
+    
+    for node in nodes:
+        node_name = node['name']
+        
+        # Check if this component already exists in SAML components
+        existing_component, matches = index.match(node_name)
+        if len(matches) > 1:
+            ambiguous.append((node_name, [comp['name'] for comp in matches]))
+            debug_print(f"  Ambiguous match for {node_name}: {', '.join(comp['name'] for comp in matches)}")
+        
+        if existing_component:
+            # Update existing component with hardware info
+            debug_print(f"  Matched with existing component: {existing_component['name']}")
+            debug_print(f"  Updating existing component {existing_component['name']} with hardware details")
+            existing_component.update({
+                'protocol': node['protocol'],
+                'routing': node['routing'],
+                'hw_details': node['hw_details'],
+                'source': 'both'
+            })
+        else:
+            # Create new component
+            debug_print(f"  Creating new component for {node_name}")
+            component_type = component_type_from_name(node_name)
             
-            if root.find('./SAElements', namespaces) is not None:
-                debug_print("Found SAElements in SAML file")
-                
-                # Count elements for debugging
-                element_count = len(root.findall('./SAElements', namespaces))
-                debug_print(f"Found {element_count} SAElements")
-                
-                for i, element in enumerate(root.findall('./SAElements', namespaces)):
-                    element_type = element.get(f'{{{namespaces["xsi"]}}}type')
-                    debug_print(f"Element {i} type: {element_type}")
-                    
-                    if element_type and 'Component' in element_type:
-                        component_name = element.get('name')
-                        debug_print(f"Found component: {component_name}")
-                        
-                        # Extract ports
-                        in_ports = []
-                        out_ports = []
-                        for j, port in enumerate(element.findall('./ports', namespaces)):
-                            port_type = port.get(f'{{{namespaces["xsi"]}}}type', '')
-                            debug_print(f"  Port {j} type: {port_type}")
-                            if "InMessagePort" in port_type:
-                                in_ports.append(j)
-                            elif "OutMessagePort" in port_type:
-                                out_ports.append(j)
-                        
-                        debug_print(f"  In ports: {in_ports}, Out ports: {out_ports}")
-                        
-                        # Extract behavior if available
-                        behaviors = []
-                        data_interval = None  # Default to None
-                        for mode in element.findall('./modes', namespaces):
-                            debug_print(f"  Found mode for {component_name}")
-                            for behavior in mode.findall('./behaviouralElements', namespaces):
-                                behavior_type = behavior.get(f'{{{namespaces["xsi"]}}}type', '')
-                                behavior_name = behavior.get('name', '')
-                                debug_print(f"    Behavior: {behavior_name} (Type: {behavior_type})")
-                                
-                                # Check for StartTimer behavior and extract period
-                                if behavior_type == "components:StartTimer":
-                                    period = behavior.get('period')
-                                    if period:
-                                        try:
-                                            data_interval = int(period) / 1000.0  # Convert milliseconds to seconds
-                                            debug_print(f"    Found StartTimer with period: {data_interval} seconds")
-                                        except ValueError:
-                                            debug_print(f"    Invalid period value: {period}")
-                                
-                                if behavior_type:
-                                    behaviors.append({
-                                        'type': behavior_type.split(':')[-1],
-                                        'name': behavior_name
-                                    })
-                        
-                        component_type = 'sensor' if 'Sensor' in component_name else \
-                                        'actuator' if 'Actuator' in component_name else \
-                                        'interface' if 'Interface' in component_name else \
-                                        'controller'
-                        
-                        debug_print(f"  Identified as: {component_type}")
-                        
-                        components.append({
-                            'name': component_name,
-                            'type': component_type,
-                            'in_ports': in_ports,
-                            'out_ports': out_ports,
-                            'behaviors': behaviors,
-                            'data_interval': data_interval,  # Add data_interval to the component
-                            'source': 'saml'
-                        })
-        except Exception as e:
-            print(f"Error extracting components from SAML file: {str(e)}")
-            log_exception(f"SAML parsing error details: {traceback.format_exc()}")
-    
-    # Process HWML file if provided
-    if hwml_file_path and os.path.exists(hwml_file_path):
-        try:
-            debug_print(f"Parsing HWML file: {hwml_file_path}")
-            tree = ET.parse(hwml_file_path)
-            root = tree.getroot()
+            debug_print(f"  Identified as: {component_type}")
             
-            if root.find('./nodes', namespaces) is not None:
-                debug_print("Found nodes in HWML file")
-                
-                # Count nodes for debugging
-                node_count = len(root.findall('./nodes', namespaces))
-                debug_print(f"Found {node_count} nodes")
-                
-                for node in root.findall('./nodes', namespaces):
-                    node_name = node.get('name')
-                    protocol = node.get('macProtocol', 'Unknown')
-                    routing = node.get('routingProtocol', 'Unknown')
-                    debug_print(f"Found node: {node_name}, Protocol: {protocol}, Routing: {routing}")
-                    
-                    # Get hardware details
-                    hw_details = {}
-                    for processor in node.findall('./microcontroller/processors', namespaces):
-                        hw_details['processor'] = processor.get('name', 'Unknown')
-                        hw_details['frequency'] = processor.get('frequency', 'Unknown')
-                        debug_print(f"  Processor: {hw_details['processor']}, Frequency: {hw_details['frequency']}")
-                    
-                    for memory in node.findall('./microcontroller/memory', namespaces):
-                        hw_details['memory'] = memory.get('name', 'Unknown')
-                        hw_details['memory_size'] = memory.get('size', 'Unknown')
-                        debug_print(f"  Memory: {hw_details['memory']}, Size: {hw_details['memory_size']}")
-                    
-                    # Check if this component already exists in SAML components
-                    existing_component = None
-                    for comp in components:
-                        comp_name = comp['name'].replace(' ', '')
-                        node_name_clean = node_name.replace(' ', '')
-                        
-                        # Check if either name contains the other
-                        if node_name_clean in comp_name or comp_name in node_name_clean:
-                            existing_component = comp
-                            debug_print(f"  Matched with existing component: {comp['name']}")
-                            break
-                    
-                    if existing_component:
-                        # Update existing component with hardware info
-                        debug_print(f"  Updating existing component {existing_component['name']} with hardware details")
-                        existing_component.update({
-                            'protocol': protocol,
-                            'routing': routing,
-                            'hw_details': hw_details,
-                            'source': 'both'
-                        })
-                    else:
-                        # Create new component
-                        debug_print(f"  Creating new component for {node_name}")
-                        component_type = 'sensor' if 'Sensor' in node_name else \
-                                       'actuator' if 'Actuator' in node_name else \
-                                       'interface' if 'Interface' in node_name else \
-                                       'controller'
-                        
-                        debug_print(f"  Identified as: {component_type}")
-                        
-                        components.append({
-                            'name': node_name,
-                            'type': component_type,
-                            'protocol': protocol,
-                            'routing': routing,
-                            'hw_details': hw_details,
-                            'in_ports': [0],  # Default ports
-                            'out_ports': [0],
-                            'source': 'hwml'
-                        })
-        except Exception as e:
-            print(f"Error extracting components from HWML file: {str(e)}")
-            log_exception(f"HWML parsing error details: {traceback.format_exc()}")
-    
-    # Check for reserved names and rename components that might cause conflicts
-    reserved_names = ["Server", "Model", "Simulator"]
+            component = {
+                'name': node_name,
+                'type': component_type,
+                'protocol': node['protocol'],
+                'routing': node['routing'],
+                'hw_details': node['hw_details'],
+                'in_ports': [0],  # Default ports
+                'out_ports': [0],
+                'behaviors': [],
+                'modes': [],
+                'source': 'hwml'
+            }
+            components.append(component)
+            index.add(component)
+    
+    if ambiguous:
+        print(f"Warning: {len(ambiguous)} HWML node(s) matched more than one component; "
+              f"picked the closest name for each (first: {ambiguous[0][0]} -> {', '.join(ambiguous[0][1])})")
+    
+    return components
+
+def rename_reserved_components(components, connections):
+    """Rename components that might cause naming conflicts, along with their connections."""
+    renamed = {}
     for comp in components:
-        if comp['name'] in reserved_names:
+        if comp['name'] in RESERVED_NAMES:
             original_name = comp['name']
             comp['name'] = f"Data{comp['name']}"
+            renamed[original_name] = comp['name']
             debug_print(f"Renamed component '{original_name}' to '{comp['name']}' to avoid naming conflicts")
     
-    debug_print(f"Component extraction complete. Found {len(components)} components.")
-    return components
\ No newline at end of file
+    if renamed:
+        for conn in connections:
+            conn['source_component'] = renamed.get(conn['source_component'], conn['source_component'])
+            conn['target_component'] = renamed.get(conn['target_component'], conn['target_component'])
+    
+    return components, connections
@@ -3,6 +3,11 @@ import traceback
 # Enable debug mode - set to True for detailed debug output
 DEBUG = True
 
+def set_debug(enabled):
+    """Turn debug output on or off (also used to initialize worker processes)"""
+    global DEBUG
+    DEBUG = enabled
+
 def debug_print(message):
     """Print debug messages when DEBUG is enabled"""
     if DEBUG:
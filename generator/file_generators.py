@@ -1,375 +1,651 @@
+import io
 import os
 import random
 import time
+import py_compile
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from pypdevs.DEVS import AtomicDEVS
 from pypdevs.infinity import INFINITY
 from .debug_utils import debug_print
-
-def generate_actuator_file(component, output_dir):
-    """Generate PyDEVS code for an actuator component."""
-    debug_print(f"Generating actuator file for: {component['name']}")
-    filename = f"{component['name'].replace(' ', '_').lower()}.py"
-    filepath = os.path.join(output_dir, filename)
+from .behaviour_graph import behaviour_signature
+from .clustering import DEFAULT_CLUSTER_SIZE, cluster_nodes
+from .manifest import GenerationManifest, fingerprint
+from .output_writer import writer, write_file
+from .template_engine import render, runtime_module
+
+# Prefix for the trace prints in generated code; '#' keeps them commented out
+TRACE = '#'
+
+NO_INPUT_PORTS = "\n        # No input ports defined"
+
+# How SensorBank models send their readings (see bank_sensors)
+SENSOR_BANK_MODES = ('batched', 'expanded')
+
+# Attributes of the generated *State class of each component type
+STATE_SLOTS = {
+    'sensor': ('next_reading_time', 'sensor_id', 'data_to_send'),
+    'actuator': ('actuator_state', 'processing_time'),
+    'controller': ('last_data', 'processing_time', 'threshold_high', 'threshold_low', 'decision'),
+    'interface': ('processing_time', 'data_to_send'),
+}
+
+# Delay passed to each non-sensor submodel in the generated SystemModel
+SIMULATED_DELAYS = {
+    'actuator': 0.1,
+    'controller': 0.5,
+}
+
+def component_filename(component):
+    """Return the name of the module generated for a component."""
+    return f"{component['name'].replace(' ', '_').lower()}.py"
+
+def class_name_for(component):
+    """Return the class name generated for a component."""
+    return component['name'].replace(' ', '')
+
+def render_ports(component):
+    """Return the port declarations of a component's __init__."""
+    lines = [f"\n        self.inport{i} = self.addInPort(\"in{i}\")" for i in component['in_ports']]
+    lines += [f"\n        self.outport{i} = self.addOutPort(\"out{i}\")" for i in component['out_ports']]
+    return ''.join(lines)
+
+def render_return(component, value):
+    """Return the outputFnc return statement sending value on the first output port."""
+    if component['out_ports']:
+        return f"\n        return {{self.outport{component['out_ports'][0]}: {value}}}"
+    return "\n        return {}"
+
+def name_fields(component, class_name=None):
+    """
+    Return how the generated class gets its model name.
+
+    A component's own class has its name built in; a shared class (one
+    given a class_name) takes the name as its first argument instead.
+    """
+    if class_name is None:
+        return {'class_name': class_name_for(component), 'name_param': '', 'name_value': f"\"{component['name']}\""}
+    return {'class_name': class_name, 'name_param': 'name, ', 'name_value': 'name'}
+
+def state_fields(component, compact=False):
+    """
+    Return how the generated *State class stores its attributes.
+    
+    Compact models declare __slots__, so a state holds no __dict__.
+    """
+    if not compact:
+        return {'state_slots': ''}
+    return {'state_slots': f"\n    __slots__ = {STATE_SLOTS[component['type']]!r}\n"}
+
+def render_hardware(component):
+    """Return the hardware comment of a sensor module, or '' without hardware details."""
+    if 'hw_details' not in component:
+        return ""
+    hw = component['hw_details']
+    return render('sensor_hardware',
+                  processor=hw.get('processor', 'Unknown'),
+                  frequency=hw.get('frequency', 'Unknown'),
+                  memory=hw.get('memory', 'Unknown'),
+                  memory_size=hw.get('memory_size', 'Unknown'),
+                  protocol=component.get('protocol', 'Unknown'),
+                  routing=component.get('routing', 'Unknown'))
+
+def sensor_value_range(component):
+    """Return the (low, high) range a sensor's readings are drawn from."""
+    if "Temperature" in component['name']:
+        return 15.0, 30.0
+    return 0, 100
+
+def sensor_value_generator(component):
+    """Return the expression creating the random stream a sensor's readings are taken from."""
+    return "RandomStream('uniform', {}, {})".format(*sensor_value_range(component))
+
+def render_actuator(component, trace=TRACE, class_name=None, compact=False):
+    """Render the module of an actuator component (or of a class shared by several)."""
+    if component['in_ports']:
+        ext_transition = render('actuator_input', inport=component['in_ports'][0], trace=trace)
+    else:
+        ext_transition = NO_INPUT_PORTS
+    
+    return render('actuator.py',
+                  ports=render_ports(component),
+                  ext_transition=ext_transition,
+                  **name_fields(component, class_name),
+                  **state_fields(component, compact))
+
+def render_controller(component, trace=TRACE, class_name=None, compact=False):
+    """Render the module of a controller component (or of a class shared by several)."""
+    if component['in_ports']:
+        ext_transition = render('controller_input', inport=component['in_ports'][0], trace=trace)
+    else:
+        ext_transition = NO_INPUT_PORTS
+    
+    if len(component['out_ports']) >= 2:
+        output = render('controller_output_split',
+                        open_port=component['out_ports'][0],
+                        close_port=component['out_ports'][1])
+    else:
+        output = render_return(component, 'output')
+    
+    return render('controller.py',
+                  ports=render_ports(component),
+                  ext_transition=ext_transition,
+                  output=output,
+                  **name_fields(component, class_name),
+                  **state_fields(component, compact))
+
+def render_sensor(component, trace=TRACE, class_name=None, compact=False):
+    """
+    Render the module of a sensor component (or of a class shared by several).
+    
+    A compact sensor sends its SensorReading instead of a oneM2M message;
+    interfaces and the sink build the message from it when they need one.
+    """
+    hw_comment = render_hardware(component)
+    if hw_comment:
+        debug_print(f"Including hardware details for {component['name']}")
     
-    with open(filepath, 'w') as f:
-        f.write(f"""from pypdevs.DEVS import AtomicDEVS
-from pypdevs.infinity import INFINITY
-
-class {component['name'].replace(' ', '')}State:
-    def __init__(self):
-        self.actuator_state = False
-        self.processing_time = 0.0
-
-class {component['name'].replace(' ', '')}(AtomicDEVS):
-    def __init__(self, simulated_delay=0.1):
-        AtomicDEVS.__init__(self, "{component['name']}")
-        self.simulated_delay = simulated_delay
-        self.state = {component['name'].replace(' ', '')}State()
-        self.timeLast = 0.0""")
-        
-        for i in component['in_ports']:
-            f.write(f"\n        self.inport{i} = self.addInPort(\"in{i}\")")
-        
-        for i in component['out_ports']:
-            f.write(f"\n        self.outport{i} = self.addOutPort(\"out{i}\")")
-        
-        f.write("""
-
-    def timeAdvance(self):
-        return INFINITY  # Actuators are passive and wait for inputs
-
-    def extTransition(self, inputs):""")
-        
-        if component['in_ports']:
-            first_inport = component['in_ports'][0]
-            f.write(f"""
-        received_command = inputs[self.inport{first_inport}]
-        #print(f"[{{self.name}}] Received command: {{received_command}}")
-        
-        if isinstance(received_command, dict) and 'processed' in received_command:
-            self.state.actuator_state = not self.state.actuator_state
-            #print(f"[{{self.name}}] Actuator state changed to: {{self.state.actuator_state}}")
-        else:
-            try:
-                self.state.actuator_state = bool(received_command)
-                #print(f"[{{self.name}}] Actuator state set to: {{self.state.actuator_state}}")
-            except:
-                print("Received invalid command format")
-        
-        self.state.processing_time = self.timeLast + self.simulated_delay""")
+    # Use the data_interval from the component, default to 1.0 if not provided
+    data_interval = component.get('data_interval', 1.0)
+    debug_print(f"Using data_interval: {data_interval} seconds for {component['name']}")
+    
+    # A shared class reports the name of each instance as its sensor id
+    if class_name is None:
+        sensor_id = f"\"{component['name']}\""
+        state_setup = ""
+    else:
+        sensor_id = "None"
+        state_setup = "\n        self.state.sensor_id = name"
+
+    return render('sensor.py',
+                  class_name=class_name or class_name_for(component),
+                  sensor_id=sensor_id,
+                  state_setup=state_setup,
+                  hw_comment=hw_comment,
+                  data_interval=data_interval,
+                  ports=render_ports(component),
+                  value_generator=sensor_value_generator(component),
+                  trace=trace,
+                  message="reading" if compact else render('sensor_message'),
+                  output=render_return(component, 'data'),
+                  **state_fields(component, compact))
+
+def render_interface(component, trace=TRACE, class_name=None, compact=False):
+    """Render the module of an interface component (or of a class shared by several)."""
+    if component['in_ports']:
+        ext_transition = render('interface_input', inport=component['in_ports'][0])
+    else:
+        ext_transition = NO_INPUT_PORTS
+    
+    return render('interface.py',
+                  ports=render_ports(component),
+                  ext_transition=ext_transition,
+                  output=render_return(component, 'processed_data'),
+                  **name_fields(component, class_name),
+                  **state_fields(component, compact))
+
+def render_sensor_bank(trace=TRACE):
+    """Render the module of the SensorBank class (see bank_sensors)."""
+    return render('sensor_bank.py', trace=trace)
+
+def component_shape(component):
+    """
+    Return the key of everything in a component's generated code except its name.
+    
+    This is its type, port layout and behaviour signature, plus for sensors
+    the way readings are generated and the hardware they run on. Components
+    with the same shape can be created from one class.
+    """
+    shape = (component['type'], tuple(component['in_ports']), tuple(component['out_ports']),
+             behaviour_signature(component.get('behaviour')))
+    if component['type'] == 'sensor':
+        shape += (sensor_value_generator(component), render_hardware(component))
+    return shape
+
+def group_components(components, shared_classes=True):
+    """
+    Decide which module and class every generated component is created from.
+    
+    With shared_classes, components of the same shape share one class in a
+    shared_<type>_<n> module; a component whose shape is unique keeps its
+    own module and class, so small models are generated as before.
+    
+    Returns:
+        list: (module name, class name, member components) in order of the
+            first member in components
+    """
+    groups = {}
+    for component in components:
+        if component['type'] not in COMPONENT_RENDERERS:
+            continue
+        key = component_shape(component) if shared_classes else component['name']
+        groups.setdefault(key, []).append(component)
+
+    taken = {component_filename(component)[:-3] for component in components}
+    counters = {}
+    result = []
+    for members in groups.values():
+        if len(members) == 1:
+            component = members[0]
+            result.append((component_filename(component)[:-3], class_name_for(component), members))
+            continue
+
+        component_type = members[0]['type']
+        module_name = None
+        while module_name is None or module_name in taken:
+            counters[component_type] = counters.get(component_type, 0) + 1
+            module_name = f"shared_{component_type}_{counters[component_type]}"
+        taken.add(module_name)
+        result.append((module_name, f"Shared{component_type.title()}{counters[component_type]}", members))
+        debug_print(f"{len(members)} components share class {result[-1][1]}")
+    return result
+
+def bank_sensors(components, connections, groups, expand=False):
+    """
+    Replace every group of identical periodic sensors by one SensorBank.
+    
+    A group of sensors sharing a class (see group_components) that have no
+    input ports becomes a single 'sensor_bank' component, created from the
+    SensorBank class in sensorbank.py, with its members in 'sensors'.
+    Connections from the members are moved to the bank: without expand
+    they leave from the bank's shared ports (outport0 carries one
+    SensorBatch per step), with expand from the ports of each sensor.
+    The generated components take one reading per message, so a bank
+    whose sensors feed other components than the sink is always expanded.
+    
+    Returns:
+        tuple: (components, connections, groups) with the banked sensors
+            replaced by their banks
+    """
+    taken = {component['name'] for component in components}
+    sources = {conn['source_component'] for conn in connections if conn['source_port_type'] == 'output'}
+    banks = {}
+    banked = {}
+    remaining = []
+    for group in groups:
+        members = group[2]
+        first = members[0]
+        if len(members) < 2 or first['type'] != 'sensor' or first['in_ports'] or not first['out_ports']:
+            remaining.append(group)
+            continue
+        
+        index = len(banks)
+        while f"SensorBank{index}" in taken:
+            index += 1
+        ports = len(first['out_ports'])
+        expand_bank = expand or any(member['name'] in sources for member in members)
+        bank = {
+            'name': f"SensorBank{index}",
+            'type': 'sensor_bank',
+            'in_ports': [],
+            'out_ports': list(range(ports * len(members) if expand_bank else ports)),
+            'sensors': members,
+            'expand': expand_bank
+        }
+        banks[first['name']] = bank
+        for position, member in enumerate(members):
+            banked[member['name']] = (bank, position)
+        debug_print(f"{len(members)} sensors share {bank['name']}{' (expanded)' if expand_bank else ''}")
+    
+    if not banks:
+        return components, connections, groups
+    
+    banked_components = []
+    for component in components:
+        if component['name'] in banks:
+            banked_components.append(banks[component['name']])
+        elif component['name'] not in banked:
+            banked_components.append(component)
+    
+    # Members only send from output ports, so only the sources of connections move
+    banked_connections = []
+    seen = set()
+    for conn in connections:
+        if conn['source_component'] in banked and conn['source_port_type'] == 'output':
+            bank, position = banked[conn['source_component']]
+            port = bank['sensors'][position]['out_ports'].index(conn['source_port'])
+            if bank['expand']:
+                port += position * len(bank['sensors'][position]['out_ports'])
+            conn = dict(conn, source_component=bank['name'], source_port=port)
+            key = (bank['name'], port, conn['target_component'], conn['target_port'], conn['target_port_type'])
+            if key in seen:
+                continue
+            seen.add(key)
+        banked_connections.append(conn)
+    
+    return banked_components, banked_connections, remaining
+
+def render_bank_arguments(component, sensor_interval=None):
+    """Return the SensorBank arguments of a 'sensor_bank' component (see bank_sensors)."""
+    sensors = component['sensors']
+    intervals = [sensor_interval if sensor_interval is not None else sensor.get('data_interval', 5.0) for sensor in sensors]
+    return (f"\"{component['name']}\", {[sensor['name'] for sensor in sensors]!r}, {intervals!r}, "
+            f"{sensor_value_range(sensors[0])!r}, ports={len(sensors[0]['out_ports'])}, expand={component['expand']}")
+
+def component_classes(groups):
+    """Map each component name to (module name, class name, shared) from group_components."""
+    classes = {}
+    for module_name, class_name, members in groups:
+        for component in members:
+            classes[component['name']] = (module_name, class_name, len(members) > 1)
+    return classes
+
+def cluster_components(components, connections, strategy, max_size=DEFAULT_CLUSTER_SIZE):
+    """
+    Group the components of a model into clusters for render_model.
+    
+    The 'network' strategy groups components by the protocol of their HWML
+    node; see clustering.cluster_nodes for the others.
+    """
+    protocols = {component['name']: component.get('protocol') for component in components}
+    return cluster_nodes([component['name'] for component in components],
+                         [(conn['source_component'], conn['target_component']) for conn in connections],
+                         strategy, max_size, key=protocols.get)
+
+def expose_port(cluster, var_name, port):
+    """
+    Return the port of a cluster standing for a port of one of its members.
+    
+    The cluster port is added, and coupled to the member's port, the first
+    time a member port is exposed; output ports are exposed as outports and
+    input ports as inports.
+    """
+    direction = 'out' if port.startswith('outport') else 'in'
+    ports = cluster[f"{direction}_ports"]
+    if (var_name, port) not in ports:
+        ports[(var_name, port)] = len(ports)
+        cluster_port = f"{direction}port{ports[(var_name, port)]}"
+        if direction == 'out':
+            cluster['port_couplings'].append((var_name, port, None, cluster_port))
         else:
-            f.write("\n        # No input ports defined")
-        
-        f.write("""
-        return self.state
-
-    def intTransition(self):
-        self.timeLast = self.state.processing_time
-        return self.state
-""")
+            cluster['port_couplings'].append((None, cluster_port, var_name, port))
+    return f"{direction}port{ports[(var_name, port)]}"
+
+def connection_error(conn, components):
+    """
+    Return why a connection cannot be coupled, or None if it can.
+    
+    components maps component names to components. Both ends must be
+    existing ports, and as the components are siblings in the coupled
+    model, the connection must go from an output port to an input port.
+    """
+    for end in ('source', 'target'):
+        name = conn[f"{end}_component"]
+        if name not in components:
+            return f"there is no component {name}"
+        port_type = conn[f"{end}_port_type"]
+        ports = components[name]['out_ports' if port_type == 'output' else 'in_ports']
+        if conn[f"{end}_port"] not in ports:
+            return f"{name} has no {port_type} port {conn[f'{end}_port']}"
+    if conn['source_port_type'] != 'output' or conn['target_port_type'] != 'input':
+        return "only an output port can be coupled to an input port"
+    return None
+
+def render_couplings(couplings, var_names):
+    """
+    Render the coupling table of a coupled model.
+    
+    couplings are (source, source port, target, target port) with the
+    submodels given by variable name, or None for the coupled model
+    itself; in the table they are indices into var_names, the variable
+    names of the submodels in the order they are added.
+    """
+    index = {var_name: i for i, var_name in enumerate(var_names)}
+    return ''.join(render('model_connection',
+                          source=index.get(source),
+                          source_port=source_port,
+                          target=index.get(target),
+                          target_port=target_port)
+                   for source, source_port, target, target_port in couplings)
+
+def render_model(components, connections, sensor_interval=None, classes=None, clusters=None, simulated_delays=None):
+    """
+    Render the coupled model connecting all components.
+    
+    Sensors are created with their own data_interval unless sensor_interval
+    is given. simulated_delays maps component types to the delay their
+    submodels are created with, overriding SIMULATED_DELAYS. classes maps
+    component names to the (module name, class name, shared) they are
+    created from (see component_classes); by default every component has
+    its own module and class.
+    
+    clusters lists groups of component names (see cluster_components) to
+    nest in a coupled model of their own. Only the ports linking a cluster
+    to the rest of the model are exposed on it, so messages inside a
+    cluster are routed without going through the top level. Groups of a
+    single component stay at the top level.
+    
+    Connections are checked here and every coupled model gets a table of
+    its couplings, applied by one loop when it is built. Connections that
+    fail the check are left out of the table and listed, with any coupling
+    that fails at run time, in a single report. Reserved component names
+    are expected to be renamed already, as build_model does (see
+    component_extraction.rename_reserved_components).
+    """
+    debug_print(f"Connections to process: {len(connections)}")
+    for i, conn in enumerate(connections):
+        debug_print(f"Connection {i+1}: {conn['source_component']} -> {conn['target_component']}")
     
+    classes = classes or {}
+    delays = {**SIMULATED_DELAYS, **(simulated_delays or {})}
+    var_names = {component['name']: component['name'].replace(' ', '_').lower() for component in components}
+    
+    # Number the nested clusters, skipping names already taken by components
+    cluster_of = {}
+    cluster_code = []
+    for members in clusters or []:
+        if len(members) < 2:
+            continue
+        index = len(cluster_code)
+        while f"cluster{index}" in var_names.values():
+            index += 1
+        cluster_code.append({'class_name': f"Cluster{index}", 'var_name': f"cluster{index}", 'submodels': [],
+                             'var_names': [], 'couplings': [], 'port_couplings': [], 'in_ports': {}, 'out_ports': {}})
+        for name in members:
+            cluster_of[name] = cluster_code[-1]
+    
+    imports = {}
+    submodels = []
+    submodel_vars = []
+    for component in components:
+        var_name = var_names[component['name']]
+        module_name, class_name, shared = classes.get(component['name'], (var_name, class_name_for(component), False))
+        if component['type'] == 'sensor_bank':
+            module_name, class_name = 'sensorbank', 'SensorBank'
+        imports.setdefault(module_name, f"from {module_name} import {class_name}\n")
+        
+        if component['type'] == 'sensor_bank':
+            arguments = render_bank_arguments(component, sensor_interval)
+        elif component['type'] == 'sensor':
+            data_interval = sensor_interval if sensor_interval is not None else component.get('data_interval', 5.0)
+            arguments = f"\"{component['name']}\", data_interval={data_interval}"
+        else:
+            arguments = f"simulated_delay={delays.get(component['type'], 1.0)}"
+            if shared:
+                arguments = f"\"{component['name']}\", {arguments}"
+        code = render('model_submodel',
+                      name=component['name'],
+                      var_name=var_name,
+                      class_name=class_name,
+                      arguments=arguments)
+        
+        cluster = cluster_of.get(component['name'])
+        if cluster is None:
+            submodels.append(code)
+            submodel_vars.append(var_name)
+            continue
+        # A cluster is created where its first member would have been
+        if not cluster['submodels']:
+            submodels.append(render('model_submodel',
+                                    name=cluster['class_name'],
+                                    var_name=cluster['var_name'],
+                                    class_name=cluster['class_name'],
+                                    arguments=f"\"{cluster['class_name']}\""))
+            submodel_vars.append(cluster['var_name'])
+        cluster['submodels'].append(code)
+        cluster['var_names'].append(var_name)
+    submodel_vars.append('sink')
+    
+    by_name = {component['name']: component for component in components}
+    couplings = []
+    skipped = []
+    connected_outputs = set()
+    for conn in connections:
+        if conn['source_port_type'] == 'output':
+            connected_outputs.add((conn['source_component'], conn['source_port']))
+        error = connection_error(conn, by_name)
+        if error is not None:
+            skipped.append(f"{conn['source_component']} {conn['source_port_type']} {conn['source_port']} to "
+                           f"{conn['target_component']} {conn['target_port_type']} {conn['target_port']}: {error}")
+            continue
+        
+        source_port = f"outport{conn['source_port']}" if conn['source_port_type'] == 'output' else f"inport{conn['source_port']}"
+        target_port = f"inport{conn['target_port']}" if conn['target_port_type'] == 'input' else f"outport{conn['target_port']}"
+        source = conn['source_component'].replace(' ', '_').lower()
+        target = conn['target_component'].replace(' ', '_').lower()
+        source_cluster = cluster_of.get(conn['source_component'])
+        target_cluster = cluster_of.get(conn['target_component'])
+        
+        table = couplings
+        if source_cluster is not None and source_cluster is target_cluster:
+            table = source_cluster['couplings']
+        else:
+            # Couple the clusters through their exposed ports instead
+            if source_cluster is not None:
+                source, source_port = source_cluster['var_name'], expose_port(source_cluster, source, source_port)
+            if target_cluster is not None:
+                target, target_port = target_cluster['var_name'], expose_port(target_cluster, target, target_port)
+        table.append((source, source_port, target, target_port))
+    
+    # Connect unconnected outputs to the sink
+    for component in components:
+        for port_idx in component['out_ports']:
+            if (component['name'], port_idx) not in connected_outputs:
+                var_name, port = var_names[component['name']], f"outport{port_idx}"
+                cluster = cluster_of.get(component['name'])
+                if cluster is not None:
+                    var_name, port = cluster['var_name'], expose_port(cluster, var_name, port)
+                couplings.append((var_name, port, 'sink', 'inport'))
+    
+    if skipped:
+        debug_print(f"Left out {len(skipped)} invalid connections:\n  " + '\n  '.join(skipped))
+    
+    cluster_classes = []
+    for cluster in cluster_code:
+        cluster_classes.append(render('model_cluster',
+                                      class_name=cluster['class_name'],
+                                      couplings=render_couplings(cluster['couplings'] + cluster['port_couplings'],
+                                                                 cluster['var_names']),
+                                      ports=render_ports({'in_ports': range(len(cluster['in_ports'])),
+                                                          'out_ports': range(len(cluster['out_ports']))}),
+                                      submodels=''.join(cluster['submodels'])))
+    
+    return render('model.py',
+                  imports=''.join(imports.values()),
+                  clusters=''.join(cluster_classes),
+                  couplings=render_couplings(couplings, submodel_vars),
+                  skipped=''.join(f"        {skipped_connection!r},\n" for skipped_connection in skipped),
+                  submodels=''.join(submodels))
+
+def bundle_modules(modules, local_modules=()):
+    """
+    Join generated modules into a single module.
+    
+    The imports at the top of each module are hoisted into one block,
+    without duplicates and without imports of the modules in local_modules,
+    whose classes are now defined in the same file.
+    """
+    imports = {}
+    bodies = []
+    for module in modules:
+        lines = module.split('\n')
+        start = 0
+        while start < len(lines) and (not lines[start].strip() or lines[start].startswith(('import ', 'from '))):
+            line = lines[start]
+            if line.strip() and line.split()[1] not in local_modules:
+                imports.setdefault(line, None)
+            start += 1
+        bodies.append('\n'.join(lines[start:]).strip('\n'))
+    return '\n'.join(imports) + '\n\n' + '\n\n\n'.join(bodies) + '\n'
+
+def render_bundle(components, connections, groups, sensor_interval=None, clusters=None, compact=False, simulated_delays=None):
+    """
+    Render every component class, the sink and the coupled model as one module.
+    
+    groups is the result of group_components, and clusters and
+    simulated_delays are passed on to render_model. compact renders the
+    component classes compact. Loading one module instead of one per class
+    saves most of the import time of large models.
+    """
+    modules = []
+    for module_name, class_name, members in groups:
+        renderer = COMPONENT_RENDERERS[members[0]['type']]
+        modules.append(renderer(members[0], class_name=class_name if len(members) > 1 else None, compact=compact))
+    if any(component['type'] == 'sensor_bank' for component in components):
+        modules.append(render_sensor_bank())
+    if any(component['type'] == 'sensor' for component in components):
+        modules.append(runtime_module('randomstream'))
+    modules.append(render('sink.py'))
+    modules.append(render_model(components, connections, sensor_interval, component_classes(groups), clusters,
+                                simulated_delays))
+    
+    local_modules = {module_name for module_name, _, _ in groups}
+    local_modules.update(('sink', 'sensorbank', 'randomstream'))
+    return bundle_modules(modules, local_modules)
+
+def generate_actuator_file(component, output_dir, compact=False):
+    """Generate PyDEVS code for an actuator component."""
+    debug_print(f"Generating actuator file for: {component['name']}")
+    filename = component_filename(component)
+    filepath = os.path.join(output_dir, filename)
+    write_file(filepath, render_actuator(component, compact=compact))
     debug_print(f"Generated actuator file: {filepath}")
     return filename
 
-def generate_controller_file(component, output_dir):
+def generate_controller_file(component, output_dir, compact=False):
     """Generate PyDEVS code for a controller component."""
     debug_print(f"Generating controller file for: {component['name']}")
-    filename = f"{component['name'].replace(' ', '_').lower()}.py"
+    filename = component_filename(component)
     filepath = os.path.join(output_dir, filename)
-    
-    with open(filepath, 'w') as f:
-        f.write(f"""from pypdevs.DEVS import AtomicDEVS
-from pypdevs.infinity import INFINITY
-
-class {component['name'].replace(' ', '')}State:
-    def __init__(self):
-        self.last_data = None
-        self.processing_time = 0.0
-        self.threshold_high = 25.0  # Example threshold
-        self.threshold_low = 18.0   # Example threshold
-        self.decision = None
-
-class {component['name'].replace(' ', '')}(AtomicDEVS):
-    def __init__(self, simulated_delay=0.5):
-        AtomicDEVS.__init__(self, "{component['name']}")
-        self.simulated_delay = simulated_delay
-        self.state = {component['name'].replace(' ', '')}State()
-        self.timeLast = 0.0""")
-        
-        for i in component['in_ports']:
-            f.write(f"\n        self.inport{i} = self.addInPort(\"in{i}\")")
-        
-        for i in component['out_ports']:
-            f.write(f"\n        self.outport{i} = self.addOutPort(\"out{i}\")")
-        
-        f.write("""
-
-    def timeAdvance(self):
-        if self.state.decision is None:
-            return INFINITY
-        return self.state.processing_time - self.timeLast
-
-    def extTransition(self, inputs):""")
-        
-        if component['in_ports']:
-            first_inport = component['in_ports'][0]
-            f.write(f"""
-        self.state.last_data = inputs[self.inport{first_inport}]
-        #print(f"[{{self.name}}] Received data: {{self.state.last_data}}")
-        
-        if isinstance(self.state.last_data, dict):
-            try:
-                data_value = 0
-                if 'm2m:cin' in self.state.last_data and 'con' in self.state.last_data['m2m:cin']:
-                    content = self.state.last_data['m2m:cin']['con']
-                    if isinstance(content, str) and ',' in content:
-                        parts = content.split(',')
-                        if len(parts) >= 3:
-                            data_value = float(parts[2].strip())
-                    elif isinstance(content, (int, float)):
-                        data_value = float(content)
-                
-                if data_value > self.state.threshold_high:
-                    self.state.decision = "open"
-                    #print(f"[{{self.name}}] Decision: OPEN (value {{data_value}} > threshold {{self.state.threshold_high}})")
-                elif data_value < self.state.threshold_low:
-                    self.state.decision = "close"
-                    #print(f"[{{self.name}}] Decision: CLOSE (value {{data_value}} < threshold {{self.state.threshold_low}})")
-                else:
-                    self.state.decision = None
-                    #print(f"[{{self.name}}] Decision: No action needed ({{self.state.threshold_low}} <= {{data_value}} <= {{self.state.threshold_high}})")
-            except Exception as e:
-                #print(f"[{{self.name}}] Error processing data: {{str(e)}}")
-                self.state.decision = None""")
-        else:
-            f.write("\n        # No input ports defined")
-        
-        f.write("""
-        self.state.processing_time = self.timeLast + self.simulated_delay
-        return self.state
-
-    def outputFnc(self):
-        if self.state.decision is None:
-            return {}
-            
-        output = {"command": self.state.decision, "timestamp": self.state.processing_time}
-        print(f"[{self.name}] Sending command: {output}")""")
-        
-        if len(component['out_ports']) >= 2:
-            f.write(f"""
-        
-        if self.state.decision == "open":
-            return {{self.outport{component['out_ports'][0]}: output}}
-        elif self.state.decision == "close":
-            return {{self.outport{component['out_ports'][1]}: output}}
-        else:
-            return {{}}
-""")
-        elif component['out_ports']:
-            first_outport = component['out_ports'][0]
-            f.write(f"\n        return {{self.outport{first_outport}: output}}")
-        else:
-            f.write("\n        return {}")
-        
-        f.write("""
-
-    def intTransition(self):
-        self.timeLast = self.state.processing_time
-        self.state.decision = None
-        return self.state
-""")
-    
+    write_file(filepath, render_controller(component, compact=compact))
     debug_print(f"Generated controller file: {filepath}")
     return filename
 
-def generate_sensor_file(component, output_dir):
+def generate_sensor_file(component, output_dir, compact=False):
     """Generate PyDEVS code for a sensor component."""
     debug_print(f"Generating sensor file for: {component['name']}")
-    filename = f"{component['name'].replace(' ', '_').lower()}.py"
+    filename = component_filename(component)
     filepath = os.path.join(output_dir, filename)
-    
-    hw_comment = ""
-    if 'hw_details' in component:
-        hw = component['hw_details']
-        hw_comment = f"""
-# Hardware specifications:
-# Processor: {hw.get('processor', 'Unknown')}
-# Frequency: {hw.get('frequency', 'Unknown')} MHz
-# Memory: {hw.get('memory', 'Unknown')} {hw.get('memory_size', 'Unknown')} MB
-# Protocol: {component.get('protocol', 'Unknown')}
-# Routing: {component.get('routing', 'Unknown')}"""
-        debug_print(f"Including hardware details for {component['name']}")
-    
-    # Use the data_interval from the component, default to 1.0 if not provided
-    data_interval = component.get('data_interval', 1.0)
-    debug_print(f"Using data_interval: {data_interval} seconds for {component['name']}")
-    
-    with open(filepath, 'w') as f:
-        f.write(f"""from pypdevs.DEVS import AtomicDEVS
-from pypdevs.infinity import INFINITY
-import random
-import time
-{hw_comment}
-
-class {component['name'].replace(' ', '')}State:
-    def __init__(self):
-        self.next_reading_time = 1.0  
-        self.sensor_id = "{component['name']}" 
-        self.data_to_send = None  
-
-class {component['name'].replace(' ', '')}(AtomicDEVS):
-    def __init__(self, name, data_interval={data_interval}):
-        AtomicDEVS.__init__(self, name)
-        self.data_interval = data_interval
-        self.state = {component['name'].replace(' ', '')}State()
-        self.timeLast = 0.0""")
-        
-        for i in component['in_ports']:
-            f.write(f"\n        self.inport{i} = self.addInPort(\"in{i}\")")
-        
-        for i in component['out_ports']:
-            f.write(f"\n        self.outport{i} = self.addOutPort(\"out{i}\")")
-        
-        sensor_type = "temperature" if "Temperature" in component['name'] else "generic"
-        
-        if sensor_type == "temperature":
-            value_generator = "random.uniform(15.0, 30.0)"
-        else:
-            value_generator = "random.uniform(0, 100)"
-        
-        f.write(f"""
-
-        self.state.data_to_send = {{
-            "m2m:cin" :{{
-                 "lbl":[
-                    "Device-Type",
-                    f"{{self.name}}",
-                    "V1.0.0"
-                 ],
-                 "con": f"{{self.state.sensor_id}}, {{int(time.time())}}, {{{value_generator}}}",
-            }}
-        }}
-
-    def timeAdvance(self):
-        #print(f"[{{self.name}}] timeAdvance called. Next reading time: {{self.state.next_reading_time}}, timeLast: {{self.timeLast}}")
-        return self.state.next_reading_time - self.timeLast if self.state.data_to_send else INFINITY
-
-    def intTransition(self):
-        #print(f"[{{self.name}}] intTransition called.")
-        self.timeLast = self.state.next_reading_time 
-        self.state.next_reading_time = self.timeLast + self.data_interval 
-        
-        self.state.data_to_send = {{
-            "m2m:cin" :{{
-                 "lbl":[
-                    "Device-Type",
-                    f"{{self.name}}",
-                    "V1.0.0"
-                 ],
-                 "con": f"{{self.state.sensor_id}}, {{int(time.time())}}, {{{value_generator}}}",
-            }}
-        }}
-        return self.state
-
-    def extTransition(self, inputs):
-        #print(f"[{{self.name}}] extTransition called with inputs: {{inputs}}")
-        self.state.next_reading_time = self.timeLast + self.data_interval
-        return self.state
-
-    def outputFnc(self):
-        data = {{
-            "m2m:cin" :{{
-                 "lbl":[
-                    "Device-Type",
-                    f"{{self.name}}",
-                    "V1.0.0"
-                 ],
-                 "con": f"{{self.state.sensor_id}}, {{int(time.time())}}, {{{value_generator}}}",
-            }}
-        }}
-        #print(f"[{{self.name}}] outputFnc called. Sending data: {{data}}")""")
-        
-        if component['out_ports']:
-            first_outport = component['out_ports'][0]
-            f.write(f"\n        return {{self.outport{first_outport}: data}}")
-        else:
-            f.write("\n        return {}")
-    
+    write_file(filepath, render_sensor(component, compact=compact))
     debug_print(f"Generated sensor file: {filepath}")
     return filename
 
-def generate_interface_file(component, output_dir):
+def generate_interface_file(component, output_dir, compact=False):
     """Generate PyDEVS code for an interface component."""
     debug_print(f"Generating interface file for: {component['name']}")
-    filename = f"{component['name'].replace(' ', '_').lower()}.py"
+    filename = component_filename(component)
     filepath = os.path.join(output_dir, filename)
-    
-    with open(filepath, 'w') as f:
-        f.write(f"""from pypdevs.DEVS import AtomicDEVS
-from pypdevs.infinity import INFINITY
-
-class {component['name'].replace(' ', '')}State:
-    def __init__(self):
-        self.processing_time = 0.0 
-        self.data_to_send = None
-
-class {component['name'].replace(' ', '')}(AtomicDEVS):
-    def __init__(self, simulated_delay=1.0):
-        AtomicDEVS.__init__(self, "{component['name']}")
-        self.simulated_delay = simulated_delay
-        self.state = {component['name'].replace(' ', '')}State()
-        self.timeLast = 0.0""")
-        
-        for i in component['in_ports']:
-            f.write(f"\n        self.inport{i} = self.addInPort(\"in{i}\")")
-        
-        for i in component['out_ports']:
-            f.write(f"\n        self.outport{i} = self.addOutPort(\"out{i}\")")
-        
-        f.write("""
-
-    def timeAdvance(self):
-        if self.state.data_to_send is None:
-            return INFINITY
-        return self.state.processing_time - self.timeLast
+    write_file(filepath, render_interface(component, compact=compact))
+    debug_print(f"Generated interface file: {filepath}")
+    return filename
 
-    def extTransition(self, inputs):""")
-        
-        if component['in_ports']:
-            first_inport = component['in_ports'][0]
-            f.write(f"\n        self.state.data_to_send = inputs[self.inport{first_inport}]")
-        else:
-            f.write("\n        # No input ports defined")
-        
-        f.write("""
-        self.state.processing_time = self.timeLast + self.simulated_delay
-        return self.state
-
-    def outputFnc(self):
-        sensor_data = self.state.data_to_send
-        processed_data = {
-            "processed": True,
-            "original": sensor_data,
-            "timestamp": f"processed-{sensor_data['m2m:cin']['con'] if 'm2m:cin' in sensor_data else 'unknown'}"
-        }
-        self.state.data_to_send = None
-        print(f"{self.name} processed data: {processed_data}")""")
-        
-        if component['out_ports']:
-            first_outport = component['out_ports'][0]
-            f.write(f"\n        return {{self.outport{first_outport}: processed_data}}")
-        else:
-            f.write("\n        return {}")
-        
-        f.write("""
+def generate_shared_file(module_name, class_name, members, output_dir, compact=False):
+    """Generate the module of a class shared by components of the same shape."""
+    debug_print(f"Generating {class_name} for {len(members)} {members[0]['type']} components")
+    filename = f"{module_name}.py"
+    filepath = os.path.join(output_dir, filename)
+    write_file(filepath, COMPONENT_RENDERERS[members[0]['type']](members[0], class_name=class_name, compact=compact))
+    debug_print(f"Generated shared class file: {filepath}")
+    return filename
 
-    def intTransition(self):
-        self.timeLast = self.state.processing_time
-        self.state.processing_time = INFINITY
-        return self.state
-""")
-    
-    debug_print(f"Generated interface file: {filepath}")
+def generate_sensor_bank_file(output_dir):
+    """Generate the SensorBank module shared by every sensor bank."""
+    debug_print("Generating sensor bank file")
+    filename = "sensorbank.py"
+    filepath = os.path.join(output_dir, filename)
+    write_file(filepath, render_sensor_bank())
+    debug_print(f"Generated sensor bank file: {filepath}")
     return filename
 
 def generate_sink_file(output_dir):
@@ -377,128 +653,39 @@ def generate_sink_file(output_dir):
     debug_print("Generating sink file")
     filename = "sink.py"
     filepath = os.path.join(output_dir, filename)
-    
-    with open(filepath, 'w') as f:
-        f.write("""from pypdevs.DEVS import AtomicDEVS
-from pypdevs.infinity import INFINITY
-
-class Sink(AtomicDEVS):
-    def __init__(self):
-        AtomicDEVS.__init__(self, "Sink")
-        self.inport = self.addInPort("in")
-
-    def extTransition(self, inputs):
-        received_data = inputs[self.inport]
-        print(f"Sink received: {received_data}")
-        return self
-        
-    def timeAdvance(self):
-        return INFINITY
-""")
-    
+    write_file(filepath, render('sink.py'))
     debug_print(f"Generated sink file: {filepath}")
     return filename
 
-def generate_model_file(components, connections, output_dir):
-    """Generate PyDEVS model file that connects components."""
+def generate_model_file(components, connections, output_dir, groups=None, bundle=False, precompile=False, clusters=None,
+                        compact=False, simulated_delays=None):
+    """
+    Generate PyDEVS model file that connects components.
+    
+    groups (from group_components) gives the classes the components are
+    created from; by default each component has its own. With bundle, the
+    component classes and the sink are written into the model file itself,
+    and precompile also writes its bytecode to __pycache__. clusters (from
+    cluster_components) nests groups of components in coupled models of
+    their own; by default the model is flat. compact applies to the bundled
+    component classes. simulated_delays overrides the delay of the
+    submodels of each component type (see render_model).
+    """
     debug_print("Generating model file")
     filename = "model.py"
     filepath = os.path.join(output_dir, filename)
-    
-    fixed_connections = []
-    for conn in connections:
-        source_comp = conn['source_component']
-        target_comp = conn['target_component']
-        
-        if source_comp in ["Server", "Model", "Simulator"]:
-            source_comp = f"Data{source_comp}"
-        if target_comp in ["Server", "Model", "Simulator"]:
-            target_comp = f"Data{target_comp}"
-            
-        fixed_conn = conn.copy()
-        fixed_conn['source_component'] = source_comp
-        fixed_conn['target_component'] = target_comp
-        fixed_connections.append(fixed_conn)
-    
-    connections = fixed_connections
-    
-    debug_print(f"Connections to process: {len(connections)}")
-    for i, conn in enumerate(connections):
-        debug_print(f"Connection {i+1}: {conn['source_component']} -> {conn['target_component']}")
-    
-    with open(filepath, 'w') as f:
-        f.write("from pypdevs.DEVS import CoupledDEVS\n")
-        
-        for component in components:
-            module_name = component['name'].replace(' ', '_').lower()
-            class_name = component['name'].replace(' ', '')
-            f.write(f"from {module_name} import {class_name}\n")
-        
-        f.write("from sink import Sink\n\n")
-        
-        f.write("class SystemModel(CoupledDEVS):\n")
-        f.write("    def __init__(self):\n")
-        f.write("        CoupledDEVS.__init__(self, \"SystemModel\")\n")
-        f.write("        print(\"Model Loaded\")\n\n")
-        
-        for component in components:
-            var_name = component['name'].replace(' ', '_').lower()
-            class_name = component['name'].replace(' ', '')
-            
-            if component['type'] == 'sensor':
-                data_interval = component.get('data_interval', 5.0)  # Default to 10 if not provided
-                f.write(f"        print(\"Initializing {component['name']}\")\n")
-                f.write(f"        self.{var_name} = self.addSubModel({class_name}(\"{component['name']}\", data_interval={data_interval}))\n\n")
-            elif component['type'] == 'actuator':
-                f.write(f"        print(\"Initializing {component['name']}\")\n")
-                f.write(f"        self.{var_name} = self.addSubModel({class_name}(simulated_delay=0.1))\n\n")
-            elif component['type'] == 'controller':
-                f.write(f"        print(\"Initializing {component['name']}\")\n")
-                f.write(f"        self.{var_name} = self.addSubModel({class_name}(simulated_delay=0.5))\n\n")
-            else:
-                f.write(f"        print(\"Initializing {component['name']}\")\n")
-                f.write(f"        self.{var_name} = self.addSubModel({class_name}(simulated_delay=1.0))\n\n")
-        
-        f.write("        print(\"Initializing Sink\")\n")
-        f.write("        self.sink = self.addSubModel(Sink())\n\n")
-        
-        f.write("        # Connect components\n")
-        for conn in connections:
-            source = conn['source_component'].replace(' ', '_').lower()
-            source_port = f"outport{conn['source_port']}" if conn['source_port_type'] == 'output' else f"inport{conn['source_port']}"
-            
-            target = conn['target_component'].replace(' ', '_').lower()
-            target_port = f"inport{conn['target_port']}" if conn['target_port_type'] == 'input' else f"outport{conn['target_port']}"
-            
-            f.write(f"        print(\"Connecting {conn['source_component']} to {conn['target_component']}\")\n")
-            f.write(f"        try:\n")
-            f.write(f"            self.connectPorts(self.{source}.{source_port}, self.{target}.{target_port})\n")
-            f.write(f"            print(\"  Connection successful\")\n")
-            f.write(f"        except Exception as e:\n")
-            f.write(f"            print(f\"  Error connecting {source}.{source_port} to {target}.{target_port}: {{str(e)}}\")\n\n")
-        
-        connected_outputs = set()
-        for conn in connections:
-            source = conn['source_component']
-            source_port = conn['source_port']
-            if conn['source_port_type'] == 'output':
-                connected_outputs.add((source, source_port))
-        
-        f.write("        # Connect unconnected outputs to sink\n")
-        for component in components:
-            comp_name = component['name']
-            for port_idx in component['out_ports']:
-                if (comp_name, port_idx) not in connected_outputs:
-                    var_name = comp_name.replace(' ', '_').lower()
-                    f.write(f"        try:\n")
-                    f.write(f"            print(f\"Connecting {comp_name} output {port_idx} to sink\")\n")
-                    f.write(f"            self.connectPorts(self.{var_name}.outport{port_idx}, self.sink.inport)\n")
-                    f.write(f"            print(\"  Connection successful\")\n")
-                    f.write(f"        except Exception as e:\n")
-                    f.write(f"            print(f\"  Error connecting {var_name}.outport{port_idx} to sink: {{str(e)}}\")\n\n")
-            
-        f.write("\n        print(\"Model initialization complete\")\n")
-    
+    if groups is None:
+        groups = group_components(components, shared_classes=False)
+    
+    if bundle:
+        changed = write_file(filepath, render_bundle(components, connections, groups, clusters=clusters, compact=compact,
+                                                     simulated_delays=simulated_delays))
+        if precompile and (changed or not os.path.exists(importlib.util.cache_from_source(filepath))):
+            py_compile.compile(filepath, doraise=True)
+            debug_print(f"Compiled {filepath}")
+    else:
+        write_file(filepath, render_model(components, connections, classes=component_classes(groups), clusters=clusters,
+                                          simulated_delays=simulated_delays))
     debug_print(f"Generated model file: {filepath}")
     return filename
 
@@ -507,64 +694,45 @@ def generate_experiment_file(output_dir):
     debug_print("Generating experiment file")
     filename = "experiment.py"
     filepath = os.path.join(output_dir, filename)
-    
-    with open(filepath, 'w') as f:
-        f.write("""from pypdevs.simulator import Simulator
-from model import SystemModel
-import logging
-import sys
-import traceback
-
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("simulation.log"),
-        logging.StreamHandler(sys.stdout)
-    ]
-)
-
-logger = logging.getLogger("PyDEVS-Simulation")
-
-if __name__ == '__main__':
-    try:
-        logger.info("Starting the model")
-        
-        model = SystemModel()
-        logger.info("Model Loaded")
-        
-        sim = Simulator(model)
-        logger.info("Simulator Loaded")
-        
-        sim.setClassicDEVS()
-        logger.info("Classic DEVS set")
-        
-        sim.setVerbose()
-        logger.info("Verbose mode set")
-        
-        sim.setTerminationTime(3600)
-        logger.info("Termination time set to 3600")
-        
-        logger.info("Starting simulation")
-        sim.simulate()
-        logger.info("Simulation finished")
-        
-    except Exception as e:
-        logger.error(f"Error during simulation: {str(e)}")
-        logger.error(traceback.format_exc())
-        sys.exit(1)
-""")
-    
+    write_file(filepath, render('experiment.py'))
     debug_print(f"Generated experiment file: {filepath}")
     return filename
 
+def generate_recorder_file(output_dir):
+    """Copy the event recorder experiment.py attaches in fast mode."""
+    debug_print("Generating recorder file")
+    filename = "recorder.py"
+    filepath = os.path.join(output_dir, filename)
+    write_file(filepath, runtime_module('recorder'))
+    debug_print(f"Generated recorder file: {filepath}")
+    return filename
+
+def generate_random_stream_file(output_dir):
+    """Copy the random streams the generated sensors take their readings from."""
+    debug_print("Generating random stream file")
+    filename = "randomstream.py"
+    filepath = os.path.join(output_dir, filename)
+    write_file(filepath, runtime_module('randomstream'))
+    debug_print(f"Generated random stream file: {filepath}")
+    return filename
+
+def generate_columnar_file(output_dir):
+    """Copy the columnar tracer experiment.py attaches in columnar mode."""
+    debug_print("Generating columnar tracer file")
+    filename = "columnar.py"
+    filepath = os.path.join(output_dir, filename)
+    write_file(filepath, runtime_module('columnar'))
+    debug_print(f"Generated columnar tracer file: {filepath}")
+    return filename
+
 def generate_readme_file(components, connections, saml_file=None, hwml_file=None, output_dir=None):
     """Generate a README file documenting the generated system."""
     debug_print("Generating README file")
     filename = "README.md"
     filepath = os.path.join(output_dir, filename)
     
-    with open(filepath, 'w') as f:
+    # Build the document in memory and write it once
+    with io.StringIO() as f:
         f.write(f"""# PyDEVS IoT System Model
 
 ## Overview
@@ -587,6 +755,11 @@ The system consists of {len(components)} components:
             f.write(f"- Input Ports: {len(comp['in_ports'])}\n")
             f.write(f"- Output Ports: {len(comp['out_ports'])}\n")
             
+            if comp.get('behaviour', {}).get('names'):
+                behaviour = comp['behaviour']
+                f.write(f"- Behaviour: {len(behaviour['names'])} states, {len(behaviour['targets'])} transitions, "
+                        f"{len(behaviour['guard_table'])} guards in {len(behaviour['mode_entry'])} modes\n")
+            
             if 'hw_details' in comp:
                 hw = comp['hw_details']
                 f.write("- Hardware:\n")
@@ -617,7 +790,21 @@ To run the simulation:
 python experiment.py
 ```
 
-The simulation will run for 1 hour (simulation time) by default.
+The simulation will run for 1 hour (simulation time) by default; `--until` sets
+another termination time and `--formalism parallel` simulates with Parallel DEVS.
+By default the verbose simulator trace is written to stdout and simulation.log.
+`--mode fast` attaches a lightweight event recorder instead and only reports
+transition counts, which is much faster for long runs. `--mode columnar` writes
+one typed record per message (time, model, port, transition kind and numeric
+value) to the binary trace.col instead, which `columnar.read_trace` loads into
+arrays. Every mode reports the wall time of the simulation.
+
+Every sensor takes its readings from its own random stream (randomstream.py),
+which generates them in blocks with NumPy when it is installed and with the
+random module otherwise. The streams are seeded from the random module, so
+`--seed` fixes the random values the sensors generate. To run many independent
+replications and get confidence intervals of their metrics, use `replicate.py`
+of the generator on this directory.
 
 ## Troubleshooting
 If the simulation fails, check the following:
@@ -627,24 +814,70 @@ If the simulation fails, check the following:
 3. Check that all imported modules are available in your Python environment
 4. Make sure you have the PyPDEVS library installed
 """)
+        write_file(filepath, f.getvalue())
     
     debug_print(f"Generated README file: {filepath}")
     return filename
 
-def generate_hwml_details(hwml_file):
-    """Extract hardware details from HWML file if provided."""
-    if not hwml_file or not os.path.exists(hwml_file):
-        return {}
-    
-    try:
-        from .saml_parser import parse_hwml_file
-        return parse_hwml_file(hwml_file)
-    except Exception as e:
-        debug_print(f"Error parsing HWML file: {str(e)}")
-        return {}
-
-def generate_pydevs_from_saml(saml_file, hwml_file=None, output_dir=None):
-    """Generate PyDEVS files from SAML and optional HWML file."""
+def run_jobs(func, items, jobs=1):
+    """
+    Return [func(item) for item in items], spread over `jobs` worker threads.
+    
+    Results keep the order of items whatever order the workers finish in.
+    File writes release the GIL, so the workers overlap their disk I/O.
+    """
+    items = list(items)
+    if not jobs or jobs <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(func, items))
+
+def generate_pydevs_from_saml(saml_file, hwml_file=None, output_dir=None, model=None, use_cache=True, incremental=True, jobs=1,
+                              shared_classes=True, bundle=False, precompile=False, cluster_strategy=None,
+                              cluster_size=DEFAULT_CLUSTER_SIZE, sensor_banks=None, compact=False, simulated_delays=None):
+    """
+    Generate PyDEVS files from SAML and optional HWML file.
+    
+    A ParsedModel built by the caller can be passed as `model` to avoid
+    parsing the inputs again. Otherwise the parsed model is looked up in the
+    on-disk model cache unless `use_cache` is False.
+    
+    A manifest in the output directory records what each file was generated
+    from, so only files whose component, connections or topology changed are
+    regenerated. Pass `incremental=False` to regenerate every file. Either
+    way, a regenerated file is only rewritten if its content changed (see
+    output_writer).
+    
+    Files are rendered and written by `jobs` worker threads; the returned
+    list is in the same order whatever the number of jobs.
+    
+    Components of the same shape are created from one shared class unless
+    `shared_classes` is False (see group_components).
+    
+    With `bundle`, all classes and the coupled model are written to model.py
+    instead of one module each, and `precompile` also compiles it to
+    bytecode, so experiment.py starts without importing or compiling
+    anything else.
+    
+    With a `cluster_strategy` ('connected', 'partition' or 'network'), the
+    coupled model is built as a hierarchy of clusters of at most
+    `cluster_size` components instead of one flat coupled model (see
+    cluster_components).
+    
+    With `sensor_banks` ('batched' or 'expanded'), every group of sensors
+    sharing a class is simulated by a single SensorBank model holding them
+    in NumPy arrays (see bank_sensors); the generated model then needs
+    NumPy.
+    
+    With `compact`, the generated state classes declare __slots__ and
+    sensors send a small SensorReading instead of a nested oneM2M dict;
+    the full message is only built by the interfaces and the sink.
+    
+    simulated_delays maps component types ('actuator', 'controller',
+    'interface') to the delay their submodels are created with, instead of
+    the defaults in SIMULATED_DELAYS.
+    """
     if not output_dir:
         output_dir = os.path.join(os.path.dirname(saml_file), "generated_pydevs")
     
@@ -654,51 +887,109 @@ def generate_pydevs_from_saml(saml_file, hwml_file=None, output_dir=None):
     debug_print(f"Generating PyDEVS files from SAML: {saml_file}")
     debug_print(f"Output directory: {output_dir}")
     
-    # Parse SAML file to extract components and connections
-    from .saml_parser import parse_saml_file
-    components, connections = parse_saml_file(saml_file)
-    
-    # Extract hardware details if HWML file is provided
-    hw_details = generate_hwml_details(hwml_file)
+    # Parse the SAML and HWML files once into the shared model
+    if model is None:
+        from .model_ir import build_model
+        from .model_cache import ModelCache
+        model = build_model(saml_file, hwml_file, cache=ModelCache() if use_cache else None)
+    components = model.components
+    connections = model.connections
     
-    # Add hardware details to components if available
-    for component in components:
-        if component['name'] in hw_details:
-            component['hw_details'] = hw_details[component['name']]
-    
-    # Generate files based on component types
+    component_connections = {}
+    for conn in connections:
+        component_connections.setdefault(conn['source_component'], []).append(conn)
+        if conn['target_component'] != conn['source_component']:
+            component_connections.setdefault(conn['target_component'], []).append(conn)
+    
+    # Every output file as (filename, fingerprint of its inputs, writer)
+    tasks = []
+    groups = group_components(components, shared_classes)
+    classes = component_classes(groups)
+    
+    # The model is built from the banks instead of the sensors they hold
+    model_components, model_connections, model_groups = components, connections, groups
+    if sensor_banks:
+        model_components, model_connections, model_groups = bank_sensors(components, connections, groups,
+                                                                         expand=sensor_banks == 'expanded')
+    clusters = None
+    if cluster_strategy:
+        clusters = cluster_components(model_components, model_connections, cluster_strategy, cluster_size)
+    
+    if bundle:
+        # Every class is in the model file, so it changes with any component
+        tasks.append(("model.py", fingerprint([components, connections, classes, precompile, clusters, sensor_banks, compact,
+                                               simulated_delays]),
+                      partial(generate_model_file, model_components, model_connections, output_dir, model_groups, True,
+                              precompile, clusters, compact, simulated_delays)))
+    else:
+        for module_name, class_name, members in model_groups:
+            if len(members) == 1:
+                component = members[0]
+                tasks.append((component_filename(component),
+                              fingerprint([component, component_connections.get(component['name'], []), compact]),
+                              partial(COMPONENT_GENERATORS[component['type']], component, output_dir, compact)))
+            else:
+                tasks.append((f"{module_name}.py",
+                              fingerprint([class_name, component_shape(members[0]), members[0].get('data_interval'), compact]),
+                              partial(generate_shared_file, module_name, class_name, members, output_dir, compact)))
+        
+        if model_groups is not groups:
+            tasks.append(("sensorbank.py", fingerprint("sensorbank"), partial(generate_sensor_bank_file, output_dir)))
+        if any(component['type'] == 'sensor' for component in model_components):
+            tasks.append(("randomstream.py", fingerprint("randomstream"), partial(generate_random_stream_file, output_dir)))
+        tasks.append(("sink.py", fingerprint("sink"), partial(generate_sink_file, output_dir)))
+        
+        # The model file only changes with the topology
+        topology = [
+            [(comp['name'], comp['type'], comp.get('data_interval'), comp['out_ports']) for comp in components],
+            connections,
+            classes,
+            clusters,
+            sensor_banks,
+            simulated_delays
+        ]
+        tasks.append(("model.py", fingerprint(topology),
+                      partial(generate_model_file, model_components, model_connections, output_dir, model_groups,
+                              clusters=clusters, simulated_delays=simulated_delays)))
+    
+    tasks.append(("experiment.py", fingerprint("experiment"), partial(generate_experiment_file, output_dir)))
+    tasks.append(("recorder.py", fingerprint("recorder"), partial(generate_recorder_file, output_dir)))
+    tasks.append(("columnar.py", fingerprint("columnar"), partial(generate_columnar_file, output_dir)))
+    
+    inputs = [os.path.basename(path) if path else None for path in (saml_file, hwml_file)]
+    tasks.append(("README.md", fingerprint([components, connections, inputs]),
+                  partial(generate_readme_file, components, connections, saml_file, hwml_file, output_dir)))
+    
+    # Files are only regenerated when the data they are generated from changed,
+    # and only rewritten when the regenerated content differs
+    manifest = GenerationManifest(output_dir, force=not incremental)
+    stale = [task for task in tasks if not manifest.is_current(task[0], task[1])]
+    counts = writer.counts()
+    run_jobs(lambda task: task[2](), stale, jobs)
+    writer.report(since=counts)
+    
+    stale_names = {task[0] for task in stale}
     generated_files = []
-    for component in components:
-        debug_print(f"Generating files for component: {component['name']} (Type: {component['type']})")
-        
-        if component['type'] == 'sensor':
-            filename = generate_sensor_file(component, output_dir)
-            generated_files.append(filename)
-        elif component['type'] == 'actuator':
-            filename = generate_actuator_file(component, output_dir)
-            generated_files.append(filename)
-        elif component['type'] == 'controller':
-            filename = generate_controller_file(component, output_dir)
-            generated_files.append(filename)
-        elif component['type'] == 'interface':
-            filename = generate_interface_file(component, output_dir)
-            generated_files.append(filename)
-    
-    # Generate the sink file
-    sink_file = generate_sink_file(output_dir)
-    generated_files.append(sink_file)
-    
-    # Generate the model file
-    model_file = generate_model_file(components, connections, output_dir)
-    generated_files.append(model_file)
-    
-    # Generate the experiment file
-    experiment_file = generate_experiment_file(output_dir)
-    generated_files.append(experiment_file)
-    
-    # Generate the README file
-    readme_file = generate_readme_file(components, connections, saml_file, hwml_file, output_dir)
-    generated_files.append(readme_file)
+    for filename, file_fingerprint, _ in tasks:
+        manifest.record(filename, file_fingerprint, written=filename in stale_names)
+        generated_files.append(filename)
     
+    manifest.save()
     debug_print(f"Successfully generated {len(generated_files)} files in {output_dir}")
-    return generated_files
\ No newline at end of file
+    return generated_files
+
+# Module renderer for each component type
+COMPONENT_RENDERERS = {
+    'sensor': render_sensor,
+    'actuator': render_actuator,
+    'controller': render_controller,
+    'interface': render_interface,
+}
+
+# File generator for each component type
+COMPONENT_GENERATORS = {
+    'sensor': generate_sensor_file,
+    'actuator': generate_actuator_file,
+    'controller': generate_controller_file,
+    'interface': generate_interface_file,
+}
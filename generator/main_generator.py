@@ -6,7 +6,7 @@ import shutil
 # Add the parent directory to sys.path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from generator.component_extraction import extract_components
+from generator.model_ir import build_model
 from generator.file_generators import (
     generate_actuator_file,
     generate_controller_file,
@@ -15,17 +15,27 @@ from generator.file_generators import (
     generate_sink_file,
     generate_model_file,
     generate_experiment_file,
+    generate_recorder_file,
+    generate_random_stream_file,
+    generate_columnar_file,
     generate_readme_file
 )
 from generator.debug_utils import debug_print, log_exception
-from generator.parse_connections import parse_connections
 
 def generate_pydevs_files(saml_file_path=None, hwml_file_path=None):
     """Main function to generate PyDEVS files from XML input."""
     debug_print(f"Starting PyDEVS file generation - SAML: {saml_file_path}, HWML: {hwml_file_path}")
     try:
-        # Extract components and connections
-        components = extract_components(saml_file_path, hwml_file_path)
+        # Parse the input files once into the shared model
+        try:
+            model = build_model(saml_file_path, hwml_file_path)
+        except Exception as e:
+            log_exception(e)
+            debug_print("Error occurred while parsing the input files. Exiting.")
+            return False
+        
+        components = model.components
+        connections = model.connections
         debug_print(f"Extracted {len(components)} components")
         
         if not components:
@@ -33,25 +43,6 @@ def generate_pydevs_files(saml_file_path=None, hwml_file_path=None):
             print("No components found in the XML files.")
             return False
         
-        # Get connections from both files if available
-        connections = []
-        try:
-            if saml_file_path:
-                debug_print(f"Parsing connections from SAML file: {saml_file_path}")
-                saml_connections = parse_connections(saml_file_path)
-                debug_print(f"Found {len(saml_connections)} connections in SAML file")
-                connections.extend(saml_connections)
-            
-            if hwml_file_path:
-                debug_print(f"Parsing connections from HWML file: {hwml_file_path}")
-                hwml_connections = parse_connections(hwml_file_path)
-                debug_print(f"Found {len(hwml_connections)} connections in HWML file")
-                connections.extend(hwml_connections)
-        except Exception as e:
-            log_exception(e)
-            debug_print("Error occurred while parsing connections. Exiting.")
-            return False
-        
         debug_print(f"Total connections: {len(connections)}")
         
         # Create timestamped output directory
@@ -87,6 +78,8 @@ def generate_pydevs_files(saml_file_path=None, hwml_file_path=None):
         try:
             sink_file = generate_sink_file(output_dir)
             generated_files.append(sink_file)
+            if any(component['type'] == 'sensor' for component in components):
+                generated_files.append(generate_random_stream_file(output_dir))
         except Exception as e:
             log_exception(e)
             debug_print("Error generating sink file.")
@@ -103,6 +96,8 @@ def generate_pydevs_files(saml_file_path=None, hwml_file_path=None):
         try:
             exp_file = generate_experiment_file(output_dir)
             generated_files.append(exp_file)
+            generated_files.append(generate_recorder_file(output_dir))
+            generated_files.append(generate_columnar_file(output_dir))
         except Exception as e:
             log_exception(e)
             debug_print("Error generating experiment file.")
@@ -0,0 +1,90 @@
+import os
+import json
+import glob
+import hashlib
+from .debug_utils import debug_print
+from .output_writer import write_file
+
+MANIFEST_NAME = '.pydevs_manifest.json'
+
+_generator_fingerprint = None
+
+def fingerprint(data):
+    """Return a SHA-256 of a JSON-serialisable structure, independent of dict ordering."""
+    encoded = json.dumps(data, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+def generator_fingerprint():
+    """Return a hash of the generator sources, templates and runtime modules, so editing any invalidates the output."""
+    global _generator_fingerprint
+    
+    if _generator_fingerprint is None:
+        digest = hashlib.sha256()
+        package_dir = os.path.dirname(os.path.abspath(__file__))
+        sources = (glob.glob(os.path.join(package_dir, '*.py')) + glob.glob(os.path.join(package_dir, 'templates', '*.tmpl')) +
+                   glob.glob(os.path.join(package_dir, 'runtime', '*.py')))
+        for path in sorted(sources):
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+        _generator_fingerprint = digest.hexdigest()
+    return _generator_fingerprint
+
+class GenerationManifest:
+    """
+    Record of the fingerprint behind every file in an output directory.
+    
+    A file is only regenerated when the fingerprint of the data it is
+    generated from differs from the one recorded when it was last written,
+    the file is missing, or the generator itself has changed (or force is
+    set). Files that are no longer produced are removed when the manifest
+    is saved.
+    """
+    
+    def __init__(self, output_dir, force=False):
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        self.previous = {}
+        self.recorded = []
+        self.files = {}
+        self.written = []
+        self.skipped = []
+        
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            self.recorded = list(data.get('files', {}))
+            if force:
+                debug_print("Regenerating every file")
+            elif data.get('generator') == generator_fingerprint():
+                self.previous = data.get('files', {})
+            else:
+                debug_print("Generator changed since the last run, regenerating every file")
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            debug_print(f"Ignoring unreadable manifest {self.path}: {str(e)}")
+    
+    def is_current(self, filename, file_fingerprint):
+        """Return True if filename exists and was generated from the same data."""
+        return (self.previous.get(filename) == file_fingerprint and
+                os.path.exists(os.path.join(self.output_dir, filename)))
+    
+    def record(self, filename, file_fingerprint, written):
+        """Record the fingerprint of a file that was written, or skipped as up to date."""
+        (self.written if written else self.skipped).append(filename)
+        self.files[filename] = file_fingerprint
+    
+    def save(self):
+        """Remove files that are no longer generated and write the manifest."""
+        for filename in self.recorded:
+            if filename not in self.files:
+                debug_print(f"Removing stale file: {filename}")
+                try:
+                    os.remove(os.path.join(self.output_dir, filename))
+                except OSError:
+                    pass
+        
+        manifest = {'generator': generator_fingerprint(), 'files': self.files}
+        write_file(self.path, json.dumps(manifest, indent=1, sort_keys=True), count=False)
+        
+        debug_print(f"Regenerated {len(self.written)} files, {len(self.skipped)} up to date")
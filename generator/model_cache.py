@@ -0,0 +1,112 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from .debug_utils import debug_print
+
+# Bump whenever the parsed component/connection structures change so that
+# entries written by an older parser are never loaded.
+PARSER_VERSION = 4
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    'CAPS_PYDEVS_CACHE',
+    os.path.join(os.path.expanduser('~'), '.cache', 'caps-pydevs')
+)
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024  # 64 MB
+
+class ModelCache:
+    """
+    On-disk cache of parsed SAML/HWML models.
+    
+    Entries are keyed by a SHA-256 of the input file bytes and the parser
+    version, and hold the parsed components, connections and HWML nodes as
+    pickles. Loading an entry refreshes its modification time; once the cache
+    grows beyond max_bytes the least recently used entries are removed.
+    """
+    
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+    
+    def key_for(self, saml_file=None, hwml_file=None):
+        """Return the cache key for a pair of input files."""
+        digest = hashlib.sha256(f"parser-v{PARSER_VERSION}".encode())
+        for role, path in (('saml', saml_file), ('hwml', hwml_file)):
+            digest.update(f"\0{role}\0".encode())
+            if path:
+                with open(path, 'rb') as f:
+                    for chunk in iter(lambda: f.read(1 << 20), b''):
+                        digest.update(chunk)
+        return digest.hexdigest()
+    
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.pickle")
+    
+    def load(self, key):
+        """Return the cached entry for key, or None on a miss."""
+        path = self._entry_path(key)
+        try:
+            with open(path, 'rb') as f:
+                entry = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            debug_print(f"Discarding unreadable cache entry {path}: {str(e)}")
+            self._remove(path)
+            return None
+        
+        # Mark the entry as recently used
+        os.utime(path)
+        debug_print(f"Loaded parsed model from cache: {path}")
+        return entry
+    
+    def store(self, key, entry):
+        """Write an entry atomically and evict old entries if needed."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._entry_path(key))
+        except Exception:
+            self._remove(tmp_path)
+            raise
+        
+        debug_print(f"Stored parsed model in cache: {self._entry_path(key)}")
+        self.evict()
+    
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.pickle'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            debug_print(f"Evicting cache entry: {path}")
+            self._remove(path)
+            total -= size
+    
+    def clear(self):
+        """Remove every entry from the cache."""
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.pickle'):
+                    self._remove(os.path.join(self.cache_dir, name))
+    
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
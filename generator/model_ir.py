@@ -0,0 +1,119 @@
+from . import xml_backend
+from .debug_utils import debug_print
+from .saml_parser import parse_saml_file, parse_hwml_file, ReferenceIndex
+from .behaviour_graph import compile_behaviour
+from .component_extraction import merge_hwml_nodes, rename_reserved_components
+from .parse_connections import hwml_connections
+
+class ParsedModel:
+    """
+    Intermediate representation of a SAML/HWML model pair.
+    
+    Every input file is parsed once into this structure, which is then shared
+    by the file generators, the README writer and the connection printer.
+    
+    Attributes:
+        components: list of component dicts with name, type, in_ports,
+            out_ports, behaviors, modes, data_interval and source, plus
+            behaviour (the compiled state-transition table, see
+            behaviour_graph.compile_behaviour) for SAML components and
+            protocol, routing and hw_details for HWML-backed components
+        connections: list of connection dicts with source_component,
+            source_port, source_port_type, target_component, target_port
+            and target_port_type
+        hwml_nodes: list of HWML node dicts with name, protocol, routing,
+            position, range and hw_details
+        references: ReferenceIndex mapping EMF reference paths
+            ("//@SAElements.N/...") to components, ports, modes and
+            behavioural elements
+        saml_file: path of the SAML input, if any
+        hwml_file: path of the HWML input, if any
+    """
+    
+    def __init__(self, components=None, connections=None, hwml_nodes=None, saml_file=None, hwml_file=None, references=None):
+        self.components = components if components is not None else []
+        self.connections = connections if connections is not None else []
+        self.hwml_nodes = hwml_nodes if hwml_nodes is not None else []
+        self.references = references if references is not None else ReferenceIndex()
+        self.saml_file = saml_file
+        self.hwml_file = hwml_file
+    
+    def get_component(self, name):
+        """Return the component with the given name, or None."""
+        return next((comp for comp in self.components if comp['name'] == name), None)
+    
+    def resolve(self, ref):
+        """Return the record for an EMF reference path, or None."""
+        return self.references.resolve(ref)
+    
+    def resolve_all(self, refs):
+        """Resolve a space-separated list of EMF reference paths."""
+        return self.references.resolve_all(refs)
+
+def detect_file_type(xml_file_path):
+    """Return 'SAML' or 'HWML' depending on the root element of the file."""
+    # Only the root element is read, so the file is closed here rather than by the parser
+    with open(xml_file_path, 'rb') as f:
+        for _, element in xml_backend.iterparse(f, events=('start',)):
+            return 'HWML' if element.tag.endswith('NodeSpecification') else 'SAML'
+    return 'SAML'
+
+def build_model(saml_file=None, hwml_file=None, cache=None):
+    """
+    Parse the SAML and HWML inputs once and build the shared model.
+    
+    Args:
+        saml_file: Path to the SAML file (optional)
+        hwml_file: Path to the HWML file (optional)
+        cache: ModelCache used to skip parsing unchanged inputs (optional)
+    
+    Returns:
+        ParsedModel: the parsed components, connections and HWML nodes
+    """
+    debug_print(f"Building model - SAML: {saml_file}, HWML: {hwml_file}")
+    
+    cache_key = None
+    if cache is not None:
+        try:
+            cache_key = cache.key_for(saml_file, hwml_file)
+            entry = cache.load(cache_key)
+        except OSError as e:
+            debug_print(f"Model cache unavailable: {str(e)}")
+            cache_key, entry = None, None
+        if entry is not None:
+            return ParsedModel(entry['components'], entry['connections'], entry['hwml_nodes'],
+                               saml_file, hwml_file, entry['references'])
+    
+    components, connections = [], []
+    references = ReferenceIndex()
+    if saml_file:
+        components, connections = parse_saml_file(saml_file, streaming=True, references=references)
+        debug_print(f"Found {len(components)} components and {len(connections)} connections in SAML file")
+        
+        # Compile each component's modes into a state-transition table
+        for component in components:
+            component['behaviour'] = compile_behaviour(component, references)
+    
+    hwml_nodes = []
+    if hwml_file:
+        hwml_nodes = parse_hwml_file(hwml_file)
+        debug_print(f"Found {len(hwml_nodes)} nodes in HWML file")
+        merge_hwml_nodes(components, hwml_nodes)
+        connections.extend(hwml_connections(hwml_nodes))
+    
+    rename_reserved_components(components, connections)
+    
+    debug_print(f"Model complete. Found {len(components)} components and {len(connections)} connections.")
+    
+    if cache_key is not None:
+        try:
+            cache.store(cache_key, {
+                'components': components,
+                'connections': connections,
+                'hwml_nodes': hwml_nodes,
+                'references': references
+            })
+        except OSError as e:
+            debug_print(f"Could not write model cache: {str(e)}")
+    
+    return ParsedModel(components, connections, hwml_nodes, saml_file, hwml_file, references)
@@ -0,0 +1,107 @@
+import os
+import hashlib
+import tempfile
+import threading
+from .debug_utils import debug_print
+
+# Read the umask once, so written files get the same mode open() would give them
+UMASK = os.umask(0)
+os.umask(UMASK)
+
+def content_hash(data):
+    """Return the SHA-256 of a str or bytes value."""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+def file_hash(filepath):
+    """Return the SHA-256 of a file's contents, or None if it cannot be read."""
+    digest = hashlib.sha256()
+    try:
+        with open(filepath, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 16), b''):
+                digest.update(block)
+    except OSError:
+        return None
+    return digest.hexdigest()
+
+class OutputWriter:
+    """
+    Writes generated files atomically, leaving identical files untouched.
+    
+    A file is only replaced when the hash of the new content differs from
+    the hash of what is on disk, so unchanged modules keep their modification
+    time and their compiled __pycache__ entries stay valid. New content is
+    written to a temporary file in the same directory and moved into place,
+    so readers never see a half-written file.
+    
+    Writes may come from several threads; the counts of written and skipped
+    files are kept under a lock.
+    """
+    
+    def __init__(self):
+        self.written = 0
+        self.skipped = 0
+        self.lock = threading.Lock()
+    
+    def write(self, filepath, text, count=True):
+        """
+        Write text to filepath unless the file already holds the same content.
+        
+        Bookkeeping files such as the generation manifest pass count=False
+        to stay out of the written/skipped counts.
+        
+        Returns:
+            bool: True if the file was written, False if it was left as it was
+        """
+        data = text.encode('utf-8') if isinstance(text, str) else text
+        
+        # Only hash the existing file when the sizes match
+        try:
+            same_size = os.path.getsize(filepath) == len(data)
+        except OSError:
+            same_size = False
+        
+        if same_size and file_hash(filepath) == content_hash(data):
+            if count:
+                with self.lock:
+                    self.skipped += 1
+            return False
+        
+        directory = os.path.dirname(os.path.abspath(filepath))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.', suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.chmod(tmp_path, 0o666 & ~UMASK)
+            os.replace(tmp_path, filepath)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        
+        if count:
+            with self.lock:
+                self.written += 1
+        return True
+    
+    def counts(self):
+        """Return (written, skipped) since the writer was created."""
+        with self.lock:
+            return self.written, self.skipped
+    
+    def report(self, since=(0, 0)):
+        """debug_print how many files were written and skipped since an earlier counts()."""
+        written, skipped = self.counts()
+        written, skipped = written - since[0], skipped - since[1]
+        debug_print(f"Wrote {written} files, {skipped} identical files left untouched")
+        return written, skipped
+
+# Writer shared by every generator in this process
+writer = OutputWriter()
+
+def write_file(filepath, text, count=True):
+    """Write a generated file through the shared writer; returns True if it changed."""
+    return writer.write(filepath, text, count)
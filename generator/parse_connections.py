@@ -1,112 +1,166 @@
-import xml.etree.ElementTree as ET
 import sys
 import os
+import math
+import argparse
+import itertools
+
+# Allow running this module directly as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generator.debug_utils import debug_print
 
 def parse_connections(xml_file_path):
     """
     Parse a CAPS SAML or CAPSHWML XML file and extract all connections between components.
     """
-    namespaces = {
-        'xsi': 'http://www.w3.org/2001/XMLSchema-instance',
-        'components': 'components',
-        'filesystem': 'filesystem'
-    }
+    from generator.model_ir import build_model, detect_file_type
     
     try:
-        tree = ET.parse(xml_file_path)
-        root = tree.getroot()
-        
-        file_type = 'SAML' if root.find('./SAElements', namespaces) is not None else 'HWML'
-        
-        connections = []
-        
-        if file_type == 'SAML':
-            components_by_pos = {}
-            port_map = {}
-            
-            for i, element in enumerate(root.findall('./SAElements', namespaces)):
-                element_type = element.get(f'{{{namespaces["xsi"]}}}type')
-                
-                if element_type and 'Component' in element_type:
-                    component_name = element.get('name')
-                    components_by_pos[i] = component_name
-                    
-                    for j, port in enumerate(element.findall('./ports', namespaces)):
-                        port_reference = f"//@SAElements.{i}/@ports.{j}"
-                        port_type = "input" if "InMessagePort" in port.get(f'{{{namespaces["xsi"]}}}type', '') else "output"
-                        port_map[port_reference] = {
-                            'component': component_name,
-                            'port_idx': j,
-                            'type': port_type
-                        }
-            
-            for i, element in enumerate(root.findall('./SAElements', namespaces)):
-                element_type = element.get(f'{{{namespaces["xsi"]}}}type')
-                
-                if element_type and 'Connection' in element_type:
-                    source_port = element.get('source')
-                    target_port = element.get('target')
-                    
-                    if source_port in port_map and target_port in port_map:
-                        connections.append({
-                            'source_component': port_map[source_port]['component'],
-                            'source_port': port_map[source_port]['port_idx'],
-                            'source_port_type': port_map[source_port]['type'],
-                            'target_component': port_map[target_port]['component'],
-                            'target_port': port_map[target_port]['port_idx'],
-                            'target_port_type': port_map[target_port]['type']
-                        })
-                    else:
-                        print(f"Warning: Connection {i} has missing ports: {source_port} -> {target_port}")
-        
-        elif file_type == 'HWML':
-            node_map = {}
-            
-            for node in root.findall('./nodes', namespaces):
-                node_name = node.get('name')
-                protocol = node.get('macProtocol', 'Unknown')
-                routing = node.get('routingProtocol', 'Unknown')
-                
-                node_map[node_name] = {
-                    'protocol': protocol,
-                    'routing': routing
-                }
-            
-            node_list = list(node_map.keys())
-            for i in range(len(node_list)):
-                for j in range(i + 1, len(node_list)):
-                    connections.append({
-                        'source_component': node_list[i],
-                        'source_port': node_map[node_list[i]]['protocol'],
-                        'source_port_type': node_map[node_list[i]]['routing'],
-                        'target_component': node_list[j],
-                        'target_port': node_map[node_list[j]]['protocol'],
-                        'target_port_type': node_map[node_list[j]]['routing']
-                    })
-        
-        return connections
+        if detect_file_type(xml_file_path) == 'SAML':
+            return build_model(saml_file=xml_file_path).connections
+        return build_model(hwml_file=xml_file_path).connections
     except Exception as e:
         print(f"Error parsing XML file: {str(e)}")
         return []
 
+# Node names that mark the coordinator of a star network
+COORDINATOR_HINTS = ('Gateway', 'Coordinator', 'Server', 'Interface', 'Controller')
+
+def hwml_edge(source, target):
+    """Return the connection dict linking two HWML nodes."""
+    return {
+        'source_component': source['name'],
+        'source_port': source['protocol'],
+        'source_port_type': source['routing'],
+        'target_component': target['name'],
+        'target_port': target['protocol'],
+        'target_port_type': target['routing']
+    }
+
+def find_coordinator(group):
+    """Pick the coordinator of a node group: the first node named like a gateway, else the first node."""
+    for node in group:
+        if any(hint.lower() in node['name'].lower() for hint in COORDINATOR_HINTS):
+            return node
+    return group[0]
+
+def iter_radio_links(group):
+    """
+    Yield the pairs of nodes within radio range of each other.
+    
+    Nodes are bucketed in a grid whose cells are as wide as the largest
+    radio range, so each node is only compared with nodes in its own and
+    the neighbouring cells. Two nodes are linked when their distance is
+    within the smaller of their ranges.
+    """
+    cell_size = max(node['range'] for node in group) or 1.0
+    dims = max(len(node['position']) for node in group)
+    grid = {}
+    for idx, node in enumerate(group):
+        position = tuple(node['position']) + (0.0,) * (dims - len(node['position']))
+        cell = tuple(int(math.floor(coord / cell_size)) for coord in position)
+        grid.setdefault(cell, []).append((idx, position))
+    
+    offsets = list(itertools.product((-1, 0, 1), repeat=dims))
+    for cell, members in grid.items():
+        for offset in offsets:
+            neighbour = tuple(c + o for c, o in zip(cell, offset))
+            for i, pos_i in members:
+                for j, pos_j in grid.get(neighbour, ()):
+                    if j <= i:
+                        continue
+                    reach = min(group[i]['range'], group[j]['range'])
+                    if math.dist(pos_i, pos_j) <= reach:
+                        yield group[i], group[j]
+
+def iter_hwml_connections(nodes):
+    """
+    Yield the connections between HWML nodes one at a time.
+    
+    Nodes only talk to nodes using the same MAC protocol. Within a protocol
+    group, nodes that all have coordinates and a radio range are linked to
+    every node in range; other groups form a star around a coordinator
+    node. The coordinators of the groups are chained together so the
+    network stays connected. The number of edges grows with the number of
+    nodes (and their neighbours in range) instead of quadratically, and
+    nothing is accumulated, so edges can be written out as they are made.
+    
+    Args:
+        nodes: list of HWML node dicts
+    
+    Yields:
+        dict: connection dicts in the same format as SAML connections
+    """
+    groups = {}
+    for node in nodes:
+        groups.setdefault(node['protocol'], []).append(node)
+    
+    coordinators = []
+    for protocol, group in groups.items():
+        coordinator = find_coordinator(group)
+        coordinators.append(coordinator)
+        
+        if len(group) > 1 and all(node.get('position') and node.get('range') for node in group):
+            debug_print(f"Linking {len(group)} {protocol} nodes by radio range")
+            for source, target in iter_radio_links(group):
+                yield hwml_edge(source, target)
+        else:
+            debug_print(f"Linking {len(group)} {protocol} nodes in a star around {coordinator['name']}")
+            for node in group:
+                if node is not coordinator:
+                    yield hwml_edge(coordinator, node)
+    
+    # Backbone between protocol groups
+    for source, target in zip(coordinators, coordinators[1:]):
+        yield hwml_edge(source, target)
+
+def hwml_connections(nodes):
+    """Return the connections between HWML nodes as a list (see iter_hwml_connections)."""
+    return list(iter_hwml_connections(nodes))
+
+def format_connection(conn):
+    """Format a single connection for display."""
+    return (f"From: {conn['source_component']} ({conn['source_port']} - {conn['source_port_type']}) → "
+            f"To: {conn['target_component']} ({conn['target_port']} - {conn['target_port_type']})")
+
 def format_connections(connections):
     """Format the connections for better readability."""
-    return [
-        f"From: {conn['source_component']} ({conn['source_port']} - {conn['source_port_type']}) → "
-        f"To: {conn['target_component']} ({conn['target_port']} - {conn['target_port_type']})"
-        for conn in connections
-    ]
+    return [format_connection(conn) for conn in connections]
+
+def stream_hwml_connections(xml_file_path, out=sys.stdout):
+    """
+    Write the connections of an HWML file to out as they are generated.
+    
+    Returns:
+        int: the number of connections written
+    """
+    from generator.saml_parser import parse_hwml_file
+    
+    count = 0
+    for count, connection in enumerate(iter_hwml_connections(parse_hwml_file(xml_file_path)), 1):
+        out.write(f"{count}. {format_connection(connection)}\n")
+    return count
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python parse_connections_fixed.py <path_to_xml_file>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description='Print the connections in a SAML or HWML file')
+    parser.add_argument('xml_file', help='Path to the .capssaml or .capshwml file')
+    parser.add_argument('--stream', action='store_true',
+                        help='Print HWML connections as they are generated instead of collecting them first')
+    args = parser.parse_args()
     
-    xml_file_path = sys.argv[1]
+    xml_file_path = args.xml_file
     if not os.path.exists(xml_file_path):
         print(f"Error: File {xml_file_path} does not exist")
         sys.exit(1)
     
+    if args.stream:
+        from generator.model_ir import detect_file_type
+        
+        if detect_file_type(xml_file_path) == 'HWML':
+            count = stream_hwml_connections(xml_file_path)
+            print(f"Found {count} connections")
+            return
+    
     connections = parse_connections(xml_file_path)
     if connections:
         print(f"Found {len(connections)} connections:")
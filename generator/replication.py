@@ -0,0 +1,174 @@
+import io
+import os
+import sys
+import math
+import time
+import random
+import hashlib
+import importlib
+import contextlib
+from statistics import NormalDist, mean, stdev
+from concurrent.futures import ProcessPoolExecutor
+
+# Two-sided Student t quantiles by confidence level and degrees of freedom
+T_QUANTILES = {
+    0.90: {1: 6.314, 2: 2.920, 3: 2.353, 4: 2.132, 5: 2.015, 6: 1.943, 7: 1.895, 8: 1.860, 9: 1.833, 10: 1.812,
+           11: 1.796, 12: 1.782, 13: 1.771, 14: 1.761, 15: 1.753, 16: 1.746, 17: 1.740, 18: 1.734, 19: 1.729,
+           20: 1.725, 21: 1.721, 22: 1.717, 23: 1.714, 24: 1.711, 25: 1.708, 26: 1.706, 27: 1.703, 28: 1.701,
+           29: 1.699, 30: 1.697, 40: 1.684, 60: 1.671, 120: 1.658},
+    0.95: {1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306, 9: 2.262, 10: 2.228,
+           11: 2.201, 12: 2.179, 13: 2.160, 14: 2.145, 15: 2.131, 16: 2.120, 17: 2.110, 18: 2.101, 19: 2.093,
+           20: 2.086, 21: 2.080, 22: 2.074, 23: 2.069, 24: 2.064, 25: 2.060, 26: 2.056, 27: 2.052, 28: 2.048,
+           29: 2.045, 30: 2.042, 40: 2.021, 60: 2.000, 120: 1.980},
+    0.99: {1: 63.657, 2: 9.925, 3: 5.841, 4: 4.604, 5: 4.032, 6: 3.707, 7: 3.499, 8: 3.355, 9: 3.250, 10: 3.169,
+           11: 3.106, 12: 3.055, 13: 3.012, 14: 2.977, 15: 2.947, 16: 2.921, 17: 2.898, 18: 2.878, 19: 2.861,
+           20: 2.845, 21: 2.831, 22: 2.819, 23: 2.807, 24: 2.797, 25: 2.787, 26: 2.779, 27: 2.771, 28: 2.763,
+           29: 2.756, 30: 2.750, 40: 2.704, 60: 2.660, 120: 2.617},
+}
+
+CONFIDENCE_LEVELS = tuple(T_QUANTILES)
+
+# Generated model directory this process imports the model modules from
+_loaded = {'model_dir': None}
+
+# Summary metrics of every replication, in report order
+METRICS = ('transitions', 'internal', 'external', 'confluent', 'sink_messages', 'last_time', 'wall_time')
+
+def replication_seeds(base_seed, count):
+    """
+    Return count seeds for independent replications.
+    
+    Seed i is derived by hashing (base_seed, i), so the seeds are the same
+    on every run and machine, and adding replications keeps the seeds of
+    the existing ones.
+    """
+    return [int.from_bytes(hashlib.sha256(f"{base_seed}:{index}".encode()).digest()[:8], 'big')
+            for index in range(count)]
+
+def t_quantile(confidence, df):
+    """Return the two-sided Student t quantile for a confidence level in CONFIDENCE_LEVELS."""
+    if confidence not in T_QUANTILES:
+        raise ValueError(f"Unsupported confidence level: {confidence} (use one of {CONFIDENCE_LEVELS})")
+    table = T_QUANTILES[confidence]
+    if df in table:
+        return table[df]
+    if df > max(table):
+        return NormalDist().inv_cdf(0.5 + confidence / 2)
+    # Between tabulated degrees of freedom the quantile is close to linear in 1/df
+    lower = max(d for d in table if d < df)
+    upper = min(d for d in table if d > df)
+    weight = (1 / lower - 1 / df) / (1 / lower - 1 / upper)
+    return table[lower] + weight * (table[upper] - table[lower])
+
+def confidence_interval(values, confidence=0.95):
+    """
+    Return (mean, half width) of the t-based confidence interval of values.
+    
+    The half width is NaN with fewer than two values.
+    """
+    values = list(values)
+    if len(values) < 2:
+        return (values[0] if values else math.nan), math.nan
+    return mean(values), t_quantile(confidence, len(values) - 1) * stdev(values) / math.sqrt(len(values))
+
+def load_model(model_dir):
+    """
+    Import the model module of a generated model directory.
+    
+    The modules of the model directory loaded before, if another one, are
+    dropped first, so one process can load several generated models in turn.
+    """
+    model_dir = os.path.abspath(model_dir)
+    previous = _loaded['model_dir']
+    if previous != model_dir:
+        if previous is not None:
+            for name, module in list(sys.modules.items()):
+                if os.path.dirname(os.path.abspath(getattr(module, '__file__', None) or os.sep)) == previous:
+                    del sys.modules[name]
+            if previous in sys.path:
+                sys.path.remove(previous)
+        sys.path.insert(0, model_dir)
+        importlib.invalidate_caches()
+        _loaded['model_dir'] = model_dir
+    return importlib.import_module('model')
+
+def atomic_models(model):
+    """Yield the atomic models of a coupled model, at any depth."""
+    for submodel in getattr(model, 'component_set', ()):
+        if hasattr(submodel, 'component_set'):
+            yield from atomic_models(submodel)
+        else:
+            yield submodel
+
+def run_replication(model_dir, seed, until=3600, formalism='classic'):
+    """
+    Simulate one replication of a generated model (run in a worker process).
+    
+    The global random module, which the generated sensors draw from, is
+    seeded with seed before the model is built. The simulation counts its
+    transitions with the generated event recorder. The per-event prints of
+    the generated components are turned off, and any other output of the
+    model is discarded.
+    
+    Returns:
+        dict: the seed and every metric in METRICS
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        module = load_model(model_dir)
+        from pypdevs.simulator import Simulator
+        from recorder import EventRecorder
+        
+        random.seed(seed)
+        system = getattr(module, 'SystemModel', None) or getattr(module, 'GeneratedModel')
+        system = system()
+        for submodel in atomic_models(system):
+            submodel.trace_events = False
+        sim = Simulator(system)
+        if formalism == 'classic':
+            sim.setClassicDEVS()
+        sim.setCustomTracer("recorder", "EventRecorder", [])
+        sim.setTerminationTime(until)
+        
+        start = time.perf_counter()
+        sim.simulate()
+        wall_time = time.perf_counter() - start
+    
+    recorder = EventRecorder.latest
+    transitions = recorder.transitions()
+    sinks = [submodel.model_id for submodel in atomic_models(system) if submodel.name == 'Sink']
+    return {
+        'seed': seed,
+        'transitions': sum(transitions.values()),
+        **transitions,
+        'sink_messages': sum(recorder.external.get(model_id, 0) for model_id in sinks),
+        'last_time': recorder.last_time,
+        'wall_time': wall_time,
+    }
+
+def run_replications(model_dir, replications, base_seed=0, until=3600, formalism='classic', jobs=None):
+    """
+    Run independent replications of a generated model in a process pool.
+    
+    Args:
+        model_dir: directory of the generated model (with model.py and recorder.py)
+        replications: number of replications
+        base_seed: seed the replication seeds are derived from (see replication_seeds)
+        until: simulation time every replication stops at
+        formalism: 'classic' or 'parallel' DEVS
+        jobs: worker processes (default: CPU count); 1 runs in this process
+    
+    Returns:
+        list: the result of run_replication for every replication, in seed order
+    """
+    seeds = replication_seeds(base_seed, replications)
+    jobs = max(1, min(jobs or os.cpu_count() or 1, replications))
+    if jobs == 1:
+        return [run_replication(model_dir, seed, until, formalism) for seed in seeds]
+    
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(run_replication, [model_dir] * len(seeds), seeds,
+                                 [until] * len(seeds), [formalism] * len(seeds)))
+
+def summarize(results, confidence=0.95, metrics=METRICS):
+    """Return {metric: (mean, half width)} of the confidence intervals over the replications."""
+    return {metric: confidence_interval((result[metric] for result in results), confidence) for metric in metrics}
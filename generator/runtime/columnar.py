@@ -0,0 +1,160 @@
+import json
+import math
+import numpy as np
+
+# File layout: MAGIC, then chunks of (uint32 count, then every column of the count records)
+MAGIC = b"PDEVSCOL"
+
+# Column names and types, in file order
+COLUMNS = (
+    ('time', np.float64),
+    ('model', np.int32),
+    ('port', np.int32),
+    ('kind', np.int8),
+    ('value', np.float64),
+)
+
+# Transition kinds in the 'kind' column
+KINDS = ('init', 'internal', 'external', 'confluent')
+
+def numeric_value(message):
+    """
+    Return the number a message carries, or NaN if it has none.
+
+    Numbers are taken as they are, readings by their value, and oneM2M
+    messages by the last field of their "con" content.
+    """
+    if isinstance(message, (int, float)):
+        return float(message)
+    value = getattr(message, 'value', None)
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(message, dict):
+        if 'm2m:cin' in message:
+            return numeric_value(message['m2m:cin'].get('con'))
+        for key in ('value', 'original', 'con'):
+            if key in message:
+                return numeric_value(message[key])
+    if isinstance(message, str):
+        try:
+            return float(message.rsplit(',', 1)[-1])
+        except ValueError:
+            pass
+    return math.nan
+
+class ColumnarTracer:
+    """
+    PythonPDEVS tracer that writes typed event records to a columnar file.
+
+    Registered with Simulator.setCustomTracer("columnar", "ColumnarTracer", [filename]),
+    it appends one record per message of every transition (one with port
+    -1 for a transition without messages) to preallocated arrays, and
+    writes the arrays out in chunks of chunk_size records. A record holds
+    the simulation time, the model and port ids, the transition kind (an
+    index into KINDS) and the numeric value of the message (see
+    numeric_value). The model and port names are written to filename +
+    ".json" when the simulation ends; read_trace reads both back.
+    """
+
+    def __init__(self, uid, server, filename="trace.col", chunk_size=65536):
+        self.uid = uid
+        self.server = server
+        self.filename = filename
+        self.chunk_size = chunk_size
+        self.columns = [np.empty(chunk_size, dtype=dtype) for _, dtype in COLUMNS]
+        self.count = 0
+        self.records = 0
+        self.names = {}
+        self.ports = {}
+        self.file = None
+
+    def startTracer(self, recover):
+        self.file = open(self.filename, 'ab' if recover else 'wb')
+        if not recover:
+            self.file.write(MAGIC)
+
+    def stopTracer(self):
+        self.flush()
+        self.file.close()
+        with open(self.filename + ".json", 'w') as f:
+            json.dump({'models': self.names, 'ports': self.ports, 'kinds': KINDS, 'records': self.records}, f)
+
+    def flush(self):
+        """Write the buffered records out as one chunk."""
+        if self.count:
+            self.file.write(np.uint32(self.count).tobytes())
+            for column in self.columns:
+                column[:self.count].tofile(self.file)
+            self.records += self.count
+            self.count = 0
+
+    def append(self, time, model_id, port_id, kind, value):
+        if self.count == self.chunk_size:
+            self.flush()
+        times, models, ports, kinds, values = self.columns
+        index = self.count
+        times[index] = time
+        models[index] = model_id
+        ports[index] = port_id
+        kinds[index] = kind
+        values[index] = value
+        self.count = index + 1
+
+    def record(self, aDEVS, kind, messages):
+        time = aDEVS.time_last[0]
+        if not messages:
+            self.append(time, aDEVS.model_id, -1, kind, math.nan)
+            return
+        for port, message in messages.items():
+            # Parallel DEVS passes a bag of messages per input port
+            for item in (message if isinstance(message, list) else (message,)):
+                self.append(time, aDEVS.model_id, port.port_id, kind, numeric_value(item))
+
+    def traceInit(self, aDEVS, t):
+        self.names[aDEVS.model_id] = aDEVS.getModelFullName()
+        self.ports[aDEVS.model_id] = {port.port_id: port.name for port in aDEVS.IPorts + aDEVS.OPorts}
+        self.append(t[0], aDEVS.model_id, -1, 0, math.nan)
+
+    def traceInternal(self, aDEVS):
+        self.record(aDEVS, 1, aDEVS.my_output)
+
+    def traceExternal(self, aDEVS):
+        self.record(aDEVS, 2, aDEVS.my_input)
+
+    def traceConfluent(self, aDEVS):
+        self.record(aDEVS, 3, aDEVS.my_output)
+
+    def traceUser(self, time, aDEVS, variable, value):
+        pass
+
+def read_trace(filename="trace.col"):
+    """
+    Read a trace written by ColumnarTracer.
+
+    Returns:
+        dict: every column as an array, plus 'models' (model id to name),
+            'ports' (model id to port id to name) and 'kinds'
+    """
+    with open(filename, 'rb') as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{filename} is not a columnar trace")
+
+    chunks = {name: [] for name, _ in COLUMNS}
+    offset = len(MAGIC)
+    while offset < len(data):
+        count = int(np.frombuffer(data, np.uint32, 1, offset)[0])
+        offset += 4
+        for name, dtype in COLUMNS:
+            chunks[name].append(np.frombuffer(data, dtype, count, offset))
+            offset += count * np.dtype(dtype).itemsize
+
+    trace = {name: np.concatenate(parts) if parts else np.empty(0, dtype)
+             for (name, dtype), parts in zip(COLUMNS, chunks.values())}
+    with open(filename + ".json") as f:
+        names = json.load(f)
+    trace['models'] = {int(model_id): name for model_id, name in names['models'].items()}
+    trace['ports'] = {int(model_id): {int(port_id): port for port_id, port in ports.items()}
+                      for model_id, ports in names['ports'].items()}
+    trace['kinds'] = tuple(names['kinds'])
+    return trace
@@ -0,0 +1,74 @@
+import random
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Kinds of values a stream generates, with the array typecode they are stored as
+STREAM_KINDS = {'uniform': 'd', 'int': 'q', 'bool': 'b'}
+
+class RandomStream:
+    """
+    One sensor's random values, generated in blocks and handed out one at a time.
+
+    kind is 'uniform' (floats in [low, high)), 'int' (integers in [low,
+    high]) or 'bool' (0 or 1). With NumPy a block of values costs one call
+    to the stream's own generator; without it they are drawn from a
+    random.Random. Blocks are kept in an array of 8 bytes per value at most,
+    start at 16 values and double up to `block`, so a sensor that rarely
+    reads never holds many. The generator is only created on the first
+    draw.
+
+    seed defaults to bits drawn from the random module, so seeding random
+    before the model is built reproduces every stream.
+    """
+    __slots__ = ('kind', 'low', 'high', 'block', 'size', 'seed', 'rng', 'values')
+
+    def __init__(self, kind='uniform', low=0, high=100, seed=None, block=1024):
+        if kind not in STREAM_KINDS:
+            raise ValueError(f"Unknown random stream kind: {kind}")
+        self.kind = kind
+        self.low = low
+        self.high = high
+        self.block = block
+        self.size = min(16, block)
+        self.seed = random.getrandbits(64) if seed is None else seed
+        self.rng = None
+        self.values = iter(())
+
+    def next(self):
+        """Return the next value of the stream."""
+        value = next(self.values, None)
+        if value is None:
+            self.values = iter(self.draw())
+            value = next(self.values)
+        return value
+
+    def draw(self):
+        """Generate the next block of values."""
+        size = self.size
+        self.size = min(size * 2, self.block)
+        values = array(STREAM_KINDS[self.kind])
+        if np is not None:
+            if self.rng is None:
+                self.rng = np.random.default_rng(self.seed)
+            if self.kind == 'uniform':
+                block = self.rng.uniform(self.low, self.high, size)
+            elif self.kind == 'int':
+                block = self.rng.integers(self.low, self.high, size, dtype=np.int64, endpoint=True)
+            else:
+                block = self.rng.integers(0, 2, size, dtype=np.int8)
+            values.frombytes(block.tobytes())
+            return values
+
+        if self.rng is None:
+            self.rng = random.Random(self.seed)
+        if self.kind == 'uniform':
+            values.extend(self.rng.uniform(self.low, self.high) for _ in range(size))
+        elif self.kind == 'int':
+            values.extend(self.rng.randint(self.low, self.high) for _ in range(size))
+        else:
+            values.extend(self.rng.getrandbits(1) for _ in range(size))
+        return values
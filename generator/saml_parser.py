@@ -1,143 +1,302 @@
-import xml.etree.ElementTree as ET
-import re
+from . import xml_backend
 from .debug_utils import debug_print
 
-def parse_saml_file(file_path):
+XSI_TYPE = '{http://www.w3.org/2001/XMLSchema-instance}type'
+
+def parse_saml_file(file_path, streaming=False, references=None):
     """
     Parse a SAML file and extract component and connection information.
     
     Args:
         file_path: Path to the SAML file
+        streaming: Use the single-pass iterparse reader (see parse_saml_file_streaming)
+        references: ReferenceIndex to fill with every addressable element (optional)
         
     Returns:
         tuple: (components, connections)
     """
+    if streaming:
+        return parse_saml_file_streaming(file_path, references)
+    
     debug_print(f"Parsing SAML file: {file_path}")
     
     try:
         # Parse XML tree
-        tree = ET.parse(file_path)
-        root = tree.getroot()
-        
-        # Extract namespace from root tag
-        namespace_match = re.match(r'{(.*)}', root.tag)
-        namespace = namespace_match.group(1) if namespace_match else None
+        root = xml_backend.parse(file_path)
         
-        components = []
-        connections = []
-        component_map = {}  # To store component ID to name mapping
-        
-        # Function to add namespace to tag if needed
-        def tag_with_ns(tag):
-            return f"{{{namespace}}}{tag}" if namespace else tag
+        collector = SAMLCollector(references)
+        for element in xml_backend.find(root, 'saelements'):
+            collector.add_element(element)
         
-        # Process all SAElements to find components and connections
-        for idx, element in enumerate(root.findall('.//*[@xsi:type]', 
-                                     {'xsi': 'http://www.w3.org/2001/XMLSchema-instance'})):
-            element_type = element.get('{http://www.w3.org/2001/XMLSchema-instance}type')
-            
-            # Handle components
-            if element_type == 'components:Component':
-                component = parse_component(element, idx)
-                components.append(component)
-                component_map[idx] = component['name']
-                debug_print(f"Found component: {component['name']}")
+        return collector.finish()
             
-            # Handle connections
-            elif element_type == 'components:Connection':
-                connection = {
-                    'source_component': '',
-                    'source_port': 0,
-                    'source_port_type': 'output',
-                    'target_component': '',
-                    'target_port': 0,
-                    'target_port_type': 'input'
-                }
-                connections.append(connection)
-        
-        # Process connections after all components are known
-        connection_idx = 0
-        for element in root.findall('.//*[@xsi:type="components:Connection"]', 
-                                   {'xsi': 'http://www.w3.org/2001/XMLSchema-instance'}):
-            if connection_idx < len(connections):
-                source_ref = element.get('source')
-                target_ref = element.get('target')
-                
-                # Extract component and port information from refs
-                if source_ref and target_ref:
-                    source_comp_idx, source_port_idx = extract_ref_info(source_ref)
-                    target_comp_idx, target_port_idx = extract_ref_info(target_ref)
-                    
-                    # Set connection information
-                    if source_comp_idx in component_map and target_comp_idx in component_map:
-                        connections[connection_idx]['source_component'] = component_map[source_comp_idx]
-                        connections[connection_idx]['source_port'] = source_port_idx
-                        connections[connection_idx]['target_component'] = component_map[target_comp_idx]
-                        connections[connection_idx]['target_port'] = target_port_idx
-                        
-                        debug_print(f"Found connection: {connections[connection_idx]['source_component']} -> {connections[connection_idx]['target_component']}")
-                
-                connection_idx += 1
+    except Exception as e:
+        debug_print(f"Error parsing SAML file: {str(e)}")
+        return [], []
+
+def parse_saml_file_streaming(file_path, references=None):
+    """
+    Parse a SAML file in a single pass using ElementTree.iterparse.
+    
+    Each top-level SAElements entry is turned into a component or a pending
+    connection as soon as its end tag is read, and is then cleared, so peak
+    memory does not grow with the number of elements in the file.
+    
+    Args:
+        file_path: Path to the SAML file
+        references: ReferenceIndex to fill with every addressable element (optional)
         
-        # Fix connections with missing information
-        connections = [conn for conn in connections if conn['source_component'] and conn['target_component']]
+    Returns:
+        tuple: (components, connections)
+    """
+    debug_print(f"Streaming SAML file: {file_path}")
+    
+    try:
+        collector = SAMLCollector(references)
+        root = None
+        depth = 0
         
-        # Assign component types based on behavior and naming conventions
-        for component in components:
-            infer_component_type(component)
+        for event, element in xml_backend.iterparse(file_path, events=('start', 'end')):
+            if event == 'start':
+                if root is None:
+                    root = element
+                depth += 1
+                continue
+            
+            depth -= 1
+            if depth != 1:
+                continue
             
-        return components, connections
+            # A direct child of the root element is complete
+            if element.tag == 'SAElements':
+                collector.add_element(element)
             
+            # Release the handled subtree and the root's reference to it
+            element.clear()
+            root.clear()
+        
+        return collector.finish()
+    
     except Exception as e:
         debug_print(f"Error parsing SAML file: {str(e)}")
         return [], []
 
-def parse_component(element, idx):
+class ReferenceIndex:
+    """
+    Maps EMF reference paths to the parsed records they point at.
+    
+    Paths such as "//@SAElements.3/@modes.0/@behaviouralElements.5" are
+    registered while the file is parsed, so any reference found in an
+    attribute (incoming, outgoing, source, target, toMessagePorts, ...)
+    resolves with a single dictionary lookup.
+    """
+    
+    def __init__(self):
+        self.elements = {}
+    
+    def __len__(self):
+        return len(self.elements)
+    
+    def __contains__(self, ref):
+        return ref in self.elements
+    
+    def add(self, path, record):
+        """Register the record addressed by path."""
+        self.elements[path] = record
+    
+    def resolve(self, ref):
+        """Return the record for a single reference, or None if it is unknown."""
+        return self.elements.get(ref)
+    
+    def resolve_all(self, refs):
+        """Resolve a space-separated reference list, skipping unknown entries."""
+        if not refs:
+            return []
+        return [self.elements[ref] for ref in refs.split() if ref in self.elements]
+
+class SAMLCollector:
+    """
+    Accumulates components and connections from top-level SAElements.
+    
+    Connection endpoints are looked up in the reference index once all
+    elements have been seen, so connections may refer to components that
+    appear later in the file.
+    """
+    
+    def __init__(self, references=None):
+        self.components = []
+        self.references = references if references is not None else ReferenceIndex()
+        self.pending_connections = []  # (source_ref, target_ref)
+        self.element_idx = 0
+    
+    def add_element(self, element):
+        """Handle a single SAElements element."""
+        idx = self.element_idx
+        self.element_idx += 1
+        element_type = element.get(XSI_TYPE, '')
+        
+        # Handle components
+        if element_type == 'components:Component':
+            component = parse_component(element, idx, self.references)
+            self.components.append(component)
+            debug_print(f"Found component: {component['name']}")
+        
+        # Handle connections
+        elif element_type == 'components:Connection':
+            source_ref = element.get('source')
+            target_ref = element.get('target')
+            if source_ref and target_ref:
+                self.pending_connections.append((source_ref, target_ref))
+    
+    def finish(self):
+        """Resolve connections and infer component types."""
+        connections = []
+        for source_ref, target_ref in self.pending_connections:
+            source = self.references.resolve(source_ref)
+            target = self.references.resolve(target_ref)
+            if not source or not target or 'port_idx' not in source or 'port_idx' not in target:
+                debug_print(f"Skipping connection with unknown endpoints: {source_ref} -> {target_ref}")
+                continue
+            
+            connections.append({
+                'source_component': source['component']['name'],
+                'source_port': source['port_idx'],
+                'source_port_type': source['type'],
+                'target_component': target['component']['name'],
+                'target_port': target['port_idx'],
+                'target_port_type': target['type']
+            })
+            debug_print(f"Found connection: {source['component']['name']} -> {target['component']['name']}")
+        
+        # Assign component types based on behavior and naming conventions
+        for component in self.components:
+            infer_component_type(component)
+        
+        return self.components, connections
+
+def element_attributes(element):
+    """Return the attributes of an element other than its name and xsi:type."""
+    return {key: value for key, value in element.attrib.items() if key not in (XSI_TYPE, 'name')}
+
+def parse_component(element, idx, references=None):
     """Parse a component element and extract information."""
+    if references is None:
+        references = ReferenceIndex()
+    
+    path = f"//@SAElements.{idx}"
     component = {
         'name': element.get('name', f"Component_{idx}"),
         'type': 'generic',  # Will be inferred later
+        'path': path,
         'in_ports': [],
         'out_ports': [],
-        'data_interval': 5.0  # Default data interval for sensors
+        'behaviors': [],
+        'modes': [],
+        'application_data': [],
+        'data_interval': 5.0,  # Default data interval for sensors
+        'source': 'saml'
     }
+    references.add(path, component)
     
-    # Process ports
-    port_idx = 0
-    for port in element.findall('.//ports'):
-        port_type = port.get('{http://www.w3.org/2001/XMLSchema-instance}type', '')
+    # Process ports, modes and application data in document order, keeping a
+    # per-tag counter so each child gets its EMF index
+    port_idx = mode_idx = data_idx = 0
+    has_sense = has_actuate = has_server = has_choice = has_timer = False
+    timer_period = None
+    for child in element:
+        if child.tag == 'ports':
+            port_type = child.get(XSI_TYPE, '')
+            
+            if 'InMessagePort' in port_type:
+                component['in_ports'].append(port_idx)
+            elif 'OutMessagePort' in port_type:
+                component['out_ports'].append(port_idx)
+            
+            references.add(f"{path}/@ports.{port_idx}", {
+                'component': component,
+                'port_idx': port_idx,
+                'type': 'input' if 'InMessagePort' in port_type else 'output'
+            })
+            port_idx += 1
         
-        if 'InMessagePort' in port_type:
-            component['in_ports'].append(port_idx)
-        elif 'OutMessagePort' in port_type:
-            component['out_ports'].append(port_idx)
+        elif child.tag == 'applicationData':
+            data_info = {
+                'name': child.get('dataName', ''),
+                'type': child.get('type', ''),
+                'value': child.get('value'),
+                'path': f"{path}/@applicationData.{data_idx}"
+            }
+            component['application_data'].append(data_info)
+            references.add(data_info['path'], data_info)
+            data_idx += 1
         
-        port_idx += 1
-    
-    # Look for behaviors that might indicate component type
-    has_sense = any('Sense' in e.get('{http://www.w3.org/2001/XMLSchema-instance}type', '') 
-                  for e in element.findall('.//behaviouralElements'))
-    has_actuate = any('Actuate' in e.get('{http://www.w3.org/2001/XMLSchema-instance}type', '') 
-                     for e in element.findall('.//behaviouralElements'))
-    has_server = any('Server' in e.get('{http://www.w3.org/2001/XMLSchema-instance}type', '') 
-                    for e in element.findall('.//behaviouralElements'))
-    has_choice = any('Choice' in e.get('{http://www.w3.org/2001/XMLSchema-instance}type', '') 
-                    for e in element.findall('.//behaviouralElements'))
-    
-    # Look for timers which might indicate a sensor
-    has_timer = any('Timer' in e.get('name', '') for e in element.findall('.//behaviouralElements'))
+        elif child.tag == 'modes':
+            mode_path = f"{path}/@modes.{mode_idx}"
+            mode_info = {
+                'name': child.get('name', ''),
+                'type': child.get(XSI_TYPE, '').split(':')[-1],
+                'path': mode_path,
+                'behaviors': [],
+                'entries': [],
+                'exits': []
+            }
+            component['modes'].append(mode_info)
+            references.add(mode_path, mode_info)
+            mode_idx += 1
+            
+            # Record behaviors, entries and exits, and look for behaviors
+            # that might indicate component type, in a single scan
+            behavior_idx = 0
+            for mode_child in child:
+                if mode_child.tag in ('entries', 'exits'):
+                    points = mode_info[mode_child.tag]
+                    point_info = {
+                        'kind': 'entry' if mode_child.tag == 'entries' else 'exit',
+                        'path': f"{mode_path}/@{mode_child.tag}.{len(points)}",
+                        'attributes': element_attributes(mode_child)
+                    }
+                    points.append(point_info)
+                    references.add(point_info['path'], point_info)
+                    continue
+                
+                if mode_child.tag != 'behaviouralElements':
+                    continue
+                
+                behavior_type = mode_child.get(XSI_TYPE, '')
+                behavior_name = mode_child.get('name', '')
+                behavior_info = {
+                    'type': behavior_type.split(':')[-1],
+                    'name': behavior_name,
+                    'path': f"{mode_path}/@behaviouralElements.{behavior_idx}",
+                    'attributes': element_attributes(mode_child)
+                }
+                references.add(behavior_info['path'], behavior_info)
+                behavior_idx += 1
+                if behavior_type:
+                    mode_info['behaviors'].append(behavior_info)
+                    component['behaviors'].append(behavior_info)
+                
+                has_sense = has_sense or 'Sense' in behavior_type
+                has_actuate = has_actuate or 'Actuate' in behavior_type
+                has_server = has_server or 'Server' in behavior_type
+                has_choice = has_choice or 'Choice' in behavior_type
+                
+                # Look for timers which might indicate a sensor
+                has_timer = has_timer or 'Timer' in behavior_name
+                
+                if behavior_type == 'components:StartTimer':
+                    period = mode_child.get('period')
+                    if period and period.isdigit():
+                        timer_period = period
     
     # Initial type determination based on behavior
     if has_sense or has_timer:
         component['type'] = 'sensor'
         
-        # Try to determine sensor data interval from timer period
-        for timer in element.findall('.//behaviouralElements[@xsi:type="components:StartTimer"]', 
-                                    {'xsi': 'http://www.w3.org/2001/XMLSchema-instance'}):
-            period = timer.get('period')
-            if period and period.isdigit():
-                # Convert ms to seconds
-                component['data_interval'] = int(period) / 1000.0
+        # Use the sensor data interval from the timer period
+        if timer_period is not None:
+            # Convert ms to seconds
+            component['data_interval'] = int(timer_period) / 1000.0
     elif has_actuate:
         component['type'] = 'actuator'
     elif has_choice:
@@ -147,16 +306,66 @@ def parse_component(element, idx):
     
     return component
 
-def extract_ref_info(ref):
-    """Extract component index and port index from a reference string."""
-    # Example ref: "//@SAElements.0/@ports.1"
-    comp_match = re.search(r'@SAElements\.(\d+)', ref)
-    port_match = re.search(r'@ports\.(\d+)', ref)
+def parse_hwml_file(file_path):
+    """
+    Parse an HWML file and extract its hardware nodes.
+    
+    Args:
+        file_path: Path to the HWML file
+        
+    Returns:
+        list: node dicts with name, protocol, routing, position, range
+            and hw_details (position and range are None when the node has
+            no x/y[/z] or radioRange attributes)
+    """
+    debug_print(f"Parsing HWML file: {file_path}")
     
-    comp_idx = int(comp_match.group(1)) if comp_match else -1
-    port_idx = int(port_match.group(1)) if port_match else 0
+    try:
+        root = xml_backend.parse(file_path)
+        
+        nodes = []
+        for node in xml_backend.find(root, 'hwml_nodes'):
+            node_info = {
+                'name': node.get('name'),
+                'protocol': node.get('macProtocol', 'Unknown'),
+                'routing': node.get('routingProtocol', 'Unknown'),
+                'position': parse_position(node),
+                'range': parse_float(node.get('radioRange', node.get('range'))),
+                'hw_details': {}
+            }
+            
+            # Get hardware details
+            hw_details = node_info['hw_details']
+            for processor in xml_backend.find(node, 'processors'):
+                hw_details['processor'] = processor.get('name', 'Unknown')
+                hw_details['frequency'] = processor.get('frequency', 'Unknown')
+            
+            for memory in xml_backend.find(node, 'memory'):
+                hw_details['memory'] = memory.get('name', 'Unknown')
+                hw_details['memory_size'] = memory.get('size', 'Unknown')
+            
+            debug_print(f"Found node: {node_info['name']}, Protocol: {node_info['protocol']}, Routing: {node_info['routing']}")
+            nodes.append(node_info)
+        
+        return nodes
     
-    return comp_idx, port_idx
+    except Exception as e:
+        debug_print(f"Error parsing HWML file: {str(e)}")
+        return []
+
+def parse_float(value):
+    """Return value as a float, or None if it is missing or not a number."""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def parse_position(node):
+    """Return the (x, y[, z]) coordinates of an HWML node, or None if it has none."""
+    coords = [parse_float(node.get(axis)) for axis in ('x', 'y', 'z')]
+    if coords[0] is None or coords[1] is None:
+        return None
+    return tuple(coords) if coords[2] is not None else tuple(coords[:2])
 
 def infer_component_type(component):
     """Use naming conventions and port configuration to infer component type."""
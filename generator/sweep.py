@@ -0,0 +1,236 @@
+import os
+import json
+import random
+import tempfile
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from . import debug_utils
+from .debug_utils import debug_print
+from .manifest import fingerprint, generator_fingerprint
+from .model_ir import ParsedModel
+from .file_generators import generate_pydevs_from_saml
+from .replication import METRICS, run_replications, summarize
+
+# Bump whenever a cached point would no longer match what run_point returns
+SWEEP_VERSION = 1
+
+# Component types whose simulated_delay can be swept (simulated_delay.<type>)
+DELAY_TYPES = ('actuator', 'controller', 'interface')
+
+PARAMETERS = ('data_interval', 'data_interval_scale') + tuple(f"simulated_delay.{kind}" for kind in DELAY_TYPES)
+
+METHODS = ('grid', 'lhs')
+
+def load_spec(spec_file):
+    """
+    Read and check a sweep specification.
+    
+    A specification is a JSON object with a method ('grid' or 'lhs') and
+    parameters mapping names from PARAMETERS to their values: a list of
+    values for a grid, which runs every combination, or a [low, high] range
+    for a Latin hypercube, which draws `samples` points (default 10) from
+    `seed` (default 0). For example:
+        
+        {"method": "grid",
+         "parameters": {"data_interval_scale": [0.1, 1.0],
+                        "simulated_delay.interface": [1.0, 2.0]}}
+    
+    Raises:
+        ValueError: if the specification is not valid
+    """
+    with open(spec_file, 'r') as f:
+        spec = json.load(f)
+    
+    method = spec.get('method', 'grid')
+    if method not in METHODS:
+        raise ValueError(f"Unknown sweep method: {method} (use one of {METHODS})")
+    parameters = spec.get('parameters') or {}
+    if not parameters:
+        raise ValueError("The sweep specification has no parameters")
+    for name, values in parameters.items():
+        if name not in PARAMETERS:
+            raise ValueError(f"Unknown sweep parameter: {name} (use one of {PARAMETERS})")
+        if not isinstance(values, list) or not values or not all(isinstance(v, (int, float)) for v in values):
+            raise ValueError(f"Parameter {name} needs a list of numbers")
+        if method == 'lhs' and (len(values) != 2 or values[0] > values[1]):
+            raise ValueError(f"Parameter {name} needs a [low, high] range for a Latin hypercube")
+        if min(values) <= 0 and name.startswith('data_interval'):
+            raise ValueError(f"Parameter {name} must be positive")
+    if method == 'lhs' and int(spec.get('samples', 10)) < 1:
+        raise ValueError("A Latin hypercube needs at least one sample")
+    return spec
+
+def grid_points(parameters):
+    """Return a point for every combination of the parameter values."""
+    names = sorted(parameters)
+    return [dict(zip(names, values)) for values in itertools.product(*(parameters[name] for name in names))]
+
+def latin_hypercube(parameters, samples, seed=0):
+    """
+    Return samples points drawn from the [low, high] range of every parameter.
+    
+    Each range is cut into samples strata of equal width and every stratum
+    is used by exactly one point, so even a few points cover every range.
+    """
+    rng = random.Random(seed)
+    names = sorted(parameters)
+    columns = []
+    for name in names:
+        low, high = parameters[name]
+        strata = list(range(samples))
+        rng.shuffle(strata)
+        columns.append([low + (high - low) * (stratum + rng.random()) / samples for stratum in strata])
+    return [dict(zip(names, values)) for values in zip(*columns)]
+
+def sweep_points(spec):
+    """Return the points of a sweep specification (see load_spec), in run order."""
+    if spec.get('method', 'grid') == 'lhs':
+        return latin_hypercube(spec['parameters'], int(spec.get('samples', 10)), spec.get('seed', 0))
+    return grid_points(spec['parameters'])
+
+def apply_parameters(components, point):
+    """
+    Return the components and the simulated delays of a sweep point.
+    
+    The components are copied, so the parsed model can be shared by every
+    point.
+    
+    Returns:
+        tuple: (components, simulated_delays for generate_pydevs_from_saml)
+    """
+    swept = []
+    for component in components:
+        if component['type'] == 'sensor':
+            component = dict(component)
+            if 'data_interval' in point:
+                component['data_interval'] = point['data_interval']
+            if 'data_interval_scale' in point:
+                component['data_interval'] = component.get('data_interval', 5.0) * point['data_interval_scale']
+        swept.append(component)
+    
+    simulated_delays = {kind: point[f"simulated_delay.{kind}"] for kind in DELAY_TYPES
+                        if f"simulated_delay.{kind}" in point}
+    return swept, simulated_delays
+
+def point_key(model_key, point, settings):
+    """Return the cache key of a point of a model run with settings, also changing with the generator."""
+    return fingerprint([SWEEP_VERSION, generator_fingerprint(), model_key, point, settings])
+
+def run_point(model, point, model_dir, settings):
+    """
+    Generate the model of one sweep point and simulate it (run in a worker process).
+    
+    The model is generated in-process as a single bundled module and run
+    with run_replications, one replication after the other.
+    
+    Returns:
+        dict: the point, the mean and half width of every metric in METRICS
+    """
+    components, simulated_delays = apply_parameters(model.components, point)
+    generate_pydevs_from_saml(model.saml_file, model.hwml_file, model_dir,
+                              model=ParsedModel(components, model.connections),
+                              bundle=True, simulated_delays=simulated_delays)
+    results = run_replications(model_dir, settings['replications'], settings['seed'], settings['until'],
+                               settings['formalism'], jobs=1)
+    row = dict(point)
+    for metric, (average, half_width) in summarize(results, settings['confidence']).items():
+        row[metric] = average
+        row[f"{metric}_ci"] = half_width
+    return row
+
+class SweepCache:
+    """
+    Results of completed sweep points, one JSON file per point.
+    
+    Points are keyed by point_key, so a sweep interrupted or extended later
+    only runs the points whose parameters, model or settings are new.
+    """
+    
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+    
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+    
+    def load(self, key):
+        """Return the cached row of a point, or None on a miss."""
+        try:
+            with open(self._entry_path(key), 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            debug_print(f"Discarding unreadable sweep result {self._entry_path(key)}: {str(e)}")
+            return None
+    
+    def store(self, key, row):
+        """Write the row of a point atomically."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(row, f)
+            os.replace(tmp_path, self._entry_path(key))
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
+def run_sweep(model, points, work_dir, replications=1, base_seed=0, until=3600, formalism='classic',
+              confidence=0.95, jobs=None, model_key=None):
+    """
+    Run every point of a sweep, reusing the cached results of completed points.
+    
+    Args:
+        model: ParsedModel the points are generated from
+        points: parameter dicts (see sweep_points)
+        work_dir: directory holding the generated models and the result cache
+        replications: replications per point, seeded from base_seed
+        until: simulation time every replication stops at
+        formalism: 'classic' or 'parallel' DEVS
+        confidence: confidence level of the half widths
+        jobs: worker processes (default: CPU count); 1 runs in this process
+        model_key: key of the model's inputs (e.g. ModelCache.key_for), so
+            cached points of another model are never reused
+    
+    Returns:
+        tuple: (one row per point in point order, number of points run)
+    """
+    settings = {'replications': replications, 'seed': base_seed, 'until': until, 'formalism': formalism,
+                'confidence': confidence}
+    cache = SweepCache(os.path.join(work_dir, 'results'))
+    keys = [point_key(model_key, point, settings) for point in points]
+    rows = [cache.load(key) for key in keys]
+    
+    pending = {}
+    for key, point, row in zip(keys, points, rows):
+        if row is None:
+            pending.setdefault(key, point)
+    debug_print(f"Sweep: {len(points)} points, {len(points) - len(pending)} cached")
+    
+    # Workers only need the components and connections of the model
+    model = ParsedModel(model.components, model.connections, saml_file=model.saml_file, hwml_file=model.hwml_file)
+    computed = {}
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(pending) or 1))
+    if jobs == 1:
+        for key, point in pending.items():
+            computed[key] = run_point(model, point, os.path.join(work_dir, 'models', key[:16]), settings)
+            cache.store(key, computed[key])
+    else:
+        # Workers started with spawn do not inherit this process's debug setting
+        with ProcessPoolExecutor(max_workers=jobs, initializer=debug_utils.set_debug,
+                                 initargs=(debug_utils.DEBUG,)) as executor:
+            futures = {executor.submit(run_point, model, point, os.path.join(work_dir, 'models', key[:16]), settings): key
+                       for key, point in pending.items()}
+            # Store every point as it completes, so an interrupted sweep keeps them
+            for future in as_completed(futures):
+                key = futures[future]
+                computed[key] = future.result()
+                cache.store(key, computed[key])
+    
+    rows = [row if row is not None else computed[key] for key, row in zip(keys, rows)]
+    return rows, len(pending)
+
+def result_columns(points):
+    """Return the columns of the results table of a sweep."""
+    names = sorted({name for point in points for name in point})
+    return ['point'] + names + [column for metric in METRICS for column in (metric, f"{metric}_ci")]
@@ -0,0 +1,73 @@
+import os
+import re
+from .debug_utils import debug_print
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+
+# Modules the generated models run with, copied into the output unchanged
+RUNTIME_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'runtime')
+
+# Placeholders look like {{ name }}; anything else is copied literally
+PLACEHOLDER = re.compile(r'\{\{\s*(\w+)\s*\}\}')
+
+class Template:
+    """
+    A template compiled into a single render function.
+    
+    The text is split into literals and placeholders once, and turned into
+    a function that joins them in one call, so rendering costs a tuple
+    build and a str.join no matter how large the template is.
+    """
+    
+    def __init__(self, text, name='<template>'):
+        self.name = name
+        parts = PLACEHOLDER.split(text)
+        self.fields = parts[1::2]
+        
+        pieces = []
+        for i, part in enumerate(parts):
+            if i % 2:
+                pieces.append(f"str(values[{part!r}])")
+            elif part:
+                pieces.append(repr(part))
+        if not pieces:
+            pieces.append("''")
+        source = "def render(values):\n    return ''.join((" + ', '.join(pieces) + ",))\n"
+        namespace = {}
+        exec(compile(source, f"<template {name}>", 'exec'), namespace)
+        self._render = namespace['render']
+    
+    def render(self, **values):
+        """Return the template text with every placeholder filled in."""
+        try:
+            return self._render(values)
+        except KeyError as e:
+            raise KeyError(f"Template {self.name} needs a value for {e.args[0]}") from None
+
+_templates = {}
+
+def get_template(name):
+    """Load and compile a template from the templates directory, once per process."""
+    template = _templates.get(name)
+    if template is None:
+        path = os.path.join(TEMPLATE_DIR, f"{name}.tmpl")
+        with open(path, encoding='utf-8') as f:
+            template = Template(f.read(), name)
+        _templates[name] = template
+        debug_print(f"Compiled template: {name}")
+    return template
+
+def render(template_name, **values):
+    """Render the named template."""
+    return get_template(template_name).render(**values)
+
+_runtime_modules = {}
+
+def runtime_module(name):
+    """Return the source of the named runtime module, read once per process."""
+    source = _runtime_modules.get(name)
+    if source is None:
+        with open(os.path.join(RUNTIME_DIR, f"{name}.py"), encoding='utf-8') as f:
+            source = f.read()
+        _runtime_modules[name] = source
+    return source
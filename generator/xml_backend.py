@@ -0,0 +1,108 @@
+import os
+import xml.etree.ElementTree as ET
+from .debug_utils import debug_print
+
+try:
+    from lxml import etree as LET
+except ImportError:
+    LET = None
+
+# Queries shared by the SAML/HWML readers, as ElementPath expressions
+# relative to the element they are evaluated on; both backends evaluate
+# them with findall. Ports, modes, behavioural elements and timers are read
+# in one pass over the children of each component (see
+# saml_parser.parse_component) and connections are resolved through
+# ReferenceIndex, so they need no queries. What lxml speeds up is reading
+# the document itself, in tree and streaming mode alike.
+QUERIES = {
+    'saelements': './SAElements',
+    'hwml_nodes': './nodes',
+    'processors': './microcontroller/processors',
+    'memory': './microcontroller/memory',
+}
+
+class ElementTreeBackend:
+    """Reads XML with the standard library's xml.etree.ElementTree."""
+    
+    name = 'etree'
+    
+    def parse(self, file_path):
+        return ET.parse(file_path).getroot()
+    
+    def iterparse(self, file_path, events=('end',)):
+        return ET.iterparse(file_path, events=events)
+    
+    def find(self, element, query):
+        return element.findall(QUERIES[query])
+
+class LxmlBackend:
+    """Reads XML with lxml's parser, dropping comments and processing instructions."""
+    
+    name = 'lxml'
+    
+    def __init__(self):
+        self.parser = LET.XMLParser(remove_comments=True, remove_pis=True, huge_tree=True)
+    
+    def parse(self, file_path):
+        return LET.parse(file_path, self.parser).getroot()
+    
+    def iterparse(self, file_path, events=('end',)):
+        return LET.iterparse(file_path, events=events, remove_comments=True, remove_pis=True, huge_tree=True)
+    
+    def find(self, element, query):
+        return element.findall(QUERIES[query])
+
+_backend = None
+
+def available_backends():
+    """Return the names of the backends that can be used here."""
+    return ['lxml', 'etree'] if LET is not None else ['etree']
+
+def set_backend(name=None):
+    """
+    Select the XML backend.
+    
+    Args:
+        name: 'lxml', 'etree' or None/'auto' to use lxml when it is installed.
+            Defaults to the CAPS_XML_BACKEND environment variable.
+    
+    Returns:
+        the selected backend
+    """
+    global _backend
+    
+    if name is None:
+        name = os.environ.get('CAPS_XML_BACKEND', 'auto')
+    
+    if name == 'lxml' and LET is None:
+        debug_print("lxml is not installed, falling back to ElementTree")
+        name = 'etree'
+    elif name == 'auto':
+        name = 'lxml' if LET is not None else 'etree'
+    elif name not in ('lxml', 'etree'):
+        raise ValueError(f"Unknown XML backend: {name}")
+    
+    _backend = LxmlBackend() if name == 'lxml' else ElementTreeBackend()
+    debug_print(f"Using {_backend.name} XML backend")
+    return _backend
+
+def get_backend():
+    """Return the current XML backend, selecting the default one on first use."""
+    return _backend if _backend is not None else set_backend()
+
+def parse(file_path):
+    """Parse a whole XML file and return its root element."""
+    return get_backend().parse(file_path)
+
+def iterparse(file_path, events=('end',)):
+    """
+    Iterate over (event, element) pairs while the file is read.
+    
+    file_path may also be a binary file object; pass one to close the file
+    when the iteration stops early.
+    """
+    return get_backend().iterparse(file_path, events)
+
+def find(element, query):
+    """Return the elements matching one of the named QUERIES below element."""
+    return get_backend().find(element, query)
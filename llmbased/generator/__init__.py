@@ -1 +1,5 @@
 # Generator package for PyDEVS models
+import os
+
+# output_writer and clustering are shared with the SAML generator package at the repository root
+__path__.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'generator'))
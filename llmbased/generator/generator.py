@@ -5,25 +5,80 @@ import datetime
 from pathlib import Path
 import shutil
 import tempfile
+import argparse
+import py_compile
+from concurrent.futures import ThreadPoolExecutor
 
 from generator.model_generator import (
     generate_component_class,
     generate_coupled_model,
+    share_component_classes,
     save_model_json
 )
+from generator.output_writer import writer, write_file
+from generator.clustering import DEFAULT_CLUSTER_SIZE, cluster_nodes
 
 def ensure_directory(directory):
     """Create directory if it doesn't exist"""
     if not os.path.exists(directory):
         os.makedirs(directory)
 
-def generate_pydevs_model(json_file_path, output_dir=None):
+def run_jobs(func, items, jobs=1):
+    """Return [func(item) for item in items], using up to jobs threads; results keep the order of items"""
+    items = list(items)
+    if not jobs or jobs <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(func, items))
+
+def write_component_file(component_class, output_dir):
+    """
+    Write the module of one component class
+    
+    Args:
+        component_class: (module name, class name, code, member components)
+            from share_component_classes
+        output_dir: Output directory for PyDEVS files
+    
+    Returns:
+        str: Module name of the component file
+    """
+    module_name, class_name, code, members = component_class
+    component_path = os.path.join(output_dir, f"{module_name}.py")
+    
+    # Write to file
+    write_file(component_path, code)
+    
+    if len(members) == 1:
+        print(f"Generated component: {members[0]['name']} -> {component_path}")
+    else:
+        print(f"Generated {class_name} for {len(members)} components -> {component_path}")
+    return module_name
+
+def generate_pydevs_model(json_file_path, output_dir=None, jobs=1, bundle=False, precompile=False,
+                          clusters=None, cluster_size=DEFAULT_CLUSTER_SIZE, slots=False):
     """
     Generate PyDEVS model from JSON specification
     
     Args:
         json_file_path: Path to JSON model specification
         output_dir: Output directory for PyDEVS files (optional)
+        jobs: Number of threads generating component files (optional);
+            the files are listed in component order whatever the number
+        
+        bundle: Write all component classes into model.py instead of one
+            module each (optional)
+        precompile: Also compile the bundled model.py to bytecode (optional)
+        clusters: Nest the components of the coupled model in clusters
+            grouped by 'connected' component or by a 'partition' of the
+            connections (optional; the model is flat by default)
+        cluster_size: Largest number of components in a cluster (optional)
+        slots: Generate state classes with __slots__, so every state object
+            is smaller (optional)
+    
+    Components whose generated classes only differ in their name are
+    written once as a shared class (see share_component_classes).
         
     Returns:
         str: Path to the output directory
@@ -42,57 +97,100 @@ def generate_pydevs_model(json_file_path, output_dir=None):
     
     # Create the directory
     os.makedirs(output_dir, exist_ok=True)
+    counts = writer.counts()
     
     # Save a copy of the original JSON model for reference
     model_json_path = os.path.join(output_dir, "model.json")
     save_model_json(model_json, model_json_path)
     
-    # Generate component files
+    # Generate component code, passing the full model_json for context
     components = model_json['components']
-    component_files = []
+    component_codes = run_jobs(lambda component: generate_component_class(component, model_json, slots), components, jobs)
     
-    for component in components:
-        component_name = component['name']
-        component_file = component_name.lower().replace(' ', '_')
-        component_path = os.path.join(output_dir, f"{component_file}.py")
-        component_files.append(component_file)
-        
-        # Generate component code, passing the full model_json for context
-        component_code = generate_component_class(component, model_json)
-        
-        # Write to file
-        with open(component_path, 'w') as f:
-            f.write(component_code)
-        
-        print(f"Generated component: {component_name} -> {component_path}")
+    # Components whose code only differs in their name share one class
+    component_classes = share_component_classes(components, component_codes)
+    classes = {
+        component['name']: (module_name, class_name)
+        for module_name, class_name, _, members in component_classes
+        for component in members
+    }
     
-    # Generate the coupled model
-    model_code = generate_coupled_model(model_json, component_files)
+    # Group connected components into nested coupled models
+    if clusters:
+        edges = [(connection['from'].split('.')[0], connection['to'].split('.')[0])
+                 for connection in model_json['connections']]
+        clusters = cluster_nodes([component['id'] for component in components], edges, clusters, cluster_size)
+    
+    # Generate the coupled model, with the component classes in the same module when bundled
     model_path = os.path.join(output_dir, "model.py")
+    if bundle:
+        model_code = generate_coupled_model(model_json, [], classes, [code for _, _, code, _ in component_classes], clusters)
+    else:
+        component_files = run_jobs(lambda component_class: write_component_file(component_class, output_dir),
+                                   component_classes, jobs)
+        model_code = generate_coupled_model(model_json, component_files, classes, clusters=clusters)
     
-    with open(model_path, 'w') as f:
-        f.write(model_code)
+    write_file(model_path, model_code)
     
     print(f"Generated coupled model: {model_path}")
     
+    # Sensors draw their values from the random streams module
+    copy_module(RANDOM_STREAM_MODULE, output_dir)
+    
+    if bundle and precompile:
+        py_compile.compile(model_path, doraise=True)
+        print(f"Compiled coupled model: {model_path}")
+    
     # Generate simulation script
     generate_simulation_script(output_dir)
     
+    # Files whose content did not change are left untouched
+    writer.report(since=counts)
     return output_dir
 
+# Modules the generated models run with, shared with the SAML generator (generator/runtime)
+RUNTIME_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                           "generator", "runtime")
+
+# Random streams the generated sensors draw their values from
+RANDOM_STREAM_MODULE = os.path.join(RUNTIME_DIR, "randomstream.py")
+
+# Tracer simulate.py attaches in columnar mode
+COLUMNAR_TRACER = os.path.join(RUNTIME_DIR, "columnar.py")
+
+# Tracer simulate.py attaches in fast mode
+RECORDER_TRACER = os.path.join(RUNTIME_DIR, "recorder.py")
+
+def copy_module(source_path, output_dir):
+    """Copy a module the generated model runs with into the output directory"""
+    with open(source_path, encoding='utf-8') as f:
+        write_file(os.path.join(output_dir, os.path.basename(source_path)), f.read())
+
 def generate_simulation_script(output_dir):
     """Generate simulation script for running the model"""
     sim_script = """
 import sys
 import os
-import random
 import time
+import argparse
 
 # Add the current directory to the Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from pypdevs.simulator import Simulator
 from model import GeneratedModel
+from recorder import EventRecorder
+
+parser = argparse.ArgumentParser(description='Simulate the generated model')
+parser.add_argument('--mode', choices=['fast', 'trace', 'columnar'], default='trace',
+                    help='trace writes the model output to simulation.log; fast only counts the transitions; '
+                         'columnar writes typed event records to the trace file')
+parser.add_argument('--trace-file', dest='trace_file', default='trace.col',
+                    help='Columnar trace file written in columnar mode')
+parser.add_argument('--until', type=float, default=1000.0, help='Simulation time to stop at')
+parser.add_argument('--formalism', choices=['classic', 'parallel'], default='classic',
+                    help='DEVS formalism to simulate with')
+args = parser.parse_args()
 
 # Create the model
 model = GeneratedModel()
@@ -101,34 +199,59 @@ model = GeneratedModel()
 sim = Simulator(model)
 
 # Configure the simulation
-sim.setTerminationTime(1000.0)  # Run for 1000 time units
-sim.setClassicDEVS()  # Use classic DEVS formalism
+sim.setTerminationTime(args.until)
+if args.formalism == 'classic':
+    sim.setClassicDEVS()  # Use classic DEVS formalism
 
-# Use the correct setVerbose syntax for your PyDEVS version
-# It expects either None or a string filename, not a boolean
-sim.setVerbose(None)  # No additional verbosity
+if args.mode == 'trace':
+    # Use the correct setVerbose syntax for your PyDEVS version
+    # It expects either None or a string filename, not a boolean
+    sim.setVerbose(None)  # No additional verbosity
+    log_file = 'simulation.log'
+elif args.mode == 'columnar':
+    # Write event records the parser reads directly instead of the model output
+    sim.setCustomTracer("columnar", "ColumnarTracer", [args.trace_file])
+    log_file = os.devnull
+else:
+    # Count transitions in process instead of writing the model output out
+    sim.setCustomTracer("recorder", "EventRecorder", [])
+    log_file = os.devnull
 
 # Redirect stdout to capture log
-log_file = 'simulation.log'
 original_stdout = sys.stdout
 try:
     with open(log_file, 'w') as f:
         sys.stdout = f
         # Run the simulation
+        start = time.perf_counter()
         sim.simulate()
+        wall_time = time.perf_counter() - start
 finally:
     # Restore stdout
     sys.stdout = original_stdout
 
-print(f"Simulation complete. Results saved to {log_file}")
+if args.mode == 'trace':
+    print(f"Simulation complete. Results saved to {log_file}")
+elif args.mode == 'columnar':
+    print(f"Simulation complete. Trace saved to {args.trace_file}")
+else:
+    recorder = EventRecorder.latest
+    transitions = recorder.transitions()
+    print(f"Simulation complete. {sum(transitions.values())} transitions "
+          f"({', '.join(f'{count} {kind}' for kind, count in transitions.items())}), last at t={recorder.last_time}")
+print(f"Wall time: {wall_time:.3f}s")
 """
     
     sim_path = os.path.join(output_dir, "simulate.py")
-    with open(sim_path, 'w') as f:
-        f.write(sim_script)
+    write_file(sim_path, sim_script)
     
     print(f"Generated simulation script: {sim_path}")
     
+    copy_module(RECORDER_TRACER, output_dir)
+    
+    # The columnar tracer is the module the parser reads its traces with
+    copy_module(COLUMNAR_TRACER, output_dir)
+    
     # Create optional experiment script for convenience
     exp_script = """
 import os
@@ -140,11 +263,12 @@ print("Running simulation...")
 # Run the simulation
 try:
     # First try to run with python command
-    result = subprocess.run(['python', 'simulate.py'], capture_output=True, text=True)
+    # Options such as --mode fast are passed on to simulate.py
+    result = subprocess.run(['python', 'simulate.py'] + sys.argv[1:], capture_output=True, text=True)
     if result.returncode != 0 and sys.executable:
         # If that fails, try with the current Python interpreter
         print("Trying with current Python executable...")
-        result = subprocess.run([sys.executable, 'simulate.py'], capture_output=True, text=True)
+        result = subprocess.run([sys.executable, 'simulate.py'] + sys.argv[1:], capture_output=True, text=True)
 except Exception as e:
     print(f"Error running simulation: {e}")
     sys.exit(1)
@@ -171,17 +295,23 @@ print("To view full log, open 'simulation.log'")
 """
     
     exp_path = os.path.join(output_dir, "experiment.py")
-    with open(exp_path, 'w') as f:
-        f.write(exp_script)
+    write_file(exp_path, exp_script)
     
     print(f"Generated experiment helper: {exp_path}")
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python generator.py <config_file> [output_dir]")
-        sys.exit(1)
-    
-    config_file = sys.argv[1]
-    output_dir = sys.argv[2] if len(sys.argv) >= 3 else None
+    parser = argparse.ArgumentParser(description='Generate a PyDEVS model from a JSON specification')
+    parser.add_argument('config_file', help='Path to the JSON model specification')
+    parser.add_argument('output_dir', nargs='?', help='Output directory for PyDEVS files')
+    parser.add_argument('--jobs', type=int, default=1, help='Number of threads generating component files')
+    parser.add_argument('--bundle', action='store_true', help='Write all component classes into model.py')
+    parser.add_argument('--precompile', action='store_true', help='Also compile the bundled model.py to bytecode')
+    parser.add_argument('--clusters', choices=['connected', 'partition'],
+                        help='Nest the components in coupled models by connected component or by a partition of the connections')
+    parser.add_argument('--cluster-size', dest='cluster_size', type=int, default=DEFAULT_CLUSTER_SIZE,
+                        help='Largest number of components in a cluster')
+    parser.add_argument('--slots', action='store_true', help='Generate state classes with __slots__')
+    args = parser.parse_args()
     
-    generate_pydevs_model(config_file, output_dir)
+    generate_pydevs_model(args.config_file, args.output_dir, jobs=args.jobs, bundle=args.bundle, precompile=args.precompile,
+                          clusters=args.clusters, cluster_size=args.cluster_size, slots=args.slots)
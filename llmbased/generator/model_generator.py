@@ -37,32 +37,37 @@ def generate_time_advance(timers, behaviors):
     
     return chr(10).join(["        " + line for line in time_advance_code])
 
+# Random stream a sensor draws its values from, by the type of its data
+SENSOR_STREAMS = {
+    "boolean": "RandomStream('bool')",  # Boolean as 0/1
+    "int": "RandomStream('int', 0, 100)",  # Integer between 0-100
+    "real": "RandomStream('uniform', 0, 100)",  # Float between 0-100
+}
+
+def sensor_data_type(component):
+    """Return the type of the first typed parameter of a sensor, 'real' if it has none"""
+    if component and 'parameters' in component:
+        for param_name, param_info in component['parameters'].items():
+            if 'type' in param_info:
+                return param_name, param_info['type'].lower()
+    return None, "real"
+
+def sensor_stream(component):
+    """Return the expression creating the random stream of a sensor's values"""
+    return SENSOR_STREAMS.get(sensor_data_type(component)[1], SENSOR_STREAMS["real"])
+
 def generate_output_function(behaviors, role, component=None):
     """Generate outputFnc method with type-aware random value generation"""
     output_code = ["result = {}"]
     
     if role == "sensor":
-        # Default to real number as fallback
-        sensor_type = "real"
-        output_value = "random.uniform(0, 100)"
-        
-        # Extract parameter information if component is provided
-        if component and 'parameters' in component:
-            for param_name, param_info in component['parameters'].items():
-                if 'type' in param_info:
-                    sensor_type = param_info['type'].lower()
-                    print(f"Using parameter '{param_name}' with type '{sensor_type}' for sensor data generation")
-                    break  # Use the first typed parameter we find
+        # The values come from the sensor's random stream (see sensor_stream)
+        param_name, sensor_type = sensor_data_type(component)
+        if param_name is not None:
+            print(f"Using parameter '{param_name}' with type '{sensor_type}' for sensor data generation")
+        output_value = "self.stream.next()"
         
-        # Generate appropriate random value based on type
-        if sensor_type == "boolean":
-            output_value = "random.choice([0, 1])"  # Boolean as 0/1
-        elif sensor_type == "int":
-            output_value = "random.randint(0, 100)"  # Integer between 0-100
-        elif sensor_type == "real":
-            output_value = "random.uniform(0, 100)"  # Float between 0-100
-            
-        print(f"Generating {sensor_type} sensor data with value: {output_value}")
+        print(f"Generating {sensor_type} sensor data with value: {sensor_stream(component)}")
         
         output_code.append(f"# Generate {sensor_type} sensor data")
         output_code.append("sensor_data = {")
@@ -90,8 +95,8 @@ def generate_output_function(behaviors, role, component=None):
     
     return chr(10).join(["        " + line for line in output_code])
 
-def generate_component_class(component, json_model=None):
-    """Generate PyDEVS AtomicDEVS class for a component"""
+def generate_component_class(component, json_model=None, slots=False):
+    """Generate PyDEVS AtomicDEVS class for a component (with a slotted state class if slots is set)"""
     component_name = component['name']
     component_id = component['id']
     component_role = component['role']
@@ -103,10 +108,10 @@ def generate_component_class(component, json_model=None):
     
     # For controllers, use the template-based approach to handle conditions
     if component_role == 'controller' and json_model:
-        return generate_controller_code(component, json_model)
+        return generate_controller_code(component, json_model, slots)
     
     # Generate the state class
-    state_class = generate_state_class(component_name, parameters, timers)
+    state_class = generate_state_class(component_name, parameters, timers, slots)
     
     # Generate each method separately to avoid f-string nesting issues
     time_advance_method = f"""    def timeAdvance(self):
@@ -129,6 +134,16 @@ def generate_component_class(component, json_model=None):
 {generate_output_function(behaviors, component_role, component)}
 """
     
+    # Sensors draw their values from a random stream created with the model
+    stream_import = ""
+    stream_init = ""
+    if component_role == 'sensor':
+        stream_import = "from randomstream import RandomStream\n"
+        stream_init = f"""
+        
+        # Initialize the random stream of the sensor values
+        self.stream = {sensor_stream(component)}"""
+    
     # Add comparison method for sorting
     comparison_method = """    def __lt__(self, other):
         \"\"\"Comparison method required for sorting during simulation\"\"\"
@@ -140,7 +155,7 @@ def generate_component_class(component, json_model=None):
 from pypdevs.infinity import INFINITY
 import random
 import time
-
+{stream_import}
 {state_class}
 
 class {component_name}(AtomicDEVS):
@@ -156,7 +171,7 @@ class {component_name}(AtomicDEVS):
 {generate_parameters_init(parameters)}
 
         # Initialize timers
-{generate_timers_init(timers)}
+{generate_timers_init(timers)}{stream_init}
 
 {time_advance_method}
 {int_transition_method}
@@ -167,8 +182,13 @@ class {component_name}(AtomicDEVS):
     
     return devs_class
 
-def generate_state_class(component_name, parameters, timers):
-    """Generate state class for a component"""
+def generate_state_class(component_name, parameters, timers, slots=False):
+    """
+    Generate state class for a component
+    
+    With slots, the class declares __slots__ for its attributes, so its
+    instances hold no __dict__.
+    """
     state_attrs = []
     
     # Add parameters to state
@@ -196,12 +216,21 @@ def generate_state_class(component_name, parameters, timers):
         state_attrs = ["        pass"]
     
     state_class = f"""class {component_name}State:
-    def __init__(self):
+{generate_state_slots(state_attrs) if slots else ''}    def __init__(self):
 {chr(10).join(state_attrs)}
 """
     
     return state_class
 
+def generate_state_slots(state_attrs):
+    """Generate the __slots__ line declaring the attributes set by state_attrs lines"""
+    names = []
+    for line in state_attrs:
+        line = line.strip()
+        if line.startswith("self.") and "=" in line:
+            names.append(line[len("self."):line.index("=")].strip())
+    return f"    __slots__ = {tuple(names)!r}\n\n"
+
 def generate_ports(in_ports, out_ports):
     """Generate port initialization code"""
     port_code = []
@@ -367,8 +396,8 @@ def generate_ext_transition(behaviors, role, component=None):
     
     return "\n".join(ext_code)
 
-def generate_controller_code(component, json_model):
-    """Generate controller component code based on JSON specification"""
+def generate_controller_code(component, json_model, slots=False):
+    """Generate controller component code based on JSON specification (with a slotted state class if slots is set)"""
     # Extract all conditions from the component's connectionsInternal
     conditions = []
     
@@ -472,8 +501,8 @@ import random
 import time
 
 class {component['name']}State:
-    def __init__(self):
 """
+    state_attrs = []
     
     # Add parameters to state
     for param_name, param_info in component.get('parameters', {}).items():
@@ -483,15 +512,19 @@ class {component['name']}State:
                 initial_value = str(initial_value).capitalize()
             elif isinstance(initial_value, str) and initial_value.lower() in ['true', 'false']:
                 initial_value = initial_value.capitalize()
-        controller_code += f"        self.{param_name} = {initial_value}\n"
+        state_attrs.append(f"        self.{param_name} = {initial_value}\n")
     
     # Add standard controller state properties
-    controller_code += "        self.data_to_send = None\n"
-    controller_code += "        self.output_port = None\n"
+    state_attrs.append("        self.data_to_send = None\n")
+    state_attrs.append("        self.output_port = None\n")
     
     # Add all condition variables to state
     for var in condition_variables:
-        controller_code += f"        self.{var} = None  # Condition variable from model\n"
+        state_attrs.append(f"        self.{var} = None  # Condition variable from model\n")
+    
+    if slots:
+        controller_code += generate_state_slots(state_attrs)
+    controller_code += "    def __init__(self):\n" + "".join(state_attrs)
     
     # Complete the controller class
     controller_code += f"""
@@ -580,41 +613,261 @@ class {component['name']}(AtomicDEVS):
 
     return controller_code
 
-def generate_coupled_model(config, component_files):
-    """Generate PyDEVS CoupledDEVS model that connects components"""
+def share_component_classes(components, component_codes):
+    """
+    Group components whose generated classes differ only in the component name
+    
+    Components of the same role whose code is identical once their name is
+    taken out of the class definitions, the default instance name and the
+    state constructor share one Shared<Role><n> class in a
+    shared_<role>_<n> module, instantiated once per component. Any other
+    use of the name, such as in a message, makes the code unique. A
+    component with unique code keeps its own module and class.
+    
+    Args:
+        components: Component specifications
+        component_codes: Code generated for each component, in the same order
+    
+    Returns:
+        list: (module name, class name, code, member components) per module
+            to write, in order of the first member in components
+    """
+    import re
+    
+    placeholder = "__SHARED_CLASS__"
+    groups = {}
+    for component, code in zip(components, component_codes):
+        name = component['name']
+        if name.isidentifier():
+            escaped = re.escape(name)
+            definitions = re.compile(
+                rf"(?<=^class ){escaped}(?=State:|\()"
+                rf"|(?<=def __init__\(self, name=\"){escaped}(?=\")"
+                rf"|(?<=self\.state = ){escaped}(?=State\(\))", re.MULTILINE)
+            key = (component.get('role'), definitions.sub(placeholder, code))
+        else:
+            key = (None, name)
+        groups.setdefault(key, []).append((component, code))
+    
+    taken = {component['name'].lower().replace(' ', '_') for component in components}
+    counters = {}
+    classes = []
+    for (role, shared_code), members in groups.items():
+        if len(members) == 1:
+            component, code = members[0]
+            classes.append((component['name'].lower().replace(' ', '_'), component['name'], code, [component]))
+            continue
+        
+        role = role or 'component'
+        module_name = None
+        while module_name is None or module_name in taken:
+            counters[role] = counters.get(role, 0) + 1
+            module_name = f"shared_{role}_{counters[role]}"
+        taken.add(module_name)
+        class_name = f"Shared{role.title()}{counters[role]}"
+        classes.append((module_name, class_name, shared_code.replace(placeholder, class_name),
+                        [component for component, _ in members]))
+    return classes
+
+def bundle_modules(modules):
+    """
+    Join generated modules into a single module
+    
+    The imports at the top of each module are hoisted into one block
+    without duplicates.
+    """
+    imports = {}
+    bodies = []
+    for module in modules:
+        lines = module.split('\n')
+        start = 0
+        while start < len(lines) and (not lines[start].strip() or lines[start].startswith(('import ', 'from '))):
+            if lines[start].strip():
+                imports.setdefault(lines[start], None)
+            start += 1
+        bodies.append('\n'.join(lines[start:]).strip('\n'))
+    return '\n'.join(imports) + '\n\n' + '\n\n\n'.join(bodies) + '\n'
+
+def expose_cluster_port(cluster, component_var, port, direction):
+    """
+    Return the name of the cluster port standing for a member's port
+    
+    The port is added to the cluster, and connected to the member's port,
+    the first time it is used; direction is 'in' or 'out'.
+    """
+    cluster_port = f"{component_var}_{port}"
+    if cluster_port not in cluster['exposed']:
+        cluster['exposed'].add(cluster_port)
+        if direction == 'out':
+            cluster['ports'].append(f"        self.{cluster_port} = self.addOutPort(\"{cluster_port}\")\n")
+            cluster['port_couplings'].append((component_var, port, None, cluster_port))
+        else:
+            cluster['ports'].append(f"        self.{cluster_port} = self.addInPort(\"{cluster_port}\")\n")
+            cluster['port_couplings'].append((None, cluster_port, component_var, port))
+    return cluster_port
+
+def connection_error(connection, ports):
+    """
+    Return why a connection cannot be made, or None if it can
+    
+    ports maps component ids (lower case) to their 'ports' entry. The
+    components are siblings, so a connection must go from an output port
+    of one to an input port of another.
+    """
+    for end, direction in (('from', 'out'), ('to', 'in')):
+        parts = connection[end].split('.')
+        if len(parts) != 2:
+            return f"{connection[end]} is not component.port"
+        component, port = parts[0].lower(), parts[1]
+        if component not in ports:
+            return f"there is no component {parts[0]}"
+        if port not in ports[component].get(direction, []):
+            return f"{parts[0]} has no {direction}put port {port}"
+    return None
+
+# Applies a coupling table in the generated model module
+COUPLING_HELPERS = """
+
+def connect_couplings(model, submodels, couplings):
+    \"\"\"
+    Apply a coupling table to a coupled model and return the couplings that failed
+    
+    Every coupling is (source, source port, target, target port), with the
+    source and target given as an index into submodels, or None for the
+    coupled model itself.
+    \"\"\"
+    errors = []
+    for source, source_port, target, target_port in couplings:
+        source_model = model if source is None else submodels[source]
+        target_model = model if target is None else submodels[target]
+        try:
+            model.connectPorts(getattr(source_model, source_port), getattr(target_model, target_port))
+        except Exception as e:
+            errors.append(f"{source_model.name}.{source_port} to {target_model.name}.{target_port}: {e}")
+    return errors
+
+def report_couplings(model, couplings, errors, skipped=()):
+    \"\"\"Print one report of the couplings of a coupled model\"\"\"
+    print(f"Connected {len(couplings) - len(errors)} couplings in {model.name}")
+    failed = list(skipped) + errors
+    if failed:
+        print(f"  {len(failed)} connections failed:")
+        for error in failed:
+            print(f"    {error}")
+"""
+
+def coupling_table(couplings, submodel_vars, indent="    "):
+    """
+    Return the lines of a COUPLINGS table
+    
+    couplings are (source, source port, target, target port) with the
+    submodels given by variable name, or None for the coupled model; in the
+    table they are indices into submodel_vars, the submodels in the order
+    they are added.
+    """
+    index = {var: i for i, var in enumerate(submodel_vars)}
+    table = f"{indent}COUPLINGS = (\n"
+    for source, source_port, target, target_port in couplings:
+        table += f"{indent}    ({index.get(source)}, \"{source_port}\", {index.get(target)}, \"{target_port}\"),\n"
+    return table + f"{indent})\n"
+
+def generate_coupled_model(config, component_files, component_classes=None, class_codes=None, clusters=None):
+    """
+    Generate PyDEVS CoupledDEVS model that connects components
+    
+    component_classes maps component names to the (module name, class name)
+    they are created from; by default each component has its own module
+    named after it. When the code of the classes is given as class_codes,
+    it is bundled into the model module instead of imported.
+    
+    clusters lists groups of component ids (see clustering.cluster_nodes)
+    to nest in a CoupledDEVS of their own, which only exposes the ports
+    connected to components outside it. Groups of one component stay in
+    the top-level model.
+    
+    Connections are checked here and written as a COUPLINGS table that one
+    loop applies; the ones that fail the check are left out and reported
+    once, with any that fail at run time, when the model is built.
+    """
     model_name = "GeneratedModel"
     components = config['components']
     connections = config['connections']
     
     # Start with imports
     imports = ["from pypdevs.DEVS import CoupledDEVS"]
-    for component_file in component_files:
-        # Import the class from the component file
-        component_name = next((c['name'] for c in components if c['name'].lower().replace(' ', '_') == component_file), None)
-        if component_name:
-            imports.append(f"from {component_file} import {component_name}")
-    
-    # Create the model class
+    if component_classes is not None:
+        if class_codes is None:
+            for module_name, class_name in dict.fromkeys(component_classes.values()):
+                imports.append(f"from {module_name} import {class_name}")
+    else:
+        component_classes = {}
+        for component_file in component_files:
+            # Import the class from the component file
+            component_name = next((c['name'] for c in components if c['name'].lower().replace(' ', '_') == component_file), None)
+            if component_name:
+                imports.append(f"from {component_file} import {component_name}")
+    
+    # Create the model class; its coupling tables are filled in once all connections are known
     model_class = f"""
 class {model_name}(CoupledDEVS):
+{{couplings}}
     def __init__(self):
         CoupledDEVS.__init__(self, "{model_name}")
         print("Model Loading...")
         
         # Initialize components
 """
+
+    # Number the nested clusters, skipping names already used by components
+    component_vars = {component['id'].lower() for component in components}
+    cluster_of = {}
+    nested = []
+    for members in clusters or []:
+        if len(members) < 2:
+            continue
+        index = len(nested)
+        while f"cluster{index}" in component_vars:
+            index += 1
+        cluster = {'var': f"cluster{index}", 'class': f"Cluster{index}", 'ports': [], 'init': "", 'vars': [],
+                   'couplings': [], 'port_couplings': [], 'exposed': set()}
+        nested.append(cluster)
+        for member in members:
+            cluster_of[member.lower()] = cluster
     
     # Add component initialization
+    submodel_vars = []
     for component in components:
         component_var = component['id'].lower()
-        component_class = component['name']
-        model_class += f"        self.{component_var} = self.addSubModel({component_class}(\"{component_var}\"))\n"
-        model_class += f"        print(\"Initialized {component_class} as {component_var}\")\n"
+        component_class = component_classes.get(component['name'], (None, component['name']))[1]
+        cluster = cluster_of.get(component_var)
+        code = f"        self.{component_var} = self.addSubModel({component_class}(\"{component_var}\"))\n"
+        code += f"        print(\"Initialized {component_class} as {component_var}\")\n"
+        if cluster is None:
+            model_class += code
+            submodel_vars.append(component_var)
+            continue
+        # A cluster is created where its first member would have been
+        if not cluster['init']:
+            model_class += f"        self.{cluster['var']} = self.addSubModel({cluster['class']}(\"{cluster['var']}\"))\n"
+            model_class += f"        print(\"Initialized {cluster['class']} as {cluster['var']}\")\n"
+            submodel_vars.append(cluster['var'])
+        cluster['init'] += code
+        cluster['vars'].append(component_var)
     
     model_class += "\n        # Connect components\n"
+    model_class += "        errors = connect_couplings(self, self.component_set, self.COUPLINGS)\n"
+    model_class += "        report_couplings(self, self.COUPLINGS, errors, self.SKIPPED)\n"
     
     # Add connections
+    ports = {component['id'].lower(): component.get('ports', {}) for component in components}
+    couplings = []
+    skipped = []
     for connection in connections:
+        error = connection_error(connection, ports)
+        if error is not None:
+            skipped.append(f"{connection['from']} to {connection['to']}: {error}")
+            continue
+        
         source_parts = connection['from'].split('.')
         target_parts = connection['to'].split('.')
         
@@ -624,25 +877,60 @@ class {model_name}(CoupledDEVS):
         target_component = target_parts[0].lower()
         target_port = target_parts[1]
         
-        model_class += f"        self.connectPorts(self.{source_component}.{source_port}, self.{target_component}.{target_port})\n"
-        model_class += f"        print(\"Connected {source_component}.{source_port} to {target_component}.{target_port}\")\n"
+        source_cluster = cluster_of.get(source_component)
+        target_cluster = cluster_of.get(target_component)
+        if source_cluster is not None and source_cluster is target_cluster:
+            source_cluster['couplings'].append((source_component, source_port, target_component, target_port))
+            continue
+        
+        # Route connections leaving a cluster through a port of the cluster named after the member port
+        if source_cluster is not None:
+            source_component, source_port = source_cluster['var'], expose_cluster_port(source_cluster, source_component, source_port, 'out')
+        if target_cluster is not None:
+            target_component, target_port = target_cluster['var'], expose_cluster_port(target_cluster, target_component, target_port, 'in')
+        
+        couplings.append((source_component, source_port, target_component, target_port))
     
     model_class += "\n        print(\"Model initialization complete\")\n"
+    if skipped:
+        print(f"Left out {len(skipped)} invalid connections:\n  " + "\n  ".join(skipped))
+    
+    # Connections left out are reported when the model is built
+    tables = coupling_table(couplings, submodel_vars)
+    tables += "    SKIPPED = (\n" + "".join(f"        {error!r},\n" for error in skipped) + "    )\n"
+    model_class = model_class.replace("{couplings}", tables, 1)
+    
+    # The cluster classes come before the model that creates them
+    cluster_classes = ""
+    for cluster in nested:
+        cluster_classes += f"""
+class {cluster['class']}(CoupledDEVS):
+{coupling_table(cluster['couplings'] + cluster['port_couplings'], cluster['vars'])}
+    def __init__(self, name):
+        CoupledDEVS.__init__(self, name)
+{''.join(cluster['ports'])}
+{cluster['init']}
+        errors = connect_couplings(self, self.component_set, self.COUPLINGS)
+        report_couplings(self, self.COUPLINGS, errors)
+"""
+    model_class = COUPLING_HELPERS + cluster_classes + model_class
     
     # Combine everything
+    if class_codes is not None:
+        return bundle_modules(list(class_codes) + ["\n".join(imports) + model_class])
     return "\n".join(imports) + model_class
 
 def save_model_json(model_json, output_path):
     """Save the model JSON to a file"""
     import json
     import os
+    from generator.output_writer import write_file
     
     # Create directory if it doesn't exist
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     
     # Save the JSON model
-    with open(output_path, 'w') as f:
-        json.dump(model_json, f, indent=2)
+    write_file(output_path, json.dumps(model_json, indent=2))
     
     print(f"Model JSON saved to: {output_path}")
     return output_path
@@ -660,6 +948,7 @@ def save_connections_json(model_json, output_path):
     """
     import json
     import os
+    from generator.output_writer import write_file
     
     # Create directory if it doesn't exist
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
@@ -706,8 +995,7 @@ def save_connections_json(model_json, output_path):
     }
     
     # Save the connections JSON
-    with open(output_path, 'w') as f:
-        json.dump(connections_json, f, indent=2)
+    write_file(output_path, json.dumps(connections_json, indent=2))
     
     print(f"Connections JSON saved to: {output_path}")
     return output_path
@@ -725,10 +1013,12 @@ def generate_all_files(model_json, output_dir):
     """
     import os
     import json
+    from generator.output_writer import writer, write_file
     
     # Create output directory if it doesn't exist
     os.makedirs(output_dir, exist_ok=True)
     
+    counts = writer.counts()
     generated_files = []
     
     # Save the model JSON first
@@ -758,8 +1048,7 @@ def generate_all_files(model_json, output_dir):
         component_code = generate_component_class(component, model_json)
         
         # Save to file
-        with open(file_path, 'w') as f:
-            f.write(component_code)
+        write_file(file_path, component_code)
         
         print(f"Generated {component_role} component: {file_path}")
         generated_files.append(file_path)
@@ -769,8 +1058,7 @@ def generate_all_files(model_json, output_dir):
     coupled_model_code = generate_coupled_model(model_json, component_files)
     coupled_model_path = os.path.join(output_dir, "coupled_model.py")
     
-    with open(coupled_model_path, 'w') as f:
-        f.write(coupled_model_code)
+    write_file(coupled_model_path, coupled_model_code)
     
     print(f"Generated coupled model: {coupled_model_path}")
     generated_files.append(coupled_model_path)
@@ -797,12 +1085,12 @@ print("Simulation complete!")
 """
     
     run_script_path = os.path.join(output_dir, "run_simulation.py")
-    with open(run_script_path, 'w') as f:
-        f.write(run_script)
+    write_file(run_script_path, run_script)
     
     print(f"Generated run script: {run_script_path}")
     generated_files.append(run_script_path)
     
+    writer.report(since=counts)
     return generated_files
 
 # Example usage:
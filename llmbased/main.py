@@ -5,6 +5,7 @@ import shutil
 import tempfile
 import re
 import datetime
+import argparse
 import subprocess
 from pathlib import Path
 import google.generativeai as genai
@@ -12,6 +13,7 @@ from google.generativeai.types import HarmCategory, HarmBlockThreshold
 
 # Import generator modules
 from generator.generator import generate_pydevs_model
+from generator.clustering import DEFAULT_CLUSTER_SIZE
 
 # Import metrics
 try:
@@ -237,7 +239,8 @@ def generate_json(input_file_path, output_json_path=None, system_instructions_pa
         return None
 
 
-def process_capssaml_file(capssaml_file_path, output_dir=None, system_instructions_path=None):
+def process_capssaml_file(capssaml_file_path, output_dir=None, system_instructions_path=None, jobs=1, bundle=False,
+                          precompile=False, clusters=None, cluster_size=DEFAULT_CLUSTER_SIZE, slots=False):
     """
     Process a CAPSSAML file and generate PyDEVS model
     
@@ -245,7 +248,13 @@ def process_capssaml_file(capssaml_file_path, output_dir=None, system_instructio
         capssaml_file_path: Path to the CAPSSAML file
         output_dir: Output directory for PyDEVS files (optional)
         system_instructions_path: Path to system instructions file (optional)
-        
+        jobs: Number of threads generating component files (optional)
+        bundle: Write all component classes into model.py (optional)
+        precompile: Also compile the bundled model.py to bytecode (optional)
+        clusters: Nest the components in clusters, 'connected' or 'partition' (optional)
+        cluster_size: Largest number of components in a cluster (optional)
+        slots: Generate state classes with __slots__ (optional)
+    
     Returns:
         str: Path to the output directory containing PyDEVS files
     """
@@ -283,7 +292,8 @@ def process_capssaml_file(capssaml_file_path, output_dir=None, system_instructio
     start_time = datetime.datetime.now()
     print(f"  Started at: {start_time.strftime('%H:%M:%S')}")
     
-    pydevs_output_dir = generate_pydevs_model(json_file_path, output_dir)
+    pydevs_output_dir = generate_pydevs_model(json_file_path, output_dir, jobs=jobs, bundle=bundle, precompile=precompile,
+                                              clusters=clusters, cluster_size=cluster_size, slots=slots)
     
     end_time = datetime.datetime.now()
     duration = (end_time - start_time).total_seconds()
@@ -315,9 +325,9 @@ def run_experiment(script_path):
     start_time = datetime.datetime.now()
     print(f"  Started at: {start_time.strftime('%H:%M:%S')}")
     
-    # Run experiment.py in its own directory
+    # Run experiment.py in its own directory, writing the columnar trace the parser reads
     result = subprocess.run(
-        ["/Users/likhithkanigolla/IIITH/MS/S1-Course/IS/venv/bin/python", "experiment.py"], 
+        ["/Users/likhithkanigolla/IIITH/MS/S1-Course/IS/venv/bin/python", "experiment.py", "--mode", "columnar"], 
         capture_output=True, 
         text=True,
         cwd=script_path  # Set the working directory to where the generated files are
@@ -350,14 +360,15 @@ def run_parser(folder_path):
     # Construct paths to required files
     model_json_path = os.path.join(folder_path, "model.json")
     log_file_path = os.path.join(folder_path, "simulation.log")
+    trace_path = os.path.join(folder_path, "trace.col")
     
     # Verify files exist
     if not os.path.exists(model_json_path):
         print(f"Error: model.json not found at {model_json_path}")
         return False
-        
-    if not os.path.exists(log_file_path):
-        print(f"Error: simulation.log not found at {log_file_path}")
+    
+    if not os.path.exists(trace_path) and not os.path.exists(log_file_path):
+        print(f"Error: neither trace.col nor simulation.log found in {folder_path}")
         return False
     
     # Get the absolute path to the parser script
@@ -485,24 +496,36 @@ def generate_web_pages(folder_path):
         return False
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python main.py <capssaml_file_path> [output_directory] [system_instructions_path]")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description='CAPSSAML to PyDEVS Generator')
+    parser.add_argument('capssaml_file', help='Path to the CAPSSAML file')
+    parser.add_argument('output_dir', nargs='?', help='Output directory')
+    parser.add_argument('system_instructions', nargs='?', help='Path to the system instructions file')
+    parser.add_argument('--jobs', type=int, default=1, help='Number of threads generating component files')
+    parser.add_argument('--bundle', action='store_true', help='Write all component classes into model.py')
+    parser.add_argument('--precompile', action='store_true', help='Also compile the bundled model.py to bytecode')
+    parser.add_argument('--clusters', choices=['connected', 'partition'],
+                        help='Nest the components in coupled models by connected component or by a partition of the connections')
+    parser.add_argument('--cluster-size', dest='cluster_size', type=int, default=DEFAULT_CLUSTER_SIZE,
+                        help='Largest number of components in a cluster')
+    parser.add_argument('--slots', action='store_true', help='Generate state classes with __slots__')
+    args = parser.parse_args()
     
     print("=" * 80)
     print("CAPSSAML to PyDEVS Generator (with Metrics Collection)")
     print("=" * 80)
     print(f"Metrics collection: {'ENABLED' if METRICS_ENABLED else 'DISABLED'}")
     
-    capssaml_file = sys.argv[1]
-    output_dir = sys.argv[2] if len(sys.argv) > 2 else None
-    system_instructions = sys.argv[3] if len(sys.argv) > 3 else None
+    capssaml_file = args.capssaml_file
+    output_dir = args.output_dir
+    system_instructions = args.system_instructions
     
     start_time = datetime.datetime.now()
     print(f"Starting process at: {start_time.strftime('%Y-%m-%d %H:%M:%S')}")
     
     # Process the file through the entire pipeline
-    generated_folder = process_capssaml_file(capssaml_file, output_dir, system_instructions)
+    generated_folder = process_capssaml_file(capssaml_file, output_dir, system_instructions, jobs=args.jobs,
+                                             bundle=args.bundle, precompile=args.precompile, clusters=args.clusters,
+                                             cluster_size=args.cluster_size, slots=args.slots)
     print(f"Generated files are located in: {generated_folder}")
     if os.path.exists(generated_folder):
         # Run the experiment
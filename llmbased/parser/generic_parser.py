@@ -1,8 +1,16 @@
 # generic_parser.py
+import os
 import re
+import sys
 import json
 from collections import defaultdict
 
+# The columnar trace reader is shared with the generated models (generator/runtime/columnar.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'generator', 'runtime'))
+
+# First bytes of a columnar trace (columnar.MAGIC), checked without importing NumPy
+COLUMNAR_MAGIC = b"PDEVSCOL"
+
 class PyDEVSSimulationParser:
     def __init__(self, log_path):
         self.log_path = log_path
@@ -11,6 +19,9 @@ class PyDEVSSimulationParser:
         self.current_component = None
 
     def parse(self):
+        if self.is_columnar():
+            return self.parse_trace()
+        
         with open(self.log_path, 'r') as file:
             lines = file.readlines()
 
@@ -26,6 +37,41 @@ class PyDEVSSimulationParser:
             comp['connections'] = list(comp['connections'])
 
         return dict(self.components)
+    
+    def is_columnar(self):
+        with open(self.log_path, 'rb') as file:
+            return file.read(len(COLUMNAR_MAGIC)) == COLUMNAR_MAGIC
+    
+    def parse_trace(self):
+        """Build the same summary from a columnar trace (simulate.py --mode columnar)"""
+        from columnar import read_trace
+        
+        trace = read_trace(self.log_path)
+        kinds = trace['kinds']
+        previous = None
+        for time, model_id, port_id, kind, value in zip(trace['time'].tolist(), trace['model'].tolist(),
+                                                       trace['port'].tolist(), trace['kind'].tolist(),
+                                                       trace['value'].tolist()):
+            component = trace['models'][model_id].split('.')[-1]
+            if kinds[kind] == 'init':
+                self.components[component]['type'] = 'model'
+                continue
+            transition_type = 'external' if kinds[kind] == 'external' else 'internal'
+            transitions = self.components[component]['transitions']
+            # The records of one transition are consecutive, one per message
+            if port_id < 0 or previous != (time, model_id, kind):
+                transitions.append({"type": transition_type, "time": time})
+            previous = (time, model_id, kind)
+            if port_id >= 0 and value == value:
+                transitions.append({
+                    "type": "receive" if transition_type == 'external' else "send",
+                    "time": time,
+                    "data": {trace['ports'][model_id][port_id]: value}
+                })
+        
+        for comp in self.components.values():
+            comp['connections'] = list(comp['connections'])
+        return dict(self.components)
 
     def extract_time(self, line):
         time_match = re.search(r"Current Time:\s+(\d+\.\d+)", line)
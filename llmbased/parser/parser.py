@@ -4,20 +4,54 @@ import csv
 import os
 import sys
 import argparse
+import math
+
+# The columnar trace reader is shared with the generated models (generator/runtime/columnar.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'generator', 'runtime'))
+
+def trace_entries(trace_path, connections):
+    """
+    Build the (time, from, to, value) rows from a columnar trace
+    
+    Every message sent on a connected output port in an internal
+    transition becomes a row, with the numeric value the tracer recorded.
+    """
+    from columnar import read_trace
+    
+    trace = read_trace(trace_path)
+    internal = trace['kinds'].index('internal')
+    entries = []
+    for time, model_id, port_id, kind, value in zip(trace['time'].tolist(), trace['model'].tolist(),
+                                                   trace['port'].tolist(), trace['kind'].tolist(),
+                                                   trace['value'].tolist()):
+        if kind != internal or port_id < 0 or math.isnan(value):
+            continue
+        key = (trace['models'][model_id].split('.')[-1], trace['ports'][model_id][port_id])
+        if key in connections:
+            to_comp, to_port = connections[key]
+            entries.append([time, f"{key[0]}.{key[1]}", f"{to_comp}.{to_port}", value])
+    return entries
 
 def parse_simulation_data(folder_path, output_csv=None):
-    """Parse simulation data from the specified folder"""
+    """
+    Parse simulation data from the specified folder
+    
+    The columnar trace (trace.col, from simulate.py --mode columnar) is
+    read directly when it is newer than simulation.log or there is no log;
+    otherwise simulation.log is parsed
+    """
     # Construct paths to required files
     model_json_path = os.path.join(folder_path, "model.json")
     log_file_path = os.path.join(folder_path, "simulation.log")
+    trace_path = os.path.join(folder_path, "trace.col")
     
     # Verify files exist
     if not os.path.exists(model_json_path):
         print(f"Error: model.json not found at {model_json_path}")
         return False
-        
-    if not os.path.exists(log_file_path):
-        print(f"Error: simulation.log not found at {log_file_path}")
+    
+    if not os.path.exists(log_file_path) and not os.path.exists(trace_path):
+        print(f"Error: neither trace.col nor simulation.log found in {folder_path}")
         return False
     
     # Set default output path if not specified
@@ -34,7 +68,12 @@ def parse_simulation_data(folder_path, output_csv=None):
         from_comp, from_port = conn["from"].split(".")
         to_comp, to_port = conn["to"].split(".")
         connections[(from_comp, from_port)] = (to_comp, to_port)
-
+    
+    # Read the output of the latest run, whichever mode it was simulated in
+    if os.path.exists(trace_path) and (not os.path.exists(log_file_path)
+                                       or os.path.getmtime(trace_path) >= os.path.getmtime(log_file_path)):
+        return write_entries(trace_entries(trace_path, connections), output_csv)
+    
     # Process simulation.log
     entries = []
     current_time = None
@@ -68,8 +107,11 @@ def parse_simulation_data(folder_path, output_csv=None):
             if key in connections:
                 to_comp, to_port = connections[key]
                 entries.append([current_time, f"{current_model}.{from_port}", f"{to_comp}.{to_port}", value])
+    
+    return write_entries(entries, output_csv)
 
-    # Save to CSV
+def write_entries(entries, output_csv):
+    """Save the parsed rows to CSV"""
     with open(output_csv, "w", newline="") as f:
         writer = csv.writer(f)
         writer.writerow(["time", "from", "to", "value"])
@@ -81,7 +123,7 @@ def parse_simulation_data(folder_path, output_csv=None):
 if __name__ == "__main__":
     # Set up command line argument parser
     parser = argparse.ArgumentParser(description='Parse PyDEVS simulation logs to CSV')
-    parser.add_argument('folder_path', help='Path to the folder containing model.json and simulation.log')
+    parser.add_argument('folder_path', help='Path to the folder containing model.json and trace.col or simulation.log')
     parser.add_argument('--output', '-o', help='Path to save the output CSV (default: <folder_path>/parsed_output.csv)')
     
     args = parser.parse_args()
@@ -14,6 +14,9 @@ import colorsys
 import random
 from pathlib import Path
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from generator.output_writer import writer, write_file
+
 def load_model(model_path):
     """Load a model.json file"""
     try:
@@ -267,8 +270,7 @@ button:disabled {
 }}
 """
     
-    with open(output_path, 'w') as f:
-        f.write(css_content)
+    write_file(output_path, css_content)
     
     print(f"Generated CSS file: {output_path}")
     return component_colors
@@ -841,8 +843,7 @@ document.addEventListener('DOMContentLoaded', () => {{
 }});
 """
     
-    with open(output_path, 'w') as f:
-        f.write(js_content)
+    write_file(output_path, js_content)
     
     print(f"Generated JavaScript file: {output_path}")
 
@@ -890,8 +891,7 @@ def generate_html(output_path):
 </html>
 """
     
-    with open(output_path, 'w') as f:
-        f.write(html_content)
+    write_file(output_path, html_content)
     
     print(f"Generated HTML file: {output_path}")
 
@@ -925,6 +925,7 @@ def main():
     component_colors = generate_css(model_data, css_path)
     generate_js(model_data, component_colors, js_path)
     generate_html(html_path)
+    writer.report()
     
     print("\nTemplate generation complete. To use these templates:")
     print(f"1. Place your model.json and parsed_output.csv in {output_dir}")
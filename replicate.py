@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+import os
+import sys
+import csv
+import time
+import argparse
+from generator.replication import CONFIDENCE_LEVELS, METRICS, run_replications, summarize
+
+def write_results(results, output_file):
+    """Write one CSV row per replication."""
+    with open(output_file, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['replication', 'seed'] + list(METRICS))
+        writer.writeheader()
+        for index, result in enumerate(results):
+            writer.writerow({'replication': index, **result})
+
+def main():
+    parser = argparse.ArgumentParser(description='Run independent replications of a generated PyDEVS model '
+                                                 'and report confidence intervals of their summary metrics')
+    parser.add_argument('model_dir', help='Directory of the generated model (with model.py and recorder.py)')
+    parser.add_argument('-n', '--replications', type=int, default=30, help='Number of replications (default: 30)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed the replication seeds are derived from (default: 0)')
+    parser.add_argument('--until', type=float, default=3600, help='Simulation time of every replication (default: 3600)')
+    parser.add_argument('--formalism', choices=['classic', 'parallel'], default='classic',
+                        help='DEVS formalism to simulate with')
+    parser.add_argument('--confidence', type=float, choices=CONFIDENCE_LEVELS, default=0.95,
+                        help='Confidence level of the intervals (default: 0.95)')
+    parser.add_argument('--jobs', type=int, default=None, help='Number of worker processes (default: CPU count)')
+    parser.add_argument('--output', help='CSV file for the metrics of every replication')
+    args = parser.parse_args()
+    
+    if args.replications < 1:
+        parser.error("--replications must be at least 1")
+    if not os.path.exists(os.path.join(args.model_dir, 'model.py')):
+        print(f"Error: No generated model in {args.model_dir}")
+        return 1
+    
+    jobs = max(1, min(args.jobs or os.cpu_count() or 1, args.replications))
+    print(f"Running {args.replications} replications of {args.model_dir} until t={args.until} with {jobs} job(s)")
+    start = time.perf_counter()
+    try:
+        results = run_replications(args.model_dir, args.replications, args.seed, args.until, args.formalism, jobs)
+    except Exception as e:
+        print(f"Error running replications: {str(e)}")
+        return 1
+    wall_time = time.perf_counter() - start
+    
+    print(f"\n{'metric':16} {'mean':>14} {'± half width':>14} {int(args.confidence * 100)}% CI")
+    for metric, (average, half_width) in summarize(results, args.confidence).items():
+        print(f"{metric:16} {average:14.4f} {half_width:14.4f} [{average - half_width:.4f}, {average + half_width:.4f}]")
+    
+    print(f"\n{len(results)} replications in {wall_time:.3f}s wall time "
+          f"({sum(result['wall_time'] for result in results):.3f}s total simulation time)")
+    
+    if args.output:
+        write_results(results, args.output)
+        print(f"Wrote the metrics of every replication to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+import os
+import sys
+import csv
+import time
+import argparse
+from generator.debug_utils import set_debug
+from generator.model_ir import build_model
+from generator.model_cache import ModelCache
+from generator.replication import CONFIDENCE_LEVELS
+from generator.sweep import load_spec, sweep_points, run_sweep, result_columns
+
+def write_table(rows, columns, output_file):
+    """Write one CSV row per sweep point."""
+    with open(output_file, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        for index, row in enumerate(rows):
+            writer.writerow({'point': index, **row})
+
+def main():
+    parser = argparse.ArgumentParser(description='Sweep the sensor data intervals and simulated delays of a SAML model '
+                                                 'and write one table of the simulation results')
+    parser.add_argument('saml_file', help='Path to the SAML (.capssaml) file')
+    parser.add_argument('spec_file', help='JSON sweep specification (grid or Latin hypercube, see generator/sweep.py)')
+    parser.add_argument('--hwml', dest='hwml_file', help='Optional path to HWML file for hardware details')
+    parser.add_argument('--output', default='sweep_results.csv', help='CSV file for the results (default: sweep_results.csv)')
+    parser.add_argument('--work-dir', dest='work_dir',
+                        help='Directory for the generated models and cached results '
+                             '(default: sweep_<spec name> in the current directory)')
+    parser.add_argument('-n', '--replications', type=int, default=1, help='Replications per point (default: 1)')
+    parser.add_argument('--seed', type=int, default=0, help='Seed the replication seeds are derived from (default: 0)')
+    parser.add_argument('--until', type=float, default=3600, help='Simulation time of every replication (default: 3600)')
+    parser.add_argument('--formalism', choices=['classic', 'parallel'], default='classic',
+                        help='DEVS formalism to simulate with')
+    parser.add_argument('--confidence', type=float, choices=CONFIDENCE_LEVELS, default=0.95,
+                        help='Confidence level of the half widths (default: 0.95)')
+    parser.add_argument('--jobs', type=int, default=None, help='Number of worker processes (default: CPU count)')
+    parser.add_argument('--verbose', action='store_true', help='Enable verbose output')
+    args = parser.parse_args()
+    
+    set_debug(args.verbose)
+    if args.verbose:
+        os.environ['DEBUG'] = '1'
+    if args.replications < 1:
+        parser.error("--replications must be at least 1")
+    if not os.path.exists(args.saml_file):
+        print(f"Error: SAML file not found: {args.saml_file}")
+        return 1
+    
+    try:
+        spec = load_spec(args.spec_file)
+    except (OSError, ValueError) as e:
+        print(f"Error reading sweep specification: {str(e)}")
+        return 1
+    points = sweep_points(spec)
+    work_dir = args.work_dir or f"sweep_{os.path.splitext(os.path.basename(args.spec_file))[0]}"
+    
+    cache = ModelCache()
+    model = build_model(args.saml_file, args.hwml_file, cache=cache)
+    print(f"Sweeping {len(points)} points ({spec.get('method', 'grid')}) of {args.saml_file} until t={args.until}")
+    start = time.perf_counter()
+    try:
+        rows, computed = run_sweep(model, points, work_dir, args.replications, args.seed, args.until, args.formalism,
+                                   args.confidence, args.jobs, model_key=cache.key_for(args.saml_file, args.hwml_file))
+    except Exception as e:
+        print(f"Error running sweep: {str(e)}")
+        return 1
+    wall_time = time.perf_counter() - start
+    
+    write_table(rows, result_columns(points), args.output)
+    print(f"{computed} points run, {len(points) - computed} from the cache of {work_dir}, in {wall_time:.3f}s wall time")
+    print(f"Wrote the results of {len(rows)} points to {args.output}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+import os
+import sys
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+pytest.importorskip('pypdevs')
+
+from generator import debug_utils
+from generator.behaviour_graph import GuardSyntaxError, parse_guard
+from generator.model_ir import build_model
+
+SCUNA = os.path.join(ROOT, 'SAML-SAMPLE', 'model', 'SCUNA.capssaml')
+
+@pytest.mark.parametrize('text, condition, assignments', [
+    ('Valid', ('var', 'Valid'), []),
+    ('msg="InvalidValue"', None, [('msg', ('const', 'InvalidValue'))]),
+    ('false, msg="Room Full"', ('const', False), [('msg', ('const', 'Room Full'))]),
+    ('msg=="Active"', ('cmp', '==', ('var', 'msg'), ('const', 'Active')), []),
+    ('CurrentTime>PDTBeginn&&CurrentTime<PDTend',
+     ('and', ('cmp', '>', ('var', 'CurrentTime'), ('var', 'PDTBeginn')),
+      ('cmp', '<', ('var', 'CurrentTime'), ('var', 'PDTend'))), []),
+    ('!(a || b) && c >= 2.5', ('and', ('not', ('or', ('var', 'a'), ('var', 'b'))),
+                               ('cmp', '>=', ('var', 'c'), ('const', 2.5))), []),
+    ('msg="a, b", ok', ('var', 'ok'), [('msg', ('const', 'a, b'))]),
+    ('', None, []),
+])
+def test_parse_guard(text, condition, assignments):
+    guard = parse_guard(text)
+    
+    assert guard == {'text': text, 'condition': condition, 'assignments': assignments}
+
+@pytest.mark.parametrize('text', ['a <', '(a && b', 'a b', 'a # b'])
+def test_parse_guard_rejects_malformed_conditions(text):
+    with pytest.raises(GuardSyntaxError):
+        parse_guard(text)
+
+@pytest.fixture
+def scuna(monkeypatch):
+    monkeypatch.setattr(debug_utils, 'DEBUG', False)
+    model = build_model(SCUNA)
+    return {component['name']: component['behaviour'] for component in model.components}
+
+def states(graph, name):
+    """Return the ids of the states called name, in document order."""
+    return [state for state, state_name in enumerate(graph['names']) if state_name == name]
+
+def transitions(graph, state):
+    """Return the (target id, guard text) pairs leaving a state."""
+    result = []
+    for transition in range(graph['offsets'][state], graph['offsets'][state + 1]):
+        guard_id = graph['guards'][transition]
+        guard = graph['guard_table'][guard_id]['text'] if guard_id >= 0 else None
+        result.append((graph['targets'][transition], guard))
+    return result
+
+def test_compile_behaviour_follows_the_choice_chain(scuna):
+    graph = scuna['DoorLockSensor']
+    [entry], [c], [reject], [active] = (states(graph, name) for name in ('decide mode/entry0', 'C', '2 ', '3'))
+    first, second = states(graph, 'Choice')[1:]
+    
+    assert graph['kinds'][graph['state_kind'][c]] == 'Choice'
+    assert transitions(graph, entry) == [(c, 'Count<RoomCapacity')]
+    assert transitions(graph, c) == [(reject, 'false,msg="Room Full"'), (first, 'SClevel>=SCRElevel')]
+    assert transitions(graph, first) == [(reject, 'false, msg="access not allowed"'),
+                                         (second, 'CurrentTime>PDTBeginn&&CurrentTime<PDTend')]
+    assert transitions(graph, second) == [(reject, 'false, msg="access not allowed"'), (active, 'true,msg="Active"')]
+    assert (graph['state_ports'][reject], graph['state_ports'][active]) == ((0,), (1,))
+    assert transitions(graph, reject) == transitions(graph, active) == []
+
+def test_compile_behaviour_parses_each_guard_once(scuna):
+    graph = scuna['DoorLockSensor']
+    texts = [guard['text'] for guard in graph['guard_table']]
+    
+    assert len(texts) == len(set(texts))
+    assert list(graph['guards']).count(texts.index('false, msg="access not allowed"')) == 2
+    assert graph['guard_table'][texts.index('true,msg="Active"')]['assignments'] == [('msg', ('const', 'Active'))]
+
+def test_compile_behaviour_links_exits_to_their_target_mode(scuna):
+    graph = scuna['DoorLockSensor']
+    [orient], [orient_exit], [decide], [observe], [observe_exit] = (
+        states(graph, name) for name in
+        ('orient mode/entry0', 'orient mode/exit0', 'decide mode/entry0', 'SmartCard', 'observe mode/exit0'))
+    
+    assert transitions(graph, orient_exit) == [(decide, None)]
+    assert transitions(graph, observe_exit) == [(orient, None)]
+    assert list(graph['mode_entry']) == [orient, decide, observe]
+    assert graph['initial'] == orient
+
+def test_compile_behaviour_wires_the_controller_joins(scuna):
+    graph = scuna['Controller']
+    [timer], [receive], [send], [actuate] = (
+        states(graph, name) for name in ('TimerFired', 'ReceiveMessage', 'UnicastSendMessage', 'Actuate'))
+    join = states(graph, 'Join')[0]
+    
+    assert transitions(graph, timer) == [(join, None)]
+    assert transitions(graph, join) == [(actuate, 'disable'), (send, 'msg="welcomeMSG"')]
+    assert transitions(graph, receive) == [(states(graph, 'Join')[1], 'msg=="Active"')]
+    assert graph['state_ports'][receive] == (1,)
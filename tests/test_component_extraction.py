@@ -0,0 +1,59 @@
+import os
+import sys
+import random
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+pytest.importorskip('pypdevs')
+
+from generator import debug_utils
+from generator.component_extraction import ComponentNameIndex, merge_hwml_nodes, normalize_name
+
+def linear_candidates(components, node_name):
+    """The matching rule the index replaces: either normalized name contains the other."""
+    name = normalize_name(node_name)
+    return [idx for idx, component in enumerate(components)
+            if name in normalize_name(component['name']) or normalize_name(component['name']) in name]
+
+def random_name(rng):
+    # A small alphabet and short names so that containment is common
+    return ''.join(rng.choice('ab c') for _ in range(rng.randint(0, 6)))
+
+@pytest.mark.parametrize('seed', range(5))
+def test_index_finds_the_same_components_as_a_linear_scan(seed):
+    rng = random.Random(seed)
+    components = [{'name': random_name(rng)} for _ in range(60)]
+    index = ComponentNameIndex(components)
+    
+    for _ in range(200):
+        node_name = random_name(rng)
+        matches = linear_candidates(components, node_name)
+        best, all_matches = index.match(node_name)
+        
+        assert index.candidates(node_name) == matches
+        assert all_matches == [components[idx] for idx in matches]
+        if len(matches) == 1:
+            assert best is components[matches[0]]
+        assert (best is None) == (not matches)
+
+def test_index_prefers_the_exact_then_the_closest_name():
+    components = [{'name': 'Motion Sensor Hub'}, {'name': 'Motion'}, {'name': 'MotionSensor'}, {'name': 'Sensor'}]
+    index = ComponentNameIndex(components)
+    
+    assert index.match('Motion Sensor')[0] is components[2]
+    assert index.match('MotionSensorX')[0] is components[2]
+    assert index.match('Motio')[0] is components[1]
+    assert index.match('Light') == (None, [])
+
+def test_unmatched_nodes_become_components_later_nodes_match(monkeypatch):
+    monkeypatch.setattr(debug_utils, 'DEBUG', False)
+    components = [{'name': 'Motion Sensor'}]
+    node = {'protocol': 'Zigbee', 'routing': 'AODV', 'hw_details': {}}
+    
+    merge_hwml_nodes(components, [dict(node, name='MotionSensor'), dict(node, name='Gateway'),
+                                  dict(node, name='Gateway Node')])
+    
+    assert [component['name'] for component in components] == ['Motion Sensor', 'Gateway']
+    assert components[0]['source'] == 'both'
+    assert (components[1]['type'], components[1]['protocol']) == ('controller', 'Zigbee')
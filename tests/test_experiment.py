@@ -0,0 +1,41 @@
+import os
+import sys
+import subprocess
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+pytest.importorskip('pypdevs')
+
+from generator import debug_utils
+from generator.file_generators import generate_pydevs_from_saml
+
+MOTION_LIGHT = os.path.join(ROOT, 'SAML-SAMPLE', 'model', 'MotionLight.capssaml')
+
+def run_experiment(model_dir, *args):
+    """Run the generated experiment.py and return the lines the components printed."""
+    result = subprocess.run([sys.executable, 'experiment.py', '--seed', '3', '--until', '200', *args],
+                            cwd=model_dir, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    return [line for line in result.stdout.splitlines() if line.startswith(('[', 'Sink received'))]
+
+@pytest.fixture(params=[False, True], ids=['plain', 'compact'])
+def motion_light(request, tmp_path, monkeypatch):
+    monkeypatch.setattr(debug_utils, 'DEBUG', False)
+    generate_pydevs_from_saml(MOTION_LIGHT, output_dir=str(tmp_path), use_cache=False, compact=request.param)
+    return str(tmp_path)
+
+def test_parallel_devs_makes_the_classic_decisions(motion_light):
+    classic = run_experiment(motion_light, '--formalism', 'classic')
+    parallel = run_experiment(motion_light, '--formalism', 'parallel')
+    
+    assert any('Sending command' in line for line in classic)
+    assert parallel == classic
+
+@pytest.mark.parametrize('mode', ['fast', 'columnar'])
+def test_only_trace_mode_prints_every_event(motion_light, mode):
+    pytest.importorskip('numpy')
+    
+    assert run_experiment(motion_light, '--mode', 'trace')
+    assert run_experiment(motion_light, '--mode', mode) == []
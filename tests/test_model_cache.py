@@ -0,0 +1,71 @@
+import os
+import sys
+import shutil
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+pytest.importorskip('pypdevs')
+
+from generator import debug_utils, model_ir
+from generator.model_cache import ModelCache
+
+MOTION_LIGHT = os.path.join(ROOT, 'SAML-SAMPLE', 'model', 'MotionLight.capssaml')
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(debug_utils, 'DEBUG', False)
+    return ModelCache(cache_dir=str(tmp_path / 'cache'))
+
+def entries(cache):
+    return sorted(name for name in os.listdir(cache.cache_dir) if name.endswith('.pickle'))
+
+def test_second_build_is_a_cache_hit(cache, monkeypatch):
+    parsed = model_ir.build_model(MOTION_LIGHT, cache=cache)
+    assert entries(cache) == [f"{cache.key_for(MOTION_LIGHT)}.pickle"]
+    
+    def parse_saml_file(*args, **kwargs):
+        raise AssertionError("a cached model was parsed again")
+    monkeypatch.setattr(model_ir, 'parse_saml_file', parse_saml_file)
+    cached = model_ir.build_model(MOTION_LIGHT, cache=cache)
+    
+    assert cached.components == parsed.components
+    assert cached.connections == parsed.connections
+    assert cached.saml_file == MOTION_LIGHT
+
+def test_changed_input_is_a_cache_miss(cache, tmp_path):
+    saml_file = str(tmp_path / 'model.capssaml')
+    shutil.copy(MOTION_LIGHT, saml_file)
+    model_ir.build_model(saml_file, cache=cache)
+    key = cache.key_for(saml_file)
+    
+    with open(saml_file, 'a') as f:
+        f.write('\n')
+    
+    assert cache.key_for(saml_file) != key
+    assert cache.load(cache.key_for(saml_file)) is None
+    model_ir.build_model(saml_file, cache=cache)
+    assert len(entries(cache)) == 2
+
+def test_unreadable_entry_is_discarded(cache):
+    cache.store('broken', {})
+    with open(os.path.join(cache.cache_dir, 'broken.pickle'), 'wb') as f:
+        f.write(b'not a pickle')
+    
+    assert cache.load('broken') is None
+    assert entries(cache) == []
+
+def test_least_recently_used_entries_are_evicted(cache):
+    for age, key in enumerate(['newest', 'middle', 'oldest']):
+        cache.store(key, {'payload': bytes(1000)})
+        mtime = 1_000_000 - 100 * age
+        os.utime(os.path.join(cache.cache_dir, f"{key}.pickle"), (mtime, mtime))
+    size = os.path.getsize(os.path.join(cache.cache_dir, 'oldest.pickle'))
+    
+    # Loading an entry marks it as the most recently used
+    assert cache.load('oldest') == {'payload': bytes(1000)}
+    cache.max_bytes = 3 * size
+    cache.store('latest', {'payload': bytes(1000)})
+    
+    assert entries(cache) == ['latest.pickle', 'newest.pickle', 'oldest.pickle']
@@ -0,0 +1,58 @@
+import os
+import sys
+import math
+import random
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from generator import debug_utils
+from generator.parse_connections import hwml_connections, iter_hwml_connections
+
+@pytest.fixture(autouse=True)
+def quiet(monkeypatch):
+    monkeypatch.setattr(debug_utils, 'DEBUG', False)
+
+def node(name, protocol='Zigbee', position=None, radio_range=None):
+    return {'name': name, 'protocol': protocol, 'routing': 'AODV', 'position': position, 'range': radio_range}
+
+def links(connections):
+    return [(conn['source_component'], conn['target_component']) for conn in connections]
+
+@pytest.mark.parametrize('seed, dims', [(0, 2), (1, 2), (2, 3)])
+def test_radio_links_match_all_pairs_in_range(seed, dims):
+    rng = random.Random(seed)
+    nodes = [node(f"n{i}", position=[rng.uniform(0, 50) for _ in range(dims)], radio_range=rng.uniform(2, 10))
+             for i in range(150)]
+    expected = {(a['name'], b['name']) for i, a in enumerate(nodes) for b in nodes[i + 1:]
+                if math.dist(a['position'], b['position']) <= min(a['range'], b['range'])}
+    
+    found = links(iter_hwml_connections(nodes))
+    
+    assert expected
+    assert len(found) == len(set(found))
+    assert {tuple(sorted(link, key=lambda name: int(name[1:]))) for link in found} == expected
+
+def test_groups_without_positions_form_a_star_around_the_coordinator():
+    nodes = [node('Lamp'), node('Motion Sensor'), node('Home Gateway'), node('Fan', position=[0, 0], radio_range=5)]
+    
+    assert links(iter_hwml_connections(nodes)) == [('Home Gateway', 'Lamp'), ('Home Gateway', 'Motion Sensor'),
+                                                   ('Home Gateway', 'Fan')]
+
+def test_protocol_groups_are_chained_by_their_coordinators():
+    nodes = [node('Lamp'), node('Door Controller', 'BLE'), node('Zigbee Gateway'), node('Lock', 'BLE'),
+             node('Meter', 'LoRa')]
+    
+    connections = hwml_connections(nodes)
+    
+    assert links(connections) == [('Zigbee Gateway', 'Lamp'), ('Door Controller', 'Lock'),
+                                  ('Zigbee Gateway', 'Door Controller'), ('Door Controller', 'Meter')]
+    assert connections[-1] == {'source_component': 'Door Controller', 'source_port': 'BLE', 'source_port_type': 'AODV',
+                               'target_component': 'Meter', 'target_port': 'LoRa', 'target_port_type': 'AODV'}
+
+def test_star_edges_grow_linearly():
+    nodes = [node(f"n{i}") for i in range(1000)]
+    connections = iter_hwml_connections(nodes)
+    
+    assert iter(connections) is connections
+    assert sum(1 for _ in connections) == 999
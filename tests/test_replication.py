@@ -0,0 +1,67 @@
+import os
+import sys
+import math
+import random
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+pytest.importorskip('pypdevs')
+
+from generator.replication import CONFIDENCE_LEVELS, confidence_interval, replication_seeds, t_quantile
+
+def test_replication_seeds_are_reproducible_and_independent():
+    seeds = replication_seeds(7, 100)
+    
+    assert seeds == replication_seeds(7, 100)
+    assert len(set(seeds)) == 100
+    assert all(0 <= seed < 2 ** 64 for seed in seeds)
+    assert replication_seeds(7, 150)[:100] == seeds
+    assert not set(replication_seeds(8, 100)) & set(seeds)
+
+@pytest.mark.parametrize('confidence, df, expected', [
+    (0.95, 1, 12.706),
+    (0.95, 9, 2.262),
+    (0.90, 30, 1.697),
+    (0.99, 120, 2.617),
+    # Interpolated in 1/df; the exact quantiles are 2.030 and 1.679
+    (0.95, 35, 2.030),
+    (0.90, 50, 1.676),
+    # Beyond the table the normal quantile is used
+    (0.95, 1000, 1.960),
+])
+def test_t_quantile(confidence, df, expected):
+    assert t_quantile(confidence, df) == pytest.approx(expected, abs=2e-3)
+
+@pytest.mark.parametrize('confidence', CONFIDENCE_LEVELS)
+def test_t_quantile_falls_with_the_degrees_of_freedom(confidence):
+    quantiles = [t_quantile(confidence, df) for df in range(1, 200)]
+    
+    assert all(a >= b for a, b in zip(quantiles, quantiles[1:]))
+
+def test_t_quantile_rejects_other_confidence_levels():
+    with pytest.raises(ValueError, match='Unsupported confidence level'):
+        t_quantile(0.8, 10)
+
+def test_confidence_interval():
+    center, half_width = confidence_interval(iter([1.0, 2.0, 3.0, 4.0, 5.0]))
+    
+    assert center == 3.0
+    assert half_width == pytest.approx(2.776 * math.sqrt(2.5) / math.sqrt(5))
+    assert confidence_interval([1.0, 2.0, 3.0], confidence=0.99)[1] > confidence_interval([1.0, 2.0, 3.0])[1]
+
+def test_confidence_interval_needs_two_values():
+    center, half_width = confidence_interval([4.0])
+    assert center == 4.0 and math.isnan(half_width)
+    
+    center, half_width = confidence_interval([])
+    assert math.isnan(center) and math.isnan(half_width)
+
+def test_confidence_interval_covers_the_mean():
+    rng = random.Random(1)
+    covered = 0
+    for _ in range(2000):
+        center, half_width = confidence_interval([rng.gauss(10.0, 3.0) for _ in range(8)])
+        covered += abs(center - 10.0) <= half_width
+    
+    assert 0.93 <= covered / 2000 <= 0.97
@@ -0,0 +1,55 @@
+import os
+import sys
+import subprocess
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+pytest.importorskip('numpy')
+pytest.importorskip('pypdevs')
+
+from generator import debug_utils
+from generator.file_generators import generate_pydevs_from_saml
+from generator.model_ir import ParsedModel
+
+# Builds the generated model and prints the out ports of every bank, at any depth
+BUILD = """
+import io, contextlib
+def atomic_models(model):
+    for submodel in model.component_set:
+        yield from atomic_models(submodel) if hasattr(submodel, 'component_set') else [submodel]
+with contextlib.redirect_stdout(io.StringIO()):
+    import model
+    system = model.SystemModel()
+print(sorted(len(submodel.out_ports) for submodel in atomic_models(system) if type(submodel).__name__ == 'SensorBank'))
+"""
+
+def sensor_model(count, ports=2, connected=False):
+    """Return a model of count identical sensors, the first of them connected to a server if connected is set."""
+    components = [{
+        'name': f"Temperature Sensor {index}",
+        'type': 'sensor',
+        'in_ports': [],
+        'out_ports': list(range(ports)),
+        'data_interval': 5.0
+    } for index in range(count)]
+    components.append({'name': 'DataServer', 'type': 'interface', 'in_ports': [0], 'out_ports': []})
+    connections = [{'source_component': 'Temperature Sensor 0', 'source_port': 0, 'source_port_type': 'output',
+                    'target_component': 'DataServer', 'target_port': 0, 'target_port_type': 'input'}]
+    return ParsedModel(components, connections if connected else [])
+
+# Banks of sensors connected to other components than the sink are always expanded
+@pytest.mark.parametrize('sensor_banks, connected, options, expected', [
+    ('batched', False, {}, '[2]'),
+    ('expanded', False, {}, '[8]'),
+    ('batched', True, {}, '[8]'),
+    ('batched', True, {'compact': True, 'bundle': True, 'cluster_strategy': 'partition'}, '[8]'),
+])
+def test_generated_bank_model_builds(tmp_path, monkeypatch, sensor_banks, connected, options, expected):
+    monkeypatch.setattr(debug_utils, 'DEBUG', False)
+    generate_pydevs_from_saml(None, output_dir=str(tmp_path), model=sensor_model(4, connected=connected),
+                              use_cache=False, sensor_banks=sensor_banks, **options)
+    
+    result = subprocess.run([sys.executable, '-c', BUILD], cwd=str(tmp_path), capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == [expected]
@@ -0,0 +1,47 @@
+import os
+import sys
+import subprocess
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+pytest.importorskip('pypdevs')
+
+from generator import debug_utils
+from generator.file_generators import generate_random_stream_file, generate_sensor_file
+
+# Takes two readings of the generated sensor, keeping the first message as a consumer would
+EMIT = """
+import time
+from temperature_sensor import TemperatureSensor, SensorReading
+sensor = TemperatureSensor("Temperature Sensor")
+port = sensor.outport0
+before = int(time.time())
+first = sensor.outputFnc()[port]
+kept = first if isinstance(first, SensorReading) else first['m2m:cin']['con']
+kept_value, kept_text = kept.value, str(kept)
+sensor.intTransition()
+second = sensor.outputFnc()[port]
+reading = second if isinstance(second, SensorReading) else second['m2m:cin']['con']
+assert first is not second
+assert kept is not reading
+assert (kept.value, str(kept)) == (kept_value, kept_text)
+assert (kept.sim_time, reading.sim_time) == (1.0, 6.0)
+assert before <= kept.stamp <= int(time.time())
+assert kept_text == f"Temperature Sensor, {kept.stamp}, {kept.value}"
+try:
+    kept.value = 0
+except AttributeError:
+    print("immutable")
+"""
+
+@pytest.mark.parametrize('compact', [False, True])
+def test_kept_messages_do_not_change(tmp_path, monkeypatch, compact):
+    monkeypatch.setattr(debug_utils, 'DEBUG', False)
+    sensor = {'name': 'Temperature Sensor', 'type': 'sensor', 'in_ports': [], 'out_ports': [0], 'data_interval': 5.0}
+    generate_sensor_file(sensor, str(tmp_path), compact=compact)
+    generate_random_stream_file(str(tmp_path))
+    
+    result = subprocess.run([sys.executable, '-c', EMIT], cwd=str(tmp_path), capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.split() == ['immutable']
@@ -0,0 +1,88 @@
+import os
+import sys
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+pytest.importorskip('pypdevs')
+
+from generator import debug_utils, sweep
+from generator.model_ir import build_model
+
+MOTION_LIGHT = os.path.join(ROOT, 'SAML-SAMPLE', 'model', 'MotionLight.capssaml')
+
+RANGES = {'data_interval': [1.0, 5.0], 'simulated_delay.controller': [0.1, 0.2]}
+
+@pytest.mark.parametrize('samples', [1, 7, 50])
+def test_latin_hypercube_uses_every_stratum_once(samples):
+    points = sweep.latin_hypercube(RANGES, samples, seed=3)
+    
+    assert len(points) == samples
+    for name, (low, high) in RANGES.items():
+        strata = sorted(int((point[name] - low) / (high - low) * samples) for point in points)
+        assert strata == list(range(samples))
+
+def test_latin_hypercube_is_reproducible():
+    points = sweep.latin_hypercube(RANGES, 10, seed=3)
+    
+    assert sweep.latin_hypercube(RANGES, 10, seed=3) == points
+    assert sweep.latin_hypercube(RANGES, 10, seed=4) != points
+    assert sweep.sweep_points({'method': 'lhs', 'parameters': RANGES, 'samples': 10, 'seed': 3}) == points
+
+@pytest.fixture
+def runs(monkeypatch):
+    """Record the points run_sweep simulates instead of simulating them."""
+    monkeypatch.setattr(debug_utils, 'DEBUG', False)
+    runs = []
+    
+    def run_point(model, point, model_dir, settings):
+        runs.append(point)
+        return dict(point, transitions=len(runs))
+    monkeypatch.setattr(sweep, 'run_point', run_point)
+    return runs
+
+@pytest.fixture
+def model(monkeypatch):
+    monkeypatch.setattr(debug_utils, 'DEBUG', False)
+    return build_model(MOTION_LIGHT)
+
+def test_completed_points_are_reused(runs, model, tmp_path):
+    points = sweep.grid_points({'data_interval': [1.0, 2.0]})
+    rows, ran = sweep.run_sweep(model, points, str(tmp_path), jobs=1, model_key='motion')
+    assert ran == 2
+    
+    # Extending the sweep only runs the new point
+    extended = points + [{'data_interval': 3.0}]
+    cached_rows, ran = sweep.run_sweep(model, extended, str(tmp_path), jobs=1, model_key='motion')
+    
+    assert ran == 1
+    assert cached_rows[:2] == rows
+    assert runs == extended
+
+def test_points_are_rerun_for_other_settings_or_models(runs, model, tmp_path):
+    points = [{'data_interval': 1.0}]
+    sweep.run_sweep(model, points, str(tmp_path), jobs=1, model_key='motion')
+    
+    assert sweep.run_sweep(model, points, str(tmp_path), jobs=1, model_key='motion', until=10)[1] == 1
+    assert sweep.run_sweep(model, points, str(tmp_path), jobs=1, model_key='other')[1] == 1
+    assert sweep.run_sweep(model, points, str(tmp_path), jobs=1, model_key='motion')[1] == 0
+
+def test_repeated_points_run_once(runs, model, tmp_path):
+    rows, ran = sweep.run_sweep(model, [{'data_interval': 1.0}] * 3, str(tmp_path), jobs=1)
+    
+    assert ran == 1
+    assert rows == [{'data_interval': 1.0, 'transitions': 1}] * 3
+
+def test_unreadable_results_are_run_again(runs, model, tmp_path):
+    points = [{'data_interval': 1.0}]
+    sweep.run_sweep(model, points, str(tmp_path), jobs=1)
+    results = os.path.join(str(tmp_path), 'results')
+    for name in os.listdir(results):
+        with open(os.path.join(results, name), 'w') as f:
+            f.write('{')
+    
+    rows, ran = sweep.run_sweep(model, points, str(tmp_path), jobs=1)
+    
+    assert ran == 1
+    assert rows == [{'data_interval': 1.0, 'transitions': 2}]